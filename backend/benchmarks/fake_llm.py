@@ -0,0 +1,171 @@
+"""Stand-in OpenAI-compatible chat completions server for offline benchmarks.
+
+    python -m benchmarks.fake_llm --port 9100 --latency 0.8 --jitter 0.3 --tokens-per-second 80 --error-rate 0.02
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1 and any OPENAI_API_KEY.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+@dataclass
+class FakeLLMConfig:
+    latency: float = 0.5            # seconds before the first token
+    jitter: float = 0.2             # +/- uniform jitter applied to latency
+    tokens_per_second: float = 0.0  # 0 means the whole completion is available immediately
+    error_rate: float = 0.0         # fraction of calls answered with HTTP 500
+    chars_per_token: int = 4
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0.5")),
+            jitter=float(os.getenv("FAKE_LLM_JITTER", "0.2")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+        )
+
+COMPONENT_CODE = """import React from 'react';
+
+export default function {name}() {{
+  return (
+    <section className="py-16 px-6 bg-white">
+      <div className="max-w-6xl mx-auto">
+        <h2 className="text-3xl font-bold text-gray-900 mb-4">{name}</h2>
+        <p className="text-gray-600">Generated by the benchmark stand-in model.</p>
+      </div>
+    </section>
+  );
+}}"""
+
+def _completion_text(messages: List[Dict[str, str]]) -> str:
+    system = messages[0]["content"] if messages else ""
+    prompt = messages[-1]["content"] if messages else ""
+
+    if "architect" in system:
+        return json.dumps({
+            "title": prompt.splitlines()[0][:60],
+            "description": prompt,
+            "stack": "React + TypeScript + Tailwind",
+            "features": ["Responsive design", "Contact form"],
+            "components_sequence": ["Navbar", "Hero", "About", "Features", "Contact", "Footer"]
+        })
+
+    if "React developer" in system:
+        name = "Component"
+        for line in prompt.splitlines():
+            if "component:" in line.lower():
+                name = line.split(":", 1)[1].strip().split()[0] or name
+                break
+        return json.dumps({
+            "name": name,
+            "filename": f"src/components/{name}.tsx",
+            "code": COMPONENT_CODE.format(name=name),
+            "explanation": f"{name} section"
+        })
+
+    return "<!DOCTYPE html><html><body>" + "<section><h1>Preview</h1><p>Lorem ipsum dolor sit amet.</p></section>" * 20 + "</body></html>"
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    app.state.calls = 0
+
+    async def _wait_first_token() -> None:
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+    def _usage(messages: List[Dict[str, str]], text: str) -> Dict[str, int]:
+        prompt_chars = sum(len(message.get("content", "")) for message in messages)
+        prompt_tokens = prompt_chars // config.chars_per_token + 1
+        completion_tokens = len(text) // config.chars_per_token + 1
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    @app.get("/v1/models")
+    async def models():
+        return {"data": [{"id": "fake-model", "object": "model"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": app.state.calls}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        messages = body.get("messages", [])
+        text = _completion_text(messages)
+
+        max_tokens = body.get("max_tokens")
+        finish_reason = "stop"
+        if max_tokens and len(text) > max_tokens * config.chars_per_token:
+            text = text[:max_tokens * config.chars_per_token]
+            finish_reason = "length"
+
+        await _wait_first_token()
+        if random.random() < config.error_rate:
+            return JSONResponse(status_code=500, content={"error": {"message": "injected failure", "type": "server_error"}})
+
+        created = int(time.time())
+        if not body.get("stream"):
+            if config.tokens_per_second > 0:
+                await asyncio.sleep(len(text) / config.chars_per_token / config.tokens_per_second)
+            return {
+                "id": f"chatcmpl-fake-{app.state.calls}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "fake-model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+                "usage": _usage(messages, text)
+            }
+
+        async def events():
+            step = config.chars_per_token
+            delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+            for start in range(0, len(text), step):
+                chunk = {
+                    "id": f"chatcmpl-fake-{app.state.calls}",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "choices": [{"index": 0, "delta": {"content": text[start:start + step]}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if delay:
+                    await asyncio.sleep(delay)
+            final = {"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "usage": _usage(messages, text)}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+app = create_app(FakeLLMConfig.from_env())
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeLLMConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Load test the backend against the fake LLM server and report per-endpoint latency percentiles.
+
+    python -m benchmarks.load_test --concurrency 1,8,32 --iterations 3 --latency 0.5
+
+By default both the fake LLM and the backend are started as local uvicorn subprocesses.
+Pass --target http://host:port to drive an already running backend instead.
+
+Components are built by the LLM by default (the local backend runs with COMPONENT_LIBRARY=false and
+steps ask for use_llm); --component-path library measures library renders instead. The report
+counts which source actually served each /generate-step.
+"""
+import os
+import sys
+import json
+import math
+import time
+import tempfile
+import socket
+import asyncio
+import argparse
+import subprocess
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ["/start-project", "/generate-step", "/generate-preview", "/session/{id}"]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.step_sources: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response
+
+    def report(self, wall_time: float) -> Dict[str, Dict[str, Any]]:
+        rows: Dict[str, Dict[str, Any]] = {}
+        for label in ENDPOINTS:
+            samples = self.latencies.get(label, [])
+            rows[label] = {
+                "requests": len(samples),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(samples) / wall_time, 2) if wall_time else 0.0,
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1)
+            }
+        rows["/generate-step"]["sources"] = dict(self.step_sources)
+        return rows
+
+async def virtual_user(client: httpx.AsyncClient, recorder: Recorder, user: int, iterations: int, steps: int, use_llm: bool) -> None:
+    for iteration in range(iterations):
+        # Unique inputs per user and iteration so the plan cache and preview store don't hide LLM latency
+        idea = f"Portfolio website for developer {user}-{iteration} with projects and contact form"
+        response = await recorder.call(client, "/start-project", "POST", "/start-project", json={"idea": idea})
+        if response is None:
+            continue
+        session_id = response.json()["session_id"]
+
+        for _ in range(steps):
+            step = await recorder.call(client, "/generate-step", "POST", "/generate-step", json={"session_id": session_id, "use_llm": use_llm})
+            if step is not None:
+                recorder.step_sources[step.json().get("source") or "unknown"] += 1
+            await recorder.call(client, "/session/{id}", "GET", f"/session/{session_id}")
+            if step is None or not step.json().get("remaining"):
+                break
+
+        await recorder.call(client, "/generate-preview", "POST", "/generate-preview", json={"prompt": idea})
+
+async def run_level(base_url: str, concurrency: int, iterations: int, steps: int, use_llm: bool) -> Dict[str, Dict[str, Any]]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(client, recorder, user, iterations, steps, use_llm) for user in range(concurrency)))
+        wall_time = time.perf_counter() - started
+    return recorder.report(wall_time)
+
+def print_report(concurrency: int, component_path: str, rows: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\nconcurrency={concurrency} component_path={component_path}")
+    print(f"{'endpoint':<20}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, row in rows.items():
+        print(f"{label:<20}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    sources = ", ".join(f"{source}={count}" for source, count in sorted(rows["/generate-step"]["sources"].items()))
+    print(f"/generate-step served by: {sources or 'none'}")
+
+async def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                response = await client.get(url)
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+def start_servers(args: argparse.Namespace) -> List[subprocess.Popen]:
+    llm_port = free_port()
+    backend_port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "FAKE_LLM_LATENCY": str(args.latency),
+        "FAKE_LLM_JITTER": str(args.jitter),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "COMPONENT_LIBRARY": "true" if args.component_path == "library" else "false",
+        "PYTHONPATH": BACKEND_DIR
+    })
+    if args.workers > 1 and "SESSION_BACKEND" not in env:
+        # Sessions must be visible to every worker
+        env["SESSION_BACKEND"] = "sqlite"
+        env["SESSION_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="lovable-bench-"), "sessions.db")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "benchmarks.fake_llm:app", "--port", str(llm_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        ),
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(backend_port), "--log-level", "warning", "--workers", str(args.workers)],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL if args.quiet else None
+        )
+    ]
+    args.target = f"http://127.0.0.1:{backend_port}"
+    args.llm_url = f"http://127.0.0.1:{llm_port}/v1/models"
+    return processes
+
+async def main_async(args: argparse.Namespace) -> Dict[int, Dict[str, Dict[str, Any]]]:
+    if args.llm_url:
+        await wait_until_ready(args.llm_url)
+    await wait_until_ready(f"{args.target}/health")
+
+    results = {}
+    for concurrency in args.concurrency:
+        rows = await run_level(args.target, concurrency, args.iterations, args.steps, args.component_path == "llm")
+        print_report(concurrency, args.component_path, rows)
+        results[concurrency] = rows
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend load test with a local fake LLM")
+    parser.add_argument("--target", help="Base URL of a running backend; skips starting local servers")
+    parser.add_argument("--concurrency", default="1,8,32", type=lambda value: [int(level) for level in value.split(",")])
+    parser.add_argument("--iterations", type=int, default=2, help="projects built per virtual user")
+    parser.add_argument("--steps", type=int, default=3, help="generate-step calls per project")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local backend")
+    parser.add_argument("--component-path", choices=["llm", "library"], default="llm", help="what builds components: the (fake) LLM or the component library")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    parser.add_argument("--quiet", action="store_true", help="silence backend stdout")
+    args = parser.parse_args()
+    args.llm_url = None
+
+    processes = [] if args.target else start_servers(args)
+    try:
+        results = asyncio.run(main_async(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    if args.json_path:
+        with open(args.json_path, "w") as output:
+            json.dump({"component_path": args.component_path, "results": results}, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Micro-benchmarks for CodeValidator and ProjectService hot paths.
+
+    python -m benchmarks.micro --number 2000
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from typing import Callable, Dict, List
+from core.ai.code_generator import CodeGenerator
+from core.services.project_service import ProjectService
+from core.services.session_store import InMemorySessionStore, SQLiteSessionStore
+from core.utils.validators import CodeValidator
+from core.utils.tsx_scanner import scan_tsx
+
+def timeit(label: str, func: Callable[[], object], number: int) -> Dict[str, float]:
+    func()
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    elapsed = time.perf_counter() - started
+    per_call_us = elapsed / number * 1e6
+    print(f"{label:<48}{per_call_us:>12.1f} us/call{number / elapsed:>14.0f} calls/s")
+    return {"label": label, "us_per_call": per_call_us}
+
+def sample_components() -> Dict[str, str]:
+    generator = CodeGenerator()
+    small = generator._generate_fallback_component("Hero", {"title": "Benchmark"})["code"]
+    sections = [small.replace("export default function Hero", f"function Section{i}") for i in range(25)]
+    large = "\n\n".join(sections) + "\n\n" + small
+    return {"small": small, "large": large}
+
+def bench_validator(number: int) -> List[Dict[str, float]]:
+    results = []
+    for size, code in sample_components().items():
+        results.append(timeit(f"scan_tsx [{size}, {len(code)} chars]", lambda: scan_tsx(code), number))
+
+        def cold() -> None:
+            CodeValidator(cache_size=1).validate_component_code(code + " ")
+        results.append(timeit(f"validate_component_code cold [{size}]", cold, number))
+
+        validator = CodeValidator()
+        results.append(timeit(f"validate_component_code memoized [{size}]", lambda: validator.validate_component_code(code), number))
+
+        broken = code.replace('className="', 'class="')
+        results.append(timeit(f"validate_and_fix [{size}]", lambda: CodeValidator(cache_size=4).validate_and_fix(broken), number))
+    return results
+
+def bench_project_service(store_name: str, service: ProjectService, number: int) -> List[Dict[str, float]]:
+    plan = {"title": "Benchmark", "components_sequence": [f"Component{i}" for i in range(12)]}
+    code = sample_components()["small"]
+    # Writes are coroutines (run on the writer thread for SQLite); one loop serves every call
+    run = asyncio.new_event_loop().run_until_complete
+    results = [timeit(f"[{store_name}] create_session", lambda: run(service.create_session("Benchmark idea", plan)), number)]
+
+    session_id = run(service.create_session("Benchmark idea", plan))
+    counter = iter(range(10 ** 9))
+
+    def add() -> None:
+        index = next(counter)
+        run(service.add_generated_component(session_id, {"name": f"Component{index % 12}", "code": code}))
+    # Keep the session bounded in size while measuring
+    results.append(timeit(f"[{store_name}] add_generated_component", add, min(number, 200)))
+    results.append(timeit(f"[{store_name}] get_session", lambda: service.get_session(session_id), number))
+    results.append(timeit(f"[{store_name}] get_progress_stats", lambda: service.get_progress_stats(session_id), number))
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Validator and session micro-benchmarks")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("CodeValidator")
+    bench_validator(args.number)
+
+    print("\nProjectService")
+    bench_project_service("memory", ProjectService(InMemorySessionStore()), args.number)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="lovable-bench-"), "sessions.db")
+    bench_project_service("sqlite", ProjectService(SQLiteSessionStore(db_path)), max(1, args.number // 10))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import math
+import time
+import asyncio
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+from core.utils.metrics import Counter, Gauge
+
+DEFAULT_LIMITS = {"plan": 16, "component": 32, "preview": 16}
+
+ADMISSION_REJECTIONS = Counter("llm_admission_rejections_total", "LLM calls refused by admission control", ["call_type", "reason"])
+ADMISSION_WAIT_SECONDS = Counter("llm_admission_wait_seconds_total", "Time LLM calls spent queued for a slot", ["call_type"])
+ADMISSION_QUEUE_DEPTH = Gauge("llm_admission_queue_depth", "LLM calls waiting for a slot")
+
+# Who a call is charged to (session id, else client address) and whether it may queue
+_admission_key: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("admission_key", default=None)
+_background: contextvars.ContextVar[bool] = contextvars.ContextVar("admission_background", default=False)
+
+@contextmanager
+def admission_scope(key: Optional[str] = None, background: Optional[bool] = None) -> Iterator[None]:
+    """Charge LLM calls made (or tasks created) inside the block to key.
+
+    Background calls never queue: they run only if a slot is free right away.
+    """
+    tokens = []
+    if key is not None:
+        tokens.append((_admission_key, _admission_key.set(key)))
+    if background is not None:
+        tokens.append((_background, _background.set(background)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def current_admission_key() -> Optional[str]:
+    return _admission_key.get()
+
+def in_background() -> bool:
+    return _background.get()
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing an LLM call; maps to HTTP 429 (per-session) or 503 (overloaded)."""
+
+    def __init__(self, call_type: str, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"LLM capacity for {call_type} calls exhausted ({reason}), retry after {retry_after}s")
+        self.call_type = call_type
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class _Lane:
+    """Slots and fair wait queue for one call type."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.active_by_key: Dict[Optional[str], int] = {}
+        # Round-robin over keys; each key has its own FIFO of waiter futures
+        self.queues: "OrderedDict[Optional[str], Deque[asyncio.Future]]" = OrderedDict()
+        self.queued = 0
+        self.avg_hold = 2.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def has_room(self, key: Optional[str], per_key_limit: int) -> bool:
+        if self.limit and self.active >= self.limit:
+            return False
+        return not per_key_limit or key is None or self.active_by_key.get(key, 0) < per_key_limit
+
+    def take(self, key: Optional[str]) -> None:
+        self.active += 1
+        self.active_by_key[key] = self.active_by_key.get(key, 0) + 1
+        self.admitted += 1
+
+    def give_back(self, key: Optional[str], held: float) -> None:
+        self.active -= 1
+        remaining = self.active_by_key.get(key, 1) - 1
+        if remaining:
+            self.active_by_key[key] = remaining
+        else:
+            self.active_by_key.pop(key, None)
+        self.avg_hold = 0.8 * self.avg_hold + 0.2 * held
+
+    def retry_after(self) -> int:
+        slots = self.limit or 1
+        return int(min(60, max(1, math.ceil(self.avg_hold * (self.queued + 1) / slots))))
+
+class AdmissionController:
+    """Per-call-type concurrency limits in front of the LLM, with a bounded, per-session fair queue."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 16,
+        max_queue: int = 100,
+        max_wait: float = 15.0,
+        per_key_limit: int = 4,
+        per_key_queue: int = 8
+    ):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.per_key_limit = per_key_limit
+        self.per_key_queue = per_key_queue
+        self._lanes: Dict[str, _Lane] = {}
+        ADMISSION_QUEUE_DEPTH.set_function(self.queue_depth)
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        limits = {}
+        for call_type in ("plan", "component", "preview"):
+            value = os.getenv(f"ADMISSION_{call_type.upper()}_LIMIT")
+            if value:
+                limits[call_type] = int(value)
+        return cls(
+            limits=limits,
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "15")),
+            per_key_limit=int(os.getenv("ADMISSION_SESSION_LIMIT", "4")),
+            per_key_queue=int(os.getenv("ADMISSION_SESSION_QUEUE", "8"))
+        )
+
+    def _lane(self, call_type: str) -> _Lane:
+        lane = self._lanes.get(call_type)
+        if lane is None:
+            lane = self._lanes[call_type] = _Lane(self.limits.get(call_type, self.default_limit))
+        return lane
+
+    def _reject(self, call_type: str, lane: _Lane, reason: str, status_code: int) -> AdmissionRejected:
+        lane.rejected += 1
+        ADMISSION_REJECTIONS.labels(call_type=call_type, reason=reason).inc()
+        return AdmissionRejected(call_type, reason, status_code, lane.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, call_type: str, key: Optional[str] = None) -> AsyncIterator[None]:
+        key = key if key is not None else current_admission_key()
+        lane = self._lane(call_type)
+        await self._acquire(call_type, lane, key)
+        acquired_at = time.monotonic()
+        try:
+            yield
+        finally:
+            lane.give_back(key, time.monotonic() - acquired_at)
+            self._dispatch(lane)
+
+    async def _acquire(self, call_type: str, lane: _Lane, key: Optional[str]) -> None:
+        # Queued callers go first, except when every queued caller is blocked by its own session limit
+        if lane.has_room(key, self.per_key_limit) and not self._has_eligible_waiter(lane):
+            lane.take(key)
+            return
+
+        if _background.get():
+            raise self._reject(call_type, lane, "busy", 503)
+        if self.max_queue and lane.queued >= self.max_queue:
+            raise self._reject(call_type, lane, "queue_full", 503)
+        waiting = lane.queues.get(key)
+        if key is not None and waiting is not None and self.per_key_queue and len(waiting) >= self.per_key_queue:
+            raise self._reject(call_type, lane, "session_queue_full", 429)
+
+        future = asyncio.get_running_loop().create_future()
+        lane.queues.setdefault(key, deque()).append(future)
+        lane.queued += 1
+        enqueued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait or None)
+        except asyncio.TimeoutError:
+            if not self._withdraw(lane, key, future):
+                # Granted at the same moment the wait ran out; keep the slot
+                return
+            lane.timed_out += 1
+            raise self._reject(call_type, lane, "wait_timeout", 503)
+        except asyncio.CancelledError:
+            if not self._withdraw(lane, key, future):
+                # The slot was handed over already; pass it on
+                lane.give_back(key, 0.0)
+                self._dispatch(lane)
+            raise
+        finally:
+            ADMISSION_WAIT_SECONDS.labels(call_type=call_type).inc(time.monotonic() - enqueued_at)
+
+    def _withdraw(self, lane: _Lane, key: Optional[str], future: asyncio.Future) -> bool:
+        """Remove a waiter that gave up; False if it had already been granted a slot."""
+        if future.done():
+            return False
+        future.cancel()
+        waiting = lane.queues.get(key)
+        if waiting is not None:
+            try:
+                waiting.remove(future)
+                lane.queued -= 1
+            except ValueError:
+                pass
+            if not waiting:
+                del lane.queues[key]
+        return True
+
+    def _has_eligible_waiter(self, lane: _Lane) -> bool:
+        return any(not self.per_key_limit or key is None or lane.active_by_key.get(key, 0) < self.per_key_limit for key in lane.queues)
+
+    def _dispatch(self, lane: _Lane) -> None:
+        while lane.queues and (not lane.limit or lane.active < lane.limit):
+            # Serve the first session in round-robin order that is under its own limit
+            for key in lane.queues:
+                if not self.per_key_limit or key is None or lane.active_by_key.get(key, 0) < self.per_key_limit:
+                    break
+            else:
+                return
+
+            waiting = lane.queues[key]
+            future = waiting.popleft()
+            lane.queued -= 1
+            if waiting:
+                lane.queues.move_to_end(key)
+            else:
+                del lane.queues[key]
+            if future.done():
+                continue
+            lane.take(key)
+            future.set_result(None)
+
+    def queue_depth(self) -> int:
+        return sum(lane.queued for lane in self._lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "per_session_limit": self.per_key_limit,
+            "lanes": {
+                call_type: {
+                    "limit": lane.limit,
+                    "active": lane.active,
+                    "queued": lane.queued,
+                    "sessions_waiting": len(lane.queues),
+                    "admitted": lane.admitted,
+                    "rejected": lane.rejected,
+                    "timed_out": lane.timed_out,
+                    "avg_hold_seconds": round(lane.avg_hold, 3)
+                }
+                for call_type, lane in self._lanes.items()
+            }
+        }
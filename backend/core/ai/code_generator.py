@@ -1,46 +1,185 @@
-
+import re
 import json
-import asyncio
-from typing import Dict, Any, List, Optional
+import time
+import hashlib
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from core.ai.prompt_engine import PromptEngine
+from core.ai.llm_client import LLMClient
+from core.ai.plan_cache import PlanCache
+from core.ai.singleflight import SingleFlight
+from core.ai.admission import AdmissionController, AdmissionRejected, in_background
+from core.ai.resilience import CircuitOpenError, ResiliencePolicy
+from core.ai.component_library import ComponentLibrary
+from core.ai.json_extract import JSONStreamParser, extract_json, has_required, record_parse
+from core.ai.llm_client import LLMCompletion
+from core.ai.tokens import estimate_tokens
+from core.utils.metrics import Counter
+from models.session import SessionRecord
 
-try:
-    import openai
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
+FALLBACKS = Counter("codegen_fallbacks_total", "Template fallbacks served instead of an LLM result", ["call_type", "reason"])
+COALESCED = Counter("llm_coalesced_calls_total", "LLM calls answered by joining an identical in-flight call", ["call_type"])
 
 class CodeGenerator:
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, llm_client: Optional[LLMClient] = None, plan_cache: Optional[PlanCache] = None, coalesce: bool = True, prompt_engine: Optional[PromptEngine] = None, admission: Optional[AdmissionController] = None, resilience: Optional[ResiliencePolicy] = None, library: Optional[ComponentLibrary] = None, continuation_tokens: int = 1000):
         self.openai_api_key = openai_api_key
-        self.prompt_engine = PromptEngine()
-        self.has_openai = HAS_OPENAI and bool(openai_api_key)
-        
-        if self.has_openai:
-            openai.api_key = openai_api_key
+        self.prompt_engine = prompt_engine or PromptEngine.shared()
+        self.plan_cache = plan_cache
+        self.in_flight = SingleFlight() if coalesce else None
+        self.admission = admission
+        self.library = library
+        self.continuation_tokens = continuation_tokens
+        if llm_client is None and openai_api_key:
+            llm_client = LLMClient.from_env(openai_api_key)
+        self.llm_client = llm_client
+        self.has_openai = llm_client is not None
+        self.resilience = resilience if resilience is not None or llm_client is None else ResiliencePolicy()
+    
+    async def _call_openai(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", admission_key: Optional[str] = None) -> str:
+        completion = await self._complete_openai(messages, max_tokens, temperature, call_type, admission_key)
+        return completion.content
     
-    async def _call_openai(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3) -> str:
+    async def _complete_openai(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", admission_key: Optional[str] = None) -> LLMCompletion:
         if not self.has_openai:
             raise RuntimeError("OpenAI not configured")
         
+        async def call() -> LLMCompletion:
+            async with self._admit(call_type, admission_key):
+                return await self._complete(messages, max_tokens, temperature, call_type)
+        
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=messages,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    timeout=30
-                )
-            )
-            return response.choices[0].message.content
+            if self.resilience is not None:
+                self.resilience.check(call_type)
+            # A shared call is admitted in its leader's context, so background calls (which never
+            # queue) neither start nor join one
+            if self.in_flight is None or in_background():
+                return await call()
+            key = self._request_key(messages, max_tokens, temperature, call_type)
+            joining = self.in_flight.joining(key)
+            if joining:
+                COALESCED.labels(call_type=call_type).inc()
+            try:
+                return await self.in_flight.do(key, call)
+            except AdmissionRejected:
+                if not joining:
+                    raise
+                # Refused under the leader's admission (its session limit, say): ask again under our own
+                return await call()
+        except (AdmissionRejected, CircuitOpenError):
+            raise
         except Exception as e:
             print(f"OpenAI API error: {e}")
             raise
     
+    async def _call_json(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, call_type: str, required: List[str], admission_key: Optional[str] = None) -> Dict[str, Any]:
+        completion = await self._complete_openai(messages, max_tokens, temperature, call_type, admission_key)
+        return await self._parse_json(completion.content, completion.finish_reason, completion.completion_tokens, messages, temperature, call_type, required, admission_key)
+    
+    async def _parse_json(self, text: str, finish_reason: Optional[str], tokens: int, messages: List[Dict[str, str]], temperature: float, call_type: str, required: List[str], admission_key: Optional[str] = None, parser: Optional[JSONStreamParser] = None) -> Dict[str, Any]:
+        """Read the model's JSON, repairing it, asking once for the rest of a truncated reply, or keeping its complete part.
+        
+        Raises ValueError when nothing usable is left, after counting the completion as wasted.
+        """
+        try:
+            extraction = parser.result() if parser is not None and parser.done else extract_json(text)
+        except ValueError:
+            record_parse(call_type, "failed", tokens)
+            raise
+        if extraction.complete and has_required(extraction.value, required):
+            record_parse(call_type, "repaired" if extraction.repairs else "clean", tokens)
+            return extraction.value
+        
+        # Cut off at max_tokens (streams report no finish reason): the rest costs far less than a retry
+        if not extraction.complete and finish_reason in ("length", None) and self.continuation_tokens:
+            try:
+                continuation = await self._complete_openai(
+                    messages + [
+                        {"role": "assistant", "content": text},
+                        {"role": "user", "content": self.prompt_engine.get_continuation_prompt()}
+                    ],
+                    max_tokens=self.continuation_tokens, temperature=temperature, call_type=call_type, admission_key=admission_key
+                )
+                tokens += continuation.completion_tokens
+                combined = extract_json(text + continuation.content)
+                if combined.complete and has_required(combined.value, required):
+                    record_parse(call_type, "continued", tokens)
+                    return combined.value
+                extraction = combined
+            except (AdmissionRejected, CircuitOpenError):
+                pass
+            except Exception as e:
+                print(f"Continuation request failed: {e}")
+        
+        if has_required(extraction.value, required):
+            record_parse(call_type, "partial", tokens)
+            return extraction.value
+        record_parse(call_type, "failed", tokens)
+        raise ValueError(f"Model returned unusable JSON for {call_type} (missing {', '.join(required)})")
+    
+    async def _complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, call_type: str) -> LLMCompletion:
+        if self.resilience is None:
+            return await self.llm_client.complete(messages, max_tokens=max_tokens, temperature=temperature, call_type=call_type)
+        
+        timeout = self.resilience.timeout_for(call_type, self.llm_client.configured_timeout(call_type))
+        return await self.resilience.run(
+            call_type,
+            lambda: self.llm_client.complete(messages, max_tokens=max_tokens, temperature=temperature, call_type=call_type, timeout=timeout)
+        )
+    
+    @staticmethod
+    def _request_key(messages: List[Dict[str, str]], max_tokens: int, temperature: float, call_type: str) -> str:
+        normalized = [(message["role"], re.sub(r"\s+", " ", message["content"]).strip()) for message in messages]
+        payload = json.dumps([call_type, max_tokens, temperature, normalized], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def _stream_openai(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", admission_key: Optional[str] = None) -> AsyncIterator[str]:
+        if not self.has_openai:
+            raise RuntimeError("OpenAI not configured")
+        
+        if self.resilience is not None:
+            self.resilience.check(call_type)
+        
+        async with self._admit(call_type, admission_key):
+            started = time.monotonic()
+            first_token = None
+            try:
+                async for delta in self.llm_client.stream(messages, max_tokens=max_tokens, temperature=temperature, call_type=call_type):
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    yield delta
+            except Exception:
+                if self.resilience is not None:
+                    self.resilience.breaker.record_failure()
+                raise
+            # Streams are judged slow by time to first token, not by their total length
+            if self.resilience is not None:
+                self.resilience.breaker.record_success(first_token)
+    
+    @staticmethod
+    def _fallback_reason(error: Exception) -> str:
+        return "circuit_open" if isinstance(error, CircuitOpenError) else "error"
+    
+    def _admit(self, call_type: str, admission_key: Optional[str] = None):
+        """Hold an admission slot for the duration of one upstream call.
+
+        Calls are charged to admission_key (the session), else to the caller set by admission_scope.
+        """
+        if self.admission is None:
+            return nullcontext()
+        return self.admission.slot(call_type, admission_key)
+    
+    async def aclose(self) -> None:
+        if self.llm_client is not None:
+            await self.llm_client.aclose()
+    
     async def generate_project_plan(self, idea: str, preferred_stack: Optional[str] = None, complexity: str = "medium", template_id: Optional[str] = None) -> Dict[str, Any]:
         if self.has_openai:
+            cache_key = PlanCache.make_key(idea, preferred_stack, complexity, template_id)
+            if self.plan_cache is not None:
+                cached_plan = await self.plan_cache.get(cache_key)
+                if cached_plan is not None:
+                    return cached_plan
+            
             try:
                 prompt = self.prompt_engine.get_project_plan_prompt(idea, complexity, template_id)
                 messages = [
@@ -48,14 +187,23 @@ class CodeGenerator:
                     {"role": "user", "content": prompt}
                 ]
                 
-                response = await self._call_openai(messages, max_tokens=1500, temperature=0.2)
-                plan = json.loads(response)
-                return self._enhance_plan(plan, idea, preferred_stack)
+                plan = self._enhance_plan(
+                    await self._call_json(messages, max_tokens=1500, temperature=0.2, call_type="plan", required=["components_sequence"]),
+                    idea,
+                    preferred_stack
+                )
+                if self.plan_cache is not None:
+                    await self.plan_cache.set(cache_key, plan)
+                return plan
                 
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 print(f"Error generating plan with OpenAI: {e}")
+                FALLBACKS.labels(call_type="plan", reason=self._fallback_reason(e)).inc()
                 return self._generate_fallback_plan(idea, preferred_stack, complexity)
         else:
+            FALLBACKS.labels(call_type="plan", reason="unavailable").inc()
             return self._generate_fallback_plan(idea, preferred_stack, complexity)
     
     def _enhance_plan(self, plan: Dict[str, Any], idea: str, preferred_stack: Optional[str]) -> Dict[str, Any]:
@@ -105,24 +253,74 @@ class CodeGenerator:
             "development_time_estimate": {"simple": "4-6 hours", "medium": "8-12 hours", "complex": "16-24 hours"}[complexity]
         }
     
-    async def generate_component(self, session: Dict[str, Any], component_name: str, include_explanation: bool = True, include_tests: bool = False) -> Dict[str, Any]:
+    def _from_library(self, session: SessionRecord, component_name: str, use_llm: bool) -> Optional[Dict[str, Any]]:
+        """Library components are used unless the caller asks for the LLM and one is configured."""
+        if self.library is None or (use_llm and self.has_openai):
+            return None
+        return self.library.render(component_name, session.plan)
+    
+    async def generate_component(self, session: SessionRecord, component_name: str, include_explanation: bool = True, include_tests: bool = False, use_llm: bool = False) -> Dict[str, Any]:
+        library_result = self._from_library(session, component_name, use_llm)
+        if library_result is not None:
+            return library_result
+        
         if self.has_openai:
             try:
-                prompt = self.prompt_engine.get_component_prompt(component_name, session["plan"], session.get("generated", []))
+                prompt = self.prompt_engine.get_component_prompt(component_name, session.plan, session.generated)
                 messages = [
                     {"role": "system", "content": "You are an expert React developer. Return only valid JSON."},
                     {"role": "user", "content": prompt}
                 ]
                 
-                response = await self._call_openai(messages, max_tokens=2000, temperature=0.3)
-                result = json.loads(response)
+                result = await self._call_json(messages, max_tokens=2000, temperature=0.3, call_type="component", required=["code"], admission_key=session.id)
                 return self._validate_component_result(result, component_name)
                 
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 print(f"Error generating component with OpenAI: {e}")
-                return self._generate_fallback_component(component_name, session["plan"])
+                FALLBACKS.labels(call_type="component", reason=self._fallback_reason(e)).inc()
+                return self._generate_fallback_component(component_name, session.plan)
         else:
-            return self._generate_fallback_component(component_name, session["plan"])
+            FALLBACKS.labels(call_type="component", reason="unavailable").inc()
+            return self._generate_fallback_component(component_name, session.plan)
+    
+    async def stream_component(self, session: SessionRecord, component_name: str, include_explanation: bool = True, include_tests: bool = False, use_llm: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("token", delta) pairs as the completion arrives, then a single ("result", component)."""
+        library_result = self._from_library(session, component_name, use_llm)
+        if library_result is not None:
+            yield "result", library_result
+            return
+        
+        reason = "unavailable"
+        if self.has_openai:
+            chunks = []
+            parser = JSONStreamParser()
+            try:
+                prompt = self.prompt_engine.get_component_prompt(component_name, session.plan, session.generated)
+                messages = [
+                    {"role": "system", "content": "You are an expert React developer. Return only valid JSON."},
+                    {"role": "user", "content": prompt}
+                ]
+                
+                async for delta in self._stream_openai(messages, max_tokens=2000, temperature=0.3, call_type="component", admission_key=session.id):
+                    chunks.append(delta)
+                    parser.feed(delta)
+                    yield "token", delta
+                
+                text = "".join(chunks)
+                result = await self._parse_json(text, None, estimate_tokens(text), messages, 0.3, "component", ["code"], session.id, parser)
+                yield "result", self._validate_component_result(result, component_name)
+                return
+                
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                print(f"Error streaming component with OpenAI: {e}")
+                reason = self._fallback_reason(e)
+        
+        FALLBACKS.labels(call_type="component", reason=reason).inc()
+        yield "result", self._generate_fallback_component(component_name, session.plan)
     
     def _validate_component_result(self, result: Dict[str, Any], component_name: str) -> Dict[str, Any]:
         return {
@@ -131,7 +329,8 @@ class CodeGenerator:
             "code": result.get("code", f"// Placeholder for {component_name}"),
             "explanation": result.get("explanation", f"Generated {component_name} component"),
             "dependencies": result.get("dependencies", []),
-            "usage_example": result.get("usage_example", f"<{component_name} />")
+            "usage_example": result.get("usage_example", f"<{component_name} />"),
+            "source": "llm"
         }
     
     def _generate_fallback_component(self, component_name: str, plan: Dict[str, Any]) -> Dict[str, Any]:
@@ -154,10 +353,12 @@ export default function {component_name}() {{
             "code": code,
             "explanation": f"Basic {component_name} component with clean styling",
             "dependencies": [],
-            "usage_example": f"<{component_name} />"
+            "usage_example": f"<{component_name} />",
+            "source": "fallback"
         }
     
-    async def generate_preview_html(self, prompt: str, style_preference: str = "modern") -> str:
+    async def generate_preview_html(self, prompt: str, style_preference: str = "modern") -> Dict[str, str]:
+        """{"html": page, "source": "llm" or "fallback"}."""
         if self.has_openai:
             try:
                 prompt_text = self.prompt_engine.get_preview_prompt(prompt, style_preference)
@@ -166,13 +367,46 @@ export default function {component_name}() {{
                     {"role": "user", "content": prompt_text}
                 ]
                 
-                return await self._call_openai(messages, max_tokens=3000, temperature=0.4)
+                html = await self._call_openai(messages, max_tokens=3000, temperature=0.4, call_type="preview")
+                return {"html": html, "source": "llm"}
                 
+            except AdmissionRejected:
+                raise
             except Exception as e:
                 print(f"Error generating preview: {e}")
-                return self._generate_fallback_preview(prompt, style_preference)
+                FALLBACKS.labels(call_type="preview", reason=self._fallback_reason(e)).inc()
+                return {"html": self._generate_fallback_preview(prompt, style_preference), "source": "fallback"}
         else:
-            return self._generate_fallback_preview(prompt, style_preference)
+            FALLBACKS.labels(call_type="preview", reason="unavailable").inc()
+            return {"html": self._generate_fallback_preview(prompt, style_preference), "source": "fallback"}
+    
+    async def stream_preview_html(self, prompt: str, style_preference: str = "modern") -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("token", delta) pairs as the page arrives, then a single ("result", {"html", "source"})."""
+        reason = "unavailable"
+        if self.has_openai:
+            chunks = []
+            try:
+                prompt_text = self.prompt_engine.get_preview_prompt(prompt, style_preference)
+                messages = [
+                    {"role": "system", "content": "Create beautiful, responsive HTML pages."},
+                    {"role": "user", "content": prompt_text}
+                ]
+                
+                async for delta in self._stream_openai(messages, max_tokens=3000, temperature=0.4, call_type="preview"):
+                    chunks.append(delta)
+                    yield "token", delta
+                
+                yield "result", {"html": "".join(chunks), "source": "llm"}
+                return
+                
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                print(f"Error streaming preview: {e}")
+                reason = self._fallback_reason(e)
+        
+        FALLBACKS.labels(call_type="preview", reason=reason).inc()
+        yield "result", {"html": self._generate_fallback_preview(prompt, style_preference), "source": "fallback"}
     
     def _generate_fallback_preview(self, prompt: str, style: str) -> str:
         return f'''<!DOCTYPE html>
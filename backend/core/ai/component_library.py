@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import hashlib
+from string import Template
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from core.utils.metrics import Counter
+
+DEFAULT_LIBRARY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "components")
+DEFAULT_STACK = "React + TypeScript + Tailwind"
+ACCENTS = ("indigo", "blue", "violet", "emerald", "sky", "rose", "amber", "teal")
+DEFAULT_FEATURES = ["Responsive design", "Modern UI components", "Professional styling"]
+
+LIBRARY_LOOKUPS = Counter("component_library_lookups_total", "Component requests answered by the local library instead of the LLM", ["result"])
+
+# Layout pieces that get no entry in the navigation links
+_CHROME_WORDS = ("nav", "header", "footer", "sidebar", "topbar")
+
+@dataclass
+class LibraryComponent:
+    name: str
+    aliases: List[str]
+    stacks: List[Tuple[str, ...]]
+    template: Template
+    explanation: str
+    dependencies: List[str]
+
+    def supports(self, stack: str) -> bool:
+        stack = stack.lower()
+        return any(all(term in stack for term in terms) for terms in self.stacks)
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def _anchor(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "-", re.sub(r"\W", "", name)).lower() or "section"
+
+def _label(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", re.sub(r"\W", "", name)) or name
+
+def _identifier(name: str) -> str:
+    identifier = re.sub(r"\W", "", name)
+    if not identifier or identifier[0].isdigit():
+        identifier = f"Component{identifier}"
+    return identifier[0].upper() + identifier[1:]
+
+def _js(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+class ComponentLibrary:
+    """Pre-built, parameterized components served without an LLM call.
+
+    Templates live in data/components as TSX with $placeholders, indexed by name, aliases and
+    stack in library.json. Each one is rendered and validated once at load.
+    """
+
+    def __init__(self, directory: str = DEFAULT_LIBRARY_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.components, self._index = self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional["ComponentLibrary"]:
+        if os.getenv("COMPONENT_LIBRARY", "true").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(directory=os.getenv("COMPONENT_LIBRARY_DIR", DEFAULT_LIBRARY_DIR))
+
+    def _load(self) -> Tuple[List[LibraryComponent], Dict[str, LibraryComponent]]:
+        from core.utils.validators import CodeValidator
+
+        with open(os.path.join(self.directory, "library.json"), encoding="utf-8") as index_file:
+            entries = json.load(index_file)["components"]
+
+        validator = CodeValidator(cache_size=0)
+        sample_plan = {"title": "Sample", "description": "Sample project", "components_sequence": ["Navbar", "Hero", "Contact", "Footer"]}
+        components = []
+        index = {}
+        for entry in entries:
+            with open(os.path.join(self.directory, entry["file"]), encoding="utf-8") as template_file:
+                template = Template(template_file.read())
+            component = LibraryComponent(
+                name=entry["name"],
+                aliases=list(entry.get("aliases", [])),
+                stacks=[tuple(term.strip() for term in stack.lower().split("+")) for stack in entry.get("stacks", ["react+tailwind"])],
+                template=template,
+                explanation=entry.get("explanation", f"{entry['name']} component from the component library"),
+                dependencies=list(entry.get("dependencies", []))
+            )
+            try:
+                result = validator.validate_component_code(self._render_code(component, component.name, sample_plan))
+            except (KeyError, ValueError) as e:
+                print(f"Skipping library component {component.name}: bad placeholder {e}")
+                continue
+            if not result.is_valid:
+                print(f"Skipping library component {component.name}: {'; '.join(result.errors)}")
+                continue
+
+            components.append(component)
+            for name in [component.name, *component.aliases]:
+                index.setdefault(_normalize(name), component)
+        return components, index
+
+    def match(self, component_name: str, stack: Optional[str] = None) -> Optional[LibraryComponent]:
+        key = _normalize(component_name)
+        component = self._index.get(key)
+        if component is None:
+            # "HeroSection", "ContactComponent" and the like
+            stripped = re.sub(r"(section|component|block)$", "", key)
+            component = self._index.get(stripped) if stripped else None
+        if component is None or not component.supports(stack or DEFAULT_STACK):
+            return None
+        return component
+
+    def _params(self, component_name: str, plan: Dict[str, Any]) -> Dict[str, str]:
+        title = str(plan.get("title") or "Your Application")[:80]
+        description = str(plan.get("description") or title)
+        if len(description) > 240:
+            description = description[:237].rsplit(" ", 1)[0] + "..."
+        features = [feature for feature in plan.get("features") or [] if isinstance(feature, str) and feature.strip()][:6] or DEFAULT_FEATURES
+
+        sequence = [name for name in plan.get("components_sequence") or [] if isinstance(name, str)]
+        sections = [name for name in sequence if not any(word in name.lower() for word in _CHROME_WORDS)]
+        links = [{"label": _label(name), "href": f"#{_anchor(name)}"} for name in sections if _normalize(name) not in ("hero", "herosection", "banner")]
+        contact = next((name for name in sequence if "contact" in name.lower()), None)
+        follow_up = next((name for name in sections if _normalize(name) not in ("hero", "herosection", "banner")), None)
+
+        accent = str(plan.get("accent_color") or "").lower()
+        if accent not in ACCENTS:
+            digest = hashlib.blake2b(title.encode("utf-8"), digest_size=2).digest()
+            accent = ACCENTS[int.from_bytes(digest, "big") % len(ACCENTS)]
+
+        return {
+            "component": _identifier(component_name),
+            "anchor": _anchor(component_name),
+            "title": _js(title),
+            "description": _js(description),
+            "features": _js(features),
+            "highlights": _js(features[:3]),
+            "links": _js(links),
+            "accent": accent,
+            "primary_href": f"#{_anchor(contact)}" if contact else "#",
+            "secondary_href": f"#{_anchor(follow_up)}" if follow_up else "#"
+        }
+
+    def _render_code(self, component: LibraryComponent, component_name: str, plan: Dict[str, Any]) -> str:
+        return component.template.substitute(self._params(component_name, plan))
+
+    def render(self, component_name: str, plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The component as a generation result, or None when the LLM has to write it."""
+        component = self.match(component_name, plan.get("stack"))
+        if component is None:
+            self.misses += 1
+            LIBRARY_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        self.hits += 1
+        LIBRARY_LOOKUPS.labels(result="hit").inc()
+        identifier = _identifier(component_name)
+        return {
+            "name": component_name,
+            "filename": f"src/components/{identifier}.tsx",
+            "code": self._render_code(component, component_name, plan),
+            "explanation": component.explanation,
+            "dependencies": list(component.dependencies),
+            "usage_example": f"<{identifier} />",
+            "source": "library"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "components": [component.name for component in self.components],
+            "hits": self.hits,
+            "misses": self.misses
+        }
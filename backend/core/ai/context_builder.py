@@ -0,0 +1,177 @@
+import os
+import re
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set
+from core.ai.tokens import estimate_tokens
+from core.utils.cache import LRUCache
+from models.session import GeneratedComponent
+
+DEFAULT_BUDGETS = {"component": 600}
+
+# Components every page section has to line up with, whatever is being generated
+LAYOUT_COMPONENTS = {"navbar", "header", "sidebar", "layout", "footer"}
+
+_EXPORT_RE = re.compile(r"export\s+(?:default\s+)?(?:async\s+)?(?:function|const|class|interface|type|enum)\s+(\w+)")
+_IMPORT_RE = re.compile(r"""import\s+(?:[\w*{}\s,]+\s+from\s+)?['"]([^'"]+)['"]""")
+_PROPS_INTERFACE_RE = re.compile(r"(?:interface|type)\s+\w*Props\s*=?\s*\{([^}]*)\}")
+_PROPS_DESTRUCTURE_RE = re.compile(r"function\s+\w+\s*\(\s*\{([^}]*)\}")
+_PROP_NAME_RE = re.compile(r"^\s*(\w+)")
+_CLASSNAME_RE = re.compile(r"""className\s*=\s*\{?\s*[`'"]([^`'"]*)[`'"]""")
+_STYLE_TOKEN_RE = re.compile(r"^(?:(?:bg|text|from|via|to|border|ring)-[a-z]+-\d{2,3}|font-(?:sans|serif|mono|bold|semibold|medium)|rounded(?:-\w+)?|shadow(?:-\w+)?)$")
+_WORD_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])")
+
+@dataclass
+class ComponentSummary:
+    name: str
+    filename: str
+    exports: List[str] = field(default_factory=list)
+    props: List[str] = field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+    style_tokens: List[str] = field(default_factory=list)
+
+    def render(self, shared_styles: Set[str] = frozenset()) -> str:
+        parts = [f"- {self.name} ({self.filename})"]
+        if self.exports:
+            parts.append(f"exports {', '.join(self.exports)}")
+        if self.props:
+            parts.append(f"props {', '.join(self.props)}")
+        if self.dependencies:
+            parts.append(f"imports {', '.join(self.dependencies)}")
+        # Styles already listed as shared are not repeated per component
+        styles = [token for token in self.style_tokens if token not in shared_styles]
+        if styles:
+            parts.append(f"styles {' '.join(styles)}")
+        return "; ".join(parts)
+
+    def render_short(self) -> str:
+        return f"- {self.name} ({self.filename})"
+
+def _unique(values) -> List[str]:
+    return list(dict.fromkeys(value for value in values if value))
+
+def summarize_component(component: GeneratedComponent) -> ComponentSummary:
+    """Reduce a generated component to what later components need to stay consistent with it."""
+    code = component.code or ""
+    exports = _unique(_EXPORT_RE.findall(code))
+
+    props = []
+    for block in _PROPS_INTERFACE_RE.findall(code) + _PROPS_DESTRUCTURE_RE.findall(code):
+        for part in re.split(r"[;,\n]", block):
+            match = _PROP_NAME_RE.match(part)
+            if match:
+                props.append(match.group(1))
+
+    dependencies = _unique(list(component.dependencies) + [module for module in _IMPORT_RE.findall(code) if not module.startswith(".")])
+
+    style_counts = Counter(
+        token
+        for classes in _CLASSNAME_RE.findall(code)
+        for token in classes.split()
+        if _STYLE_TOKEN_RE.match(token)
+    )
+    style_tokens = [token for token, _count in style_counts.most_common(8)]
+
+    return ComponentSummary(
+        name=component.name,
+        filename=component.filename,
+        exports=exports,
+        props=_unique(props)[:8],
+        dependencies=dependencies[:6],
+        style_tokens=style_tokens
+    )
+
+class ContextBuilder:
+    """Packs summaries of earlier components into a per-call-type token budget."""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, cache_size: int = 2048):
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self._summaries = LRUCache(max_entries=cache_size)
+
+    @classmethod
+    def from_env(cls) -> "ContextBuilder":
+        budgets = {}
+        for call_type in ("component", "preview"):
+            value = os.getenv(f"PROMPT_CONTEXT_{call_type.upper()}_TOKENS")
+            if value:
+                budgets[call_type] = int(value)
+        return cls(budgets=budgets, cache_size=int(os.getenv("PROMPT_CONTEXT_CACHE_SIZE", "2048")))
+
+    def summarize(self, component: GeneratedComponent) -> ComponentSummary:
+        # Keyed by content so a regenerated component gets a fresh summary
+        key = hashlib.blake2b(f"{component.name}\0{component.filename}\0{component.code}".encode("utf-8"), digest_size=16).digest()
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = summarize_component(component)
+            self._summaries.set(key, summary)
+        return summary
+
+    def build(self, component_name: str, history: List[GeneratedComponent], call_type: str = "component") -> str:
+        budget = self.budgets.get(call_type, 0)
+        if budget <= 0:
+            return ""
+        # A regenerated component replaces its earlier version
+        latest = {component.name: component for component in history if component.name != component_name}
+        summaries = [self.summarize(component) for component in latest.values()]
+        if not summaries:
+            return ""
+
+        lines = ["Already generated (reuse their exports and styling):"]
+        used = estimate_tokens(lines[0])
+
+        shared_styles: Set[str] = set()
+        counts = Counter(token for summary in summaries for token in summary.style_tokens)
+        if counts:
+            common = [token for token, _count in counts.most_common(10)]
+            style_line = "Shared style tokens: " + " ".join(common)
+            style_tokens = estimate_tokens(style_line)
+            if used + style_tokens <= budget:
+                lines.insert(0, style_line)
+                used += style_tokens
+                shared_styles = set(common)
+
+        packed = {}
+        ranked = self._rank(component_name, summaries)
+        # Full summaries for the most relevant components first, then names only for the rest
+        for summary in ranked:
+            line = summary.render(shared_styles)
+            tokens = estimate_tokens(line)
+            if used + tokens <= budget:
+                packed[summary.name] = line
+                used += tokens
+        for summary in ranked:
+            if summary.name in packed:
+                continue
+            line = summary.render_short()
+            tokens = estimate_tokens(line)
+            if used + tokens <= budget:
+                packed[summary.name] = line
+                used += tokens
+
+        if not packed:
+            return ""
+        # Keep generation order in the prompt regardless of packing order
+        lines.extend(packed[summary.name] for summary in summaries if summary.name in packed)
+        omitted = len(summaries) - len(packed)
+        if omitted:
+            lines.append(f"(+{omitted} more not shown)")
+        return "\n".join(lines)
+
+    def _rank(self, component_name: str, summaries: List[ComponentSummary]) -> List[ComponentSummary]:
+        target_words = {word.lower() for word in _WORD_RE.findall(component_name)}
+        total = len(summaries)
+
+        def score(item) -> float:
+            position, summary = item
+            value = (position + 1) / total
+            if summary.name.lower() in LAYOUT_COMPONENTS:
+                value += 1.0
+            if target_words & {word.lower() for word in _WORD_RE.findall(summary.name)}:
+                value += 2.0
+            return value
+
+        return [summary for _position, summary in sorted(enumerate(summaries), key=score, reverse=True)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"budgets": self.budgets, "summaries": self._summaries.stats()}
@@ -0,0 +1,210 @@
+import re
+import json
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from core.utils.metrics import Counter
+
+JSON_PARSES = Counter("llm_json_parses_total", "LLM JSON responses by parse outcome", ["call_type", "outcome"])
+JSON_TOKENS = Counter("llm_json_completion_tokens_total", "Completion tokens of LLM JSON responses by parse outcome (failed = wasted)", ["call_type", "outcome"])
+
+_FENCE_RE = re.compile(r"```[a-zA-Z]*[ \t]*\n?(.*?)(?:```|\Z)", re.S)
+# A run of string characters that need no attention
+_STRING_RUN_RE = re.compile(r'[^"\\\x00-\x1f]+')
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.")
+_WORDS = {"True": "true", "False": "false", "None": "null", "undefined": "null", "NaN": "null"}
+_ESCAPES = frozenset('"\\/bfnrtu')
+_CONTROL = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+@dataclass
+class JSONExtraction:
+    value: Any
+    complete: bool   # the top-level value closed; False means it was recovered from a truncated prefix
+    repairs: int     # defects fixed on the way (raw newlines in strings, trailing commas, bad escapes...)
+
+class JSONStreamParser:
+    """Incremental, forgiving JSON reader for model output.
+
+    Feed text as it arrives. Prose or a markdown fence before the first { or [ is skipped, and
+    anything after the top-level value closes is ignored. Common defects are repaired while
+    scanning, and a truncated document can be read back up to its last complete value.
+    """
+
+    def __init__(self):
+        self._out: List[str] = []
+        # One [opener, expecting] per open container; expecting is key/colon/value/end
+        self._stack: List[List[str]] = []
+        self._started = False
+        self.done = False
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._word: List[str] = []
+        self._pending_comma = False
+        self.repairs = 0
+        # Cleaned output length and closing brackets at the last complete value
+        self._safe_len = 0
+        self._safe_closers = ""
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk; True once the top-level value is complete."""
+        index, length = 0, len(text)
+        while index < length and not self.done:
+            if self._in_string and not self._escape:
+                run = _STRING_RUN_RE.match(text, index)
+                if run:
+                    self._out.append(run.group())
+                    index = run.end()
+                    continue
+            self._char(text[index])
+            index += 1
+        return self.done
+
+    def _closers(self) -> str:
+        return "".join("}" if opener == "{" else "]" for opener, _expecting in reversed(self._stack))
+
+    def _mark_safe(self) -> None:
+        self._safe_len = len(self._out)
+        self._safe_closers = self._closers()
+
+    def _value_done(self) -> None:
+        if not self._stack:
+            self.done = True
+            return
+        self._stack[-1][1] = "end"
+        self._mark_safe()
+
+    def _begin_value(self) -> None:
+        if self._pending_comma:
+            self._out.append(",")
+            self._pending_comma = False
+        if self._stack and self._stack[-1][1] == "end":
+            # Missing comma between two members
+            self._out.append(",")
+            self._stack[-1][1] = "key" if self._stack[-1][0] == "{" else "value"
+            self.repairs += 1
+
+    def _flush_word(self) -> None:
+        word = "".join(self._word)
+        self._word.clear()
+        if word in _WORDS:
+            word = _WORDS[word]
+            self.repairs += 1
+        elif word not in ("true", "false", "null"):
+            try:
+                float(word)
+            except ValueError:
+                word = "null"
+                self.repairs += 1
+        self._out.append(word)
+        self._value_done()
+
+    def _char(self, char: str) -> None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                if char in _ESCAPES:
+                    self._out.append(char)
+                elif char == "'":
+                    self._out[-1] = "'"
+                    self.repairs += 1
+                else:
+                    # Keep the backslash as a literal character
+                    self._out.append("\\" + char)
+                    self.repairs += 1
+            elif char == "\\":
+                self._escape = True
+                self._out.append("\\")
+            elif char == '"':
+                self._out.append('"')
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1][1] = "colon"
+                else:
+                    self._value_done()
+            else:
+                # Raw control character inside a string, typically a newline in "code"
+                self._out.append(_CONTROL.get(char) or f"\\u{ord(char):04x}")
+                self.repairs += 1
+            return
+
+        if not self._started:
+            if char in "{[":
+                self._started = True
+                self._stack.append([char, "key" if char == "{" else "value"])
+                self._out.append(char)
+                self._mark_safe()
+            return
+
+        if self._word:
+            if char in _WORD_CHARS:
+                self._word.append(char)
+                return
+            self._flush_word()
+            if self.done:
+                return
+
+        if char.isspace():
+            return
+        if char == '"':
+            self._begin_value()
+            self._in_string = True
+            self._string_is_key = self._stack[-1][0] == "{" and self._stack[-1][1] == "key"
+            self._out.append('"')
+        elif char in "{[":
+            self._begin_value()
+            self._stack.append([char, "key" if char == "{" else "value"])
+            self._out.append(char)
+        elif char in "}]":
+            if self._pending_comma:
+                self._pending_comma = False
+                self.repairs += 1
+            opener = self._stack.pop()[0]
+            self._out.append("}" if opener == "{" else "]")
+            if (opener == "{") != (char == "}"):
+                self.repairs += 1
+            self._value_done()
+        elif char == ":":
+            self._out.append(":")
+            self._stack[-1][1] = "value"
+        elif char == ",":
+            self._pending_comma = True
+            self._stack[-1][1] = "key" if self._stack[-1][0] == "{" else "value"
+        elif char in _WORD_CHARS:
+            self._begin_value()
+            self._word.append(char)
+        else:
+            self.repairs += 1
+
+    def result(self) -> JSONExtraction:
+        """The parsed value; a truncated document yields its complete prefix with complete=False."""
+        if self.done:
+            try:
+                return JSONExtraction(json.loads("".join(self._out)), True, self.repairs)
+            except ValueError:
+                pass
+        if not self._started:
+            raise ValueError("No JSON object found in model output")
+        # A number or literal still being read at the end may itself be cut short, so it is left out
+        return JSONExtraction(json.loads("".join(self._out[:self._safe_len]) + self._safe_closers), False, self.repairs)
+
+def strip_fences(text: str) -> str:
+    """The body of the first markdown code fence that holds JSON, else the text unchanged."""
+    if "```" not in text:
+        return text
+    for match in _FENCE_RE.finditer(text):
+        body = match.group(1).strip()
+        if body[:1] in ("{", "["):
+            return body
+    return text
+
+def extract_json(text: str) -> JSONExtraction:
+    parser = JSONStreamParser()
+    parser.feed(strip_fences(text))
+    return parser.result()
+
+def has_required(value: Any, required: Optional[List[str]]) -> bool:
+    return isinstance(value, dict) and all(value.get(key) for key in (required or []))
+
+def record_parse(call_type: str, outcome: str, completion_tokens: int) -> None:
+    JSON_PARSES.labels(call_type=call_type, outcome=outcome).inc()
+    JSON_TOKENS.labels(call_type=call_type, outcome=outcome).inc(completion_tokens)
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, AsyncIterator, TYPE_CHECKING
+from core.ai.tokens import estimate_message_tokens, estimate_tokens
+from core.utils.metrics import Counter, Histogram, LLM_BUCKETS
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+LLM_CALL_SECONDS = Histogram("llm_call_duration_seconds", "LLM call latency until the full completion arrived", ["call_type", "mode", "outcome"], buckets=LLM_BUCKETS)
+LLM_FIRST_TOKEN_SECONDS = Histogram("llm_time_to_first_token_seconds", "Latency until the first streamed token", ["call_type"], buckets=LLM_BUCKETS)
+LLM_PROMPT_TOKENS = Counter("llm_prompt_tokens_total", "Prompt tokens sent to the LLM", ["call_type"])
+LLM_COMPLETION_TOKENS = Counter("llm_completion_tokens_total", "Completion tokens received from the LLM", ["call_type"])
+
+@dataclass
+class LLMCompletion:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    finish_reason: Optional[str] = None
+
+class LLMClient:
+    """Async OpenAI-compatible chat client sharing one keep-alive connection pool.
+
+    httpx is imported when the pool is first needed, keeping it off the cold-start path.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        call_timeouts: Optional[Dict[str, float]] = None,
+        max_connections: int = 200,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 30.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.call_timeouts = call_timeouts or {}
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    @classmethod
+    def from_env(cls, api_key: str) -> "LLMClient":
+        call_timeouts = {}
+        for call_type in ("plan", "component", "preview"):
+            value = os.getenv(f"LLM_{call_type.upper()}_TIMEOUT")
+            if value:
+                call_timeouts[call_type] = float(value)
+
+        return cls(
+            api_key=api_key,
+            base_url=os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL),
+            model=os.getenv("OPENAI_MODEL", DEFAULT_MODEL),
+            timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+            connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")),
+            call_timeouts=call_timeouts,
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "200")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "50")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+        )
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+        return self._client
+
+    def configured_timeout(self, call_type: str) -> float:
+        return self.call_timeouts.get(call_type, self.timeout)
+
+    def _timeout_for(self, call_type: str, timeout: Optional[float]) -> "httpx.Timeout":
+        import httpx
+        seconds = timeout or self.configured_timeout(call_type)
+        return httpx.Timeout(seconds, connect=min(self.connect_timeout, seconds))
+
+    def _payload(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, stream: bool = False) -> Dict:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _record_usage(self, call_type: str, prompt_tokens: int, completion_tokens: int) -> None:
+        LLM_PROMPT_TOKENS.labels(call_type=call_type).inc(prompt_tokens)
+        LLM_COMPLETION_TOKENS.labels(call_type=call_type).inc(completion_tokens)
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", timeout: Optional[float] = None) -> LLMCompletion:
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(
+                "/chat/completions",
+                json=self._payload(messages, max_tokens, temperature),
+                timeout=self._timeout_for(call_type, timeout)
+            )
+            response.raise_for_status()
+            data = response.json()
+        except BaseException:
+            LLM_CALL_SECONDS.labels(call_type=call_type, mode="complete", outcome="error").observe(time.perf_counter() - started)
+            raise
+        LLM_CALL_SECONDS.labels(call_type=call_type, mode="complete", outcome="ok").observe(time.perf_counter() - started)
+
+        choice = data["choices"][0]
+        content = choice["message"]["content"] or ""
+        usage = data.get("usage") or {}
+        completion = LLMCompletion(
+            content=content,
+            prompt_tokens=usage.get("prompt_tokens") or estimate_message_tokens(messages),
+            completion_tokens=usage.get("completion_tokens") or estimate_tokens(content),
+            finish_reason=choice.get("finish_reason")
+        )
+        self._record_usage(call_type, completion.prompt_tokens, completion.completion_tokens)
+        return completion
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", timeout: Optional[float] = None) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        first_token_at = None
+        usage = {}
+        chunks = []
+        outcome = "error"
+        try:
+            async with self.client.stream(
+                "POST",
+                "/chat/completions",
+                json=self._payload(messages, max_tokens, temperature, stream=True),
+                timeout=self._timeout_for(call_type, timeout)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    if not chunk.get("choices"):
+                        continue
+                    content = chunk["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            LLM_FIRST_TOKEN_SECONDS.labels(call_type=call_type).observe(first_token_at - started)
+                        chunks.append(content)
+                        yield content
+            outcome = "ok"
+        finally:
+            LLM_CALL_SECONDS.labels(call_type=call_type, mode="stream", outcome=outcome).observe(time.perf_counter() - started)
+            # Providers only report usage on streams when asked to, so fall back to a local estimate
+            self._record_usage(
+                call_type,
+                usage.get("prompt_tokens") or estimate_message_tokens(messages),
+                usage.get("completion_tokens") or estimate_tokens("".join(chunks))
+            )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,140 @@
+import os
+import copy
+import asyncio
+import json
+import time
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, TypeVar
+from core.utils.cache import LRUCache
+
+T = TypeVar("T")
+
+class PlanCache:
+    """LRU+TTL cache of generated project plans, optionally backed by a SQLite file.
+
+    Disk writes can wait on another process's lock, so they run in order on one writer thread;
+    disk reads use their own connection, which WAL never makes wait. Expired and surplus rows are
+    swept only once the file may hold more than max_disk_entries plans.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400.0, path: Optional[str] = None, max_disk_entries: int = 5000, busy_timeout_ms: int = 5000):
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.disk_hits = 0
+        self.disk_evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        # Row count as of the last sweep plus writes since; an overestimate only brings the next sweep forward
+        self._disk_entries = 0
+
+        if path:
+            self._db = self._connect(busy_timeout_ms)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                "key TEXT PRIMARY KEY, plan TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            self._reader = self._connect(0)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plan-cache")
+
+    def _connect(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=busy_timeout_ms / 1000)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        return db
+
+    async def _write(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, function, *args)
+
+    @classmethod
+    def from_env(cls) -> "PlanCache":
+        return cls(
+            max_entries=int(os.getenv("PLAN_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("PLAN_CACHE_TTL", "86400")),
+            path=os.getenv("PLAN_CACHE_PATH") or None
+        )
+
+    @staticmethod
+    def make_key(idea: str, preferred_stack: Optional[str], complexity: Optional[str], template_id: Optional[str]) -> str:
+        normalized = [
+            " ".join(idea.lower().split()),
+            " ".join((preferred_stack or "").lower().split()),
+            (complexity or "medium").strip().lower(),
+            (template_id or "").strip().lower()
+        ]
+        return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        plan = self.memory.get(key)
+        if plan is not None:
+            return copy.deepcopy(plan)
+
+        if self._reader is None:
+            return None
+
+        try:
+            row = self._reader.execute("SELECT plan, created_at FROM plans WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            # Busy: treat as a miss rather than wait on the event loop
+            return None
+        if row is None:
+            return None
+
+        plan_json, created_at = row
+        now = time.time()
+        if created_at + self.ttl <= now:
+            # The row itself goes at the next sweep
+            return None
+
+        plan = json.loads(plan_json)
+        self.memory.set(key, plan, ttl=created_at + self.ttl - now)
+        self.disk_hits += 1
+        await self._write(self._touch, key, now)
+        return copy.deepcopy(plan)
+
+    async def set(self, key: str, plan: Dict[str, Any]) -> None:
+        plan = copy.deepcopy(plan)
+        self.memory.set(key, plan)
+
+        if self._db is None:
+            return
+        await self._write(self._save, key, json.dumps(plan), time.time())
+
+    def _touch(self, key: str, now: float) -> None:
+        self._db.execute("UPDATE plans SET last_used = ? WHERE key = ?", (now, key))
+
+    def _save(self, key: str, plan_json: str, now: float) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO plans (key, plan, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, plan_json, now, now)
+        )
+        self._disk_entries += 1
+        if self._disk_entries > self.max_disk_entries:
+            self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        self._db.execute("DELETE FROM plans WHERE created_at <= ?", (now - self.ttl,))
+        cursor = self._db.execute(
+            "DELETE FROM plans WHERE key IN (SELECT key FROM plans ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        self.disk_evictions += max(cursor.rowcount, 0)
+        self._disk_entries = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        # A memory miss served from disk is still a cache hit from the caller's point of view
+        stats["hits"] += self.disk_hits
+        stats["misses"] -= self.disk_hits
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["disk_hits"] = self.disk_hits
+        stats["evictions"] += self.disk_evictions
+        stats["persistent"] = self._db is not None
+        return stats
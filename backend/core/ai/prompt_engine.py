@@ -1,47 +1,31 @@
 
+import threading
 from typing import Dict, List, Any, Optional
 from models.project import ProjectTemplate
+from models.session import GeneratedComponent
+from core.ai.context_builder import ContextBuilder
+from core.services.template_registry import TemplateRegistry
 
 class PromptEngine:
-    def __init__(self):
-        self.templates = self._load_templates()
-        self.component_prompts = self._load_component_prompts()
+    _shared: Optional["PromptEngine"] = None
+    _shared_lock = threading.Lock()
     
-    def _load_templates(self) -> Dict[str, ProjectTemplate]:
-        return {
-        "portfolio": ProjectTemplate(
-            id="portfolio",
-            name="Developer Portfolio",
-            description="Modern software developer portfolio with projects showcase",
-            features=["Hero with typing animation", "Projects grid", "Skills showcase", "Contact form"],
-            stack="React + TypeScript + Tailwind",
-            components=["Navbar", "Hero", "About", "ProjectsGrid", "Skills", "Contact", "Footer"]
-        ),
-        "dashboard": ProjectTemplate(
-            id="dashboard", 
-            name="Admin Dashboard",
-            description="Professional admin dashboard with analytics and data management",
-            features=["Sidebar navigation", "Analytics charts", "Data tables", "User management"],
-            stack="React + TypeScript + Tailwind + Recharts",
-            components=["Sidebar", "Header", "Dashboard", "Analytics", "UserTable", "Settings"]
-        ),
-        "landing": ProjectTemplate(
-            id="landing",
-            name="SaaS Landing Page",
-            description="High-converting landing page for SaaS products",
-            features=["Hero section", "Features showcase", "Pricing table", "Testimonials"],
-            stack="React + TypeScript + Tailwind",
-            components=["Navbar", "Hero", "Features", "Pricing", "Testimonials", "FAQ", "Footer"]
-        ),
-        "business": ProjectTemplate(
-            id="business",
-            name="Business Website", 
-            description="Professional corporate website for consulting companies",
-            features=["Company overview", "Services", "Team profiles", "Client testimonials"],
-            stack="React + TypeScript + Tailwind",
-            components=["Navbar", "Hero", "Services", "Team", "Testimonials", "Stats", "Contact", "Footer"]
-        )
-    }
+    @classmethod
+    def shared(cls, templates: Optional[TemplateRegistry] = None) -> "PromptEngine":
+        """Process-wide instance, so templates and summary caches are loaded once.
+
+        templates only applies to the call that creates the instance.
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls(templates=templates)
+        return cls._shared
+    
+    def __init__(self, context_builder: Optional[ContextBuilder] = None, templates: Optional[TemplateRegistry] = None):
+        self.context_builder = context_builder or ContextBuilder.from_env()
+        self.templates = templates or TemplateRegistry.from_env()
+        self.component_prompts = self._load_component_prompts()
     
     def _load_component_prompts(self) -> Dict[str, str]:
         return {
@@ -55,16 +39,26 @@ class PromptEngine:
         Complexity: {complexity}
         Return JSON with: title, description, stack, features, components_sequence"""
     
-    def get_component_prompt(self, component_name: str, project_context: Dict[str, Any], session_history: List[Dict[str, Any]]) -> str:
+    def get_component_prompt(self, component_name: str, project_context: Dict[str, Any], session_history: List[GeneratedComponent]) -> str:
+        context = self.context_builder.build(component_name, session_history, call_type="component")
+        if not context:
+            return f"""Create React component: {component_name}
+        Project: {project_context.get('title', 'Web App')}
+        Return JSON with: name, filename, code, explanation"""
+        
         return f"""Create React component: {component_name}
         Project: {project_context.get('title', 'Web App')}
+{context}
         Return JSON with: name, filename, code, explanation"""
     
     def get_preview_prompt(self, description: str, style: str = "modern") -> str:
         return f"Create HTML page for: {description} with {style} style"
     
+    def get_continuation_prompt(self) -> str:
+        return "Your reply was cut off. Continue from the exact character where it stopped. Do not repeat anything, do not add commentary or markdown."
+    
     def get_template(self, template_id: str) -> Optional[ProjectTemplate]:
         return self.templates.get(template_id)
     
     def list_templates(self) -> List[ProjectTemplate]:
-        return list(self.templates.values())
\ No newline at end of file
+        return self.templates.list()
\ No newline at end of file
@@ -0,0 +1,246 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from core.utils.metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+CIRCUIT_STATE = Gauge("llm_circuit_state", "LLM circuit breaker state (0 closed, 1 half open, 2 open)")
+CIRCUIT_OPENED = Counter("llm_circuit_opened_total", "Times the LLM circuit breaker opened")
+HEDGED_CALLS = Counter("llm_hedged_calls_total", "Slow LLM calls that were hedged with a second request, by which request won", ["call_type", "winner"])
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the breaker is open; callers fall back at once."""
+
+class LatencyTracker:
+    """Recent successful call latencies per call type, for percentile-based timeouts and hedging."""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, call_type: str, seconds: float) -> None:
+        samples = self._samples.get(call_type)
+        if samples is None:
+            samples = self._samples[call_type] = deque(maxlen=self.size)
+        samples.append(seconds)
+
+    def count(self, call_type: str) -> int:
+        return len(self._samples.get(call_type, ()))
+
+    def percentile(self, call_type: str, pct: float) -> Optional[float]:
+        samples = self._samples.get(call_type)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+class CircuitBreaker:
+    """Opens when too many recent calls failed or ran slow; probes the provider again after a cool-down."""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window_size: int = 20,
+        window_seconds: float = 120.0,
+        slow_call_seconds: float = 20.0,
+        open_seconds: float = 30.0,
+        probe_interval: float = 5.0
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.probe_interval = probe_interval
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_probe_at = 0.0
+        self.times_opened = 0
+        self.short_circuited = 0
+        # (timestamp, failed) per finished call; slow successes count as failed
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window_size)
+        CIRCUIT_STATE.set_function(lambda: {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[self.current_state()])
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+        return self.state
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.current_state() == CLOSED:
+            return True
+        # Half open: let one probe through per interval; its outcome closes or re-opens the circuit
+        if self.state == HALF_OPEN and now - self.last_probe_at >= self.probe_interval:
+            self.last_probe_at = now
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self, seconds: Optional[float] = None) -> None:
+        slow = seconds is not None and seconds >= self.slow_call_seconds
+        if self.state == HALF_OPEN and not slow:
+            self._close()
+            return
+        self._record(slow)
+
+    def record_failure(self) -> None:
+        self._record(True)
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            if failed:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, failed))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+        if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _at, outcome in self._outcomes if outcome)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+        CIRCUIT_OPENED.inc()
+        print(f"LLM circuit breaker opened; serving fallbacks for {self.open_seconds:.0f}s")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        print("LLM circuit breaker closed")
+
+    def stats(self) -> Dict[str, Any]:
+        failures = sum(1 for _at, outcome in self._outcomes if outcome)
+        return {
+            "state": self.current_state(),
+            "recent_calls": len(self._outcomes),
+            "recent_failures": failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited
+        }
+
+class ResiliencePolicy:
+    """Circuit breaker, latency-percentile timeouts and optional hedging for LLM completions."""
+
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        adaptive_timeouts: bool = True,
+        timeout_percentile: float = 99.0,
+        timeout_multiplier: float = 3.0,
+        min_timeout: float = 5.0,
+        min_samples: int = 20,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0
+    ):
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.adaptive_timeouts = adaptive_timeouts
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedged = 0
+
+    @classmethod
+    def from_env(cls) -> "ResiliencePolicy":
+        def flag(name: str, default: str) -> bool:
+            return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+        breaker = CircuitBreaker(
+            failure_rate=float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),
+            min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "10")),
+            window_size=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+            slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "20")),
+            open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+        )
+        return cls(
+            breaker=breaker,
+            adaptive_timeouts=flag("LLM_ADAPTIVE_TIMEOUTS", "true"),
+            timeout_multiplier=float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "3")),
+            min_timeout=float(os.getenv("LLM_MIN_TIMEOUT", "5")),
+            hedge=flag("LLM_HEDGE", "false"),
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        )
+
+    def check(self, call_type: str) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"LLM circuit open, skipping {call_type} call")
+
+    def timeout_for(self, call_type: str, ceiling: float) -> float:
+        """A few times the observed tail latency, never above the configured timeout."""
+        if not self.adaptive_timeouts or self.latency.count(call_type) < self.min_samples:
+            return ceiling
+        tail = self.latency.percentile(call_type, self.timeout_percentile)
+        return min(ceiling, max(self.min_timeout, tail * self.timeout_multiplier))
+
+    async def run(self, call_type: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Run one upstream call, hedged if enabled, and feed the outcome to the breaker."""
+        started = time.monotonic()
+        try:
+            result = await self._hedged(call_type, attempt) if self.hedge else await attempt()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+        self.latency.observe(call_type, elapsed)
+        return result
+
+    async def _hedged(self, call_type: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        delay = self.latency.percentile(call_type, self.hedge_percentile) if self.latency.count(call_type) >= self.min_samples else None
+        primary = asyncio.ensure_future(attempt())
+        if delay is None:
+            return await primary
+
+        done, _pending = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        # The primary is in the slow tail: race a second request and keep whichever finishes first
+        self.hedged += 1
+        hedge = asyncio.ensure_future(attempt())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGED_CALLS.labels(call_type=call_type, winner="hedge" if task is hedge else "primary").inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if primary.done() and not primary.cancelled():
+                primary.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.stats(),
+            "adaptive_timeouts": self.adaptive_timeouts,
+            "hedging": self.hedge,
+            "hedged": self.hedged,
+            "latency_p50": {call_type: round(self.latency.percentile(call_type, 50), 3) for call_type in self.latency._samples},
+            "latency_p99": {call_type: round(self.latency.percentile(call_type, 99), 3) for call_type in self.latency._samples}
+        }
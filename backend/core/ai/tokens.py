@@ -0,0 +1,22 @@
+import re
+
+# Roughly how BPE tokenizers split English and code: words, numbers, and individual symbols
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|\s+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate for prompt budgeting and accounting when the provider reports no usage."""
+    if not text:
+        return 0
+    count = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece.isspace():
+            continue
+        # Long words are split into several sub-word tokens
+        count += 1 + (len(piece) - 1) // 6 if piece.isalpha() else 1
+    return count
+
+
+def estimate_message_tokens(messages) -> int:
+    # Each chat message carries a few tokens of role/formatting overhead
+    return sum(estimate_tokens(message.get("content", "")) + 4 for message in messages) + 2
@@ -0,0 +1,165 @@
+import asyncio
+import traceback
+from typing import Any, Dict, List, Optional, Set
+from core.ai.admission import AdmissionRejected
+from core.services.generation_service import GenerationService
+from core.services.project_service import ComponentBusy
+from core.utils.metrics import Counter, Gauge
+
+BUILD_SUBSCRIBERS = Gauge("build_channel_subscribers", "Open WebSocket build channel connections")
+BUILD_DROPPED_EVENTS = Counter("build_channel_dropped_events_total", "Token events dropped for build channel subscribers that fell behind")
+
+def _message(event: str, data: Any) -> Dict[str, Any]:
+    return {"event": event, "data": data}
+
+class Subscriber:
+    """One connected tab: a bounded outbox drained by its WebSocket writer."""
+
+    def __init__(self, max_queue: int):
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(max_queue)
+        self.dropped = 0
+
+    def offer(self, message: Dict[str, Any]) -> bool:
+        """Queue a message; False if the outbox is full and the message could not be skipped."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if message["event"] == "token":
+                # Tokens are a preview; the "done" event carries the full code anyway
+                self.dropped += 1
+                BUILD_DROPPED_EVENTS.inc()
+                return True
+            return False
+        return True
+
+class BuildChannel:
+    """One session's build task, whose events fan out to every tab connected to the session.
+
+    Tabs send commands ("build", "build_all", "cancel", "progress"); only one build runs at a time
+    and every tab sees the same start / token / validation / done / progress events.
+    """
+
+    def __init__(self, hub: "BuildHub", session_id: str):
+        self.hub = hub
+        self.session_id = session_id
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.current: Optional[str] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.hub.max_queue)
+        self.subscribers.add(subscriber)
+        BUILD_SUBSCRIBERS.inc()
+        # A tab joining mid-build starts from the current state
+        subscriber.offer(_message("progress", self._progress()))
+        if self.current is not None:
+            subscriber.offer(_message("start", {"session_id": self.session_id, "component_name": self.current}))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            BUILD_SUBSCRIBERS.dec()
+        self.hub.release(self)
+
+    def publish(self, event: str, data: Any) -> None:
+        message = _message(event, data)
+        for subscriber in list(self.subscribers):
+            if not subscriber.offer(message):
+                # Too far behind to catch up event by event: replace the backlog with the current state
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.offer(_message("resync", self._progress()))
+
+    def _progress(self) -> Dict[str, Any]:
+        project_service = self.hub.generation_service.project_service
+        session = project_service.get_session(self.session_id)
+        if session is None:
+            return {"session_id": self.session_id, "building": self.current}
+        progress = project_service.get_session_view(session, fields={"remaining": None, "progress": None})
+        progress["building"] = self.current
+        return progress
+
+    def handle(self, command: Any) -> Optional[Dict[str, Any]]:
+        """Apply a command from one tab; returns a reply meant for that tab only."""
+        if not isinstance(command, dict):
+            return _message("error", {"detail": "Commands are JSON objects with a \"type\""})
+
+        kind = command.get("type")
+        if kind in ("build", "build_all"):
+            if self.task is not None:
+                return _message("error", {"detail": "A build is already running", "component_name": self.current})
+            self.task = asyncio.create_task(self._run(
+                component_name=command.get("component") if kind == "build" else None,
+                build_all=kind == "build_all",
+                use_llm=bool(command.get("use_llm", False))
+            ))
+            return None
+        if kind == "cancel":
+            if self.task is not None:
+                self.task.cancel()
+            return None
+        if kind == "progress":
+            return _message("progress", self._progress())
+        return _message("error", {"detail": f"Unknown command: {kind}"})
+
+    async def _run(self, component_name: Optional[str], build_all: bool, use_llm: bool) -> None:
+        generation_service = self.hub.generation_service
+        try:
+            while True:
+                session = generation_service.project_service.get_session(self.session_id)
+                if session is None:
+                    break
+                name = component_name or generation_service.project_service.next_component(session)
+                if not name:
+                    break
+                self.current = name
+                try:
+                    async for event, payload in generation_service.stream_step(self.session_id, name, use_llm=use_llm, session=session):
+                        self.publish(event, payload)
+                except ComponentBusy:
+                    # Picked up by someone else since we read the session; move on to the next one
+                    if component_name or not build_all:
+                        raise
+                self.current = None
+                self.publish("progress", self._progress())
+                if not build_all:
+                    break
+                component_name = None
+        except asyncio.CancelledError:
+            self.publish("cancelled", {"session_id": self.session_id, "component_name": self.current})
+        except AdmissionRejected as e:
+            self.publish("error", {"detail": str(e), "status": e.status_code, "retry_after": e.retry_after})
+        except Exception as e:
+            print(f"Error in build channel: {traceback.format_exc()}")
+            self.publish("error", {"detail": str(e)})
+        finally:
+            self.current = None
+            self.task = None
+            self.hub.release(self)
+
+class BuildHub:
+    """Build channels by session id, kept while a tab is connected or a build is running."""
+
+    def __init__(self, generation_service: GenerationService, max_queue: int = 512):
+        self.generation_service = generation_service
+        self.max_queue = max_queue
+        self._channels: Dict[str, BuildChannel] = {}
+
+    def channel(self, session_id: str) -> BuildChannel:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            channel = self._channels[session_id] = BuildChannel(self, session_id)
+        return channel
+
+    def release(self, channel: BuildChannel) -> None:
+        if not channel.subscribers and channel.task is None and self._channels.get(channel.session_id) is channel:
+            del self._channels[channel.session_id]
+
+    def stats(self) -> Dict[str, Any]:
+        channels: List[BuildChannel] = list(self._channels.values())
+        return {
+            "channels": len(channels),
+            "subscribers": sum(len(channel.subscribers) for channel in channels),
+            "building": sum(1 for channel in channels if channel.task is not None)
+        }
@@ -0,0 +1,169 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from core.utils.startup import STARTUP, StartupReport
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+_MISSING = object()
+
+class lazy_service:
+    """Build the service on first access, once per container, and record how long it took."""
+
+    def __init__(self, factory: Callable[["ServiceContainer"], Any]):
+        self.factory = factory
+        self.name = factory.__name__
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, container: Optional["ServiceContainer"], owner=None):
+        if container is None:
+            return self
+        service = container.__dict__.get(self.name, _MISSING)
+        if service is _MISSING:
+            # One lock per service, so a request never waits while warm-up builds an unrelated one;
+            # services are built in dependency order, so the locks cannot deadlock
+            with container._build_lock(self.name):
+                service = container.__dict__.get(self.name, _MISSING)
+                if service is _MISSING:
+                    with container.report.step(self.name, "init"):
+                        service = self.factory(container)
+                    container.__dict__[self.name] = service
+        return service
+
+class ServiceContainer:
+    """Application services, constructed lazily so importing main stays cheap."""
+
+    SERVICES = (
+        "template_registry", "prompt_engine", "plan_cache", "admission", "resilience", "component_library", "code_generator", "project_service",
+        "code_validator", "preview_store", "generation_service", "build_hub", "job_queue", "profiler"
+    )
+
+    def __init__(self, openai_api_key: Optional[str] = None, report: StartupReport = STARTUP):
+        self.openai_api_key = openai_api_key
+        self.report = report
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def _build_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(name, threading.Lock())
+
+    def is_building(self, name: str) -> bool:
+        return self._build_lock(name).locked()
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self.__dict__
+
+    def initialized(self) -> List[str]:
+        return [name for name in self.SERVICES if self.is_initialized(name)]
+
+    @lazy_service
+    def template_registry(self):
+        from core.services.template_registry import TemplateRegistry
+        return TemplateRegistry.from_env()
+
+    @lazy_service
+    def prompt_engine(self):
+        from core.ai.prompt_engine import PromptEngine
+        return PromptEngine.shared(templates=self.template_registry)
+
+    @lazy_service
+    def plan_cache(self):
+        from core.ai.plan_cache import PlanCache
+        return PlanCache.from_env()
+
+    @lazy_service
+    def admission(self):
+        from core.ai.admission import AdmissionController
+        return AdmissionController.from_env()
+
+    @lazy_service
+    def resilience(self):
+        from core.ai.resilience import ResiliencePolicy
+        return ResiliencePolicy.from_env()
+
+    @lazy_service
+    def component_library(self):
+        from core.ai.component_library import ComponentLibrary
+        return ComponentLibrary.from_env()
+
+    @lazy_service
+    def code_generator(self):
+        from core.ai.code_generator import CodeGenerator
+        return CodeGenerator(
+            openai_api_key=self.openai_api_key,
+            plan_cache=self.plan_cache,
+            prompt_engine=self.prompt_engine,
+            admission=self.admission,
+            resilience=self.resilience,
+            library=self.component_library,
+            continuation_tokens=int(os.getenv("LLM_CONTINUATION_TOKENS", "1000")),
+            coalesce=_env_flag("LLM_COALESCING", "true")
+        )
+
+    @lazy_service
+    def project_service(self):
+        from core.services.project_service import ProjectService
+        from core.services.session_store import create_session_store
+        return ProjectService(store=create_session_store())
+
+    @lazy_service
+    def code_validator(self):
+        from core.utils.validators import CodeValidator
+        return CodeValidator(cache_size=int(os.getenv("VALIDATION_CACHE_SIZE", "1024")))
+
+    @lazy_service
+    def preview_store(self):
+        from core.services.preview_store import PreviewStore
+        return PreviewStore.from_env()
+
+    @lazy_service
+    def generation_service(self):
+        from core.services.generation_service import GenerationService
+        from core.services.speculation import SpeculativeBuilds
+        return GenerationService(
+            self.code_generator,
+            self.project_service,
+            self.code_validator,
+            self.preview_store,
+            batch_concurrency=int(os.getenv("BATCH_MAX_CONCURRENCY", "4")),
+            speculation=SpeculativeBuilds(self.code_generator, idle_timeout=float(os.getenv("SPECULATIVE_IDLE_TIMEOUT", "120"))),
+            speculative_default=_env_flag("SPECULATIVE_GENERATION", "false")
+        )
+
+    @lazy_service
+    def build_hub(self):
+        from core.services.build_channel import BuildHub
+        return BuildHub(self.generation_service, max_queue=int(os.getenv("BUILD_CHANNEL_QUEUE", "512")))
+
+    @lazy_service
+    def job_queue(self):
+        from core.services.job_queue import JobQueue, generation_handlers
+        return JobQueue.from_env(generation_handlers(lambda: self.generation_service))
+
+    @lazy_service
+    def profiler(self):
+        from core.utils.profiling import Profiler
+        return Profiler.from_env()
+
+    def warm_up(self) -> None:
+        """Build every service and the LLM connection pool ahead of the first request."""
+        from core.services.job_queue import JobQueue
+        for name in self.SERVICES:
+            # The job queue's database is left unopened until it is configured or used
+            if name == "job_queue" and not JobQueue.configured():
+                continue
+            # A request is already building it; waiting here would only hold up the rest
+            if self.is_building(name):
+                continue
+            getattr(self, name)
+        llm_client = self.code_generator.llm_client
+        if llm_client is not None:
+            with self.report.step("llm_client", "warmup"):
+                llm_client.client
+
+    def stats(self) -> Dict[str, Any]:
+        return {"initialized": self.initialized(), "startup": self.report.as_dict()}
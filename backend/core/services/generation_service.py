@@ -0,0 +1,225 @@
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from core.ai.code_generator import CodeGenerator
+from core.ai.admission import AdmissionRejected
+from core.services.project_service import ComponentBusy, ProjectService
+from core.services.preview_store import PreviewStore, StoredPreview
+from core.services.speculation import SpeculativeBuilds
+from core.utils.validators import CodeValidator
+from models.project import ValidationResult
+from models.session import SessionRecord
+
+class GenerationService:
+    """Runs the generate -> validate -> record pipeline shared by the HTTP endpoints."""
+
+    def __init__(self, code_generator: CodeGenerator, project_service: ProjectService, code_validator: CodeValidator, preview_store: Optional[PreviewStore] = None, batch_concurrency: int = 4, speculation: Optional[SpeculativeBuilds] = None, speculative_default: bool = False):
+        self.code_generator = code_generator
+        self.project_service = project_service
+        self.code_validator = code_validator
+        self.preview_store = preview_store or PreviewStore()
+        self.batch_concurrency = batch_concurrency
+        self.speculation = speculation or SpeculativeBuilds(code_generator)
+        self.speculative_default = speculative_default
+
+    def speculate_next(self, session_id: str, requested: Optional[bool] = None, session: Optional[SessionRecord] = None) -> None:
+        """Start building the session's next component in the background if speculation is enabled."""
+        session = session or self.project_service.get_session(session_id)
+        if not session:
+            return
+
+        enabled = requested
+        if enabled is None:
+            enabled = session.user_preferences.get("speculative")
+        if enabled is None:
+            enabled = self.speculative_default
+        next_component = ProjectService.next_component(session)
+        if not enabled or not next_component:
+            self.speculation.discard(session_id)
+            return
+
+        self.speculation.schedule(session_id, session, next_component)
+
+    async def start_project(self, idea: str, preferred_stack: Optional[str] = None, complexity: str = "medium", speculative: Optional[bool] = None) -> Dict[str, Any]:
+        plan = await self.code_generator.generate_project_plan(
+            idea=idea,
+            preferred_stack=preferred_stack,
+            complexity=complexity
+        )
+
+        session_id = await self.project_service.create_session(
+            idea=idea,
+            plan=plan,
+            user_preferences={"stack": preferred_stack, "complexity": complexity, "speculative": speculative}
+        )
+        self.speculate_next(session_id)
+        return {"session_id": session_id, "plan": plan}
+
+    async def record_component(self, session_id: str, result: Dict[str, Any], component_name: Optional[str] = None) -> Dict[str, Any]:
+        return (await self._record(session_id, result, component_name))[0]
+
+    async def _record(self, session_id: str, result: Dict[str, Any], component_name: Optional[str] = None) -> Tuple[Dict[str, Any], ValidationResult, Optional[SessionRecord]]:
+        # Session bookkeeping is keyed on the requested name, whatever the model called it
+        if component_name:
+            result["name"] = component_name
+
+        result["code"], validation_result = self.code_validator.validate_and_fix(result["code"])
+
+        session = await self.project_service.add_generated_component(session_id, result)
+
+        return {
+            "session_id": session_id,
+            "component_name": result["name"],
+            "code": result["code"],
+            "explanation": result.get("explanation"),
+            "remaining": list(session.remaining_components) if session else [],
+            "validation_notes": validation_result.notes if validation_result.notes else None,
+            "source": result.get("source")
+        }, validation_result, session
+
+    async def _recorded_events(self, session_id: str, result: Dict[str, Any], component_name: str, speculative: Optional[bool]) -> List[Tuple[str, Any]]:
+        step, validation_result, session = await self._record(session_id, result, component_name)
+        self.speculate_next(session_id, speculative, session)
+        validation = {"component_name": component_name, **validation_result.model_dump()}
+        return [("validation", validation), ("done", step)]
+
+    @asynccontextmanager
+    async def _claimed(self, session_id: str, component_name: str) -> AsyncIterator[None]:
+        """Hold the store's claim on a component while it is built; recording it releases the claim."""
+        token = uuid.uuid4().hex
+        try:
+            await self.project_service.claim_component(session_id, component_name, token)
+            yield
+        except ComponentBusy:
+            raise
+        except BaseException:
+            await self.project_service.release_claim(session_id, token)
+            raise
+
+    async def generate_step(self, session_id: str, component_name: str, include_explanation: bool = True, include_tests: bool = False, speculative: Optional[bool] = None, use_llm: bool = False, session: Optional[SessionRecord] = None) -> Dict[str, Any]:
+        async with self._claimed(session_id, component_name):
+            # A parked speculative build may have come from the library, so it is skipped when the LLM is asked for
+            result = None if use_llm else await self.speculation.claim(session_id, component_name)
+            if result is None:
+                session = session or self.project_service.get_session(session_id)
+                result = await self.code_generator.generate_component(
+                    session=session,
+                    component_name=component_name,
+                    include_explanation=include_explanation,
+                    include_tests=include_tests,
+                    use_llm=use_llm
+                )
+
+            step, _validation, session = await self._record(session_id, result, component_name)
+        self.speculate_next(session_id, speculative, session)
+        return step
+
+    async def generate_all(self, session_id: str, max_concurrency: Optional[int] = None, include_explanation: bool = True, include_tests: bool = False, use_llm: bool = False) -> Dict[str, Any]:
+        limit = max(1, min(max_concurrency or self.batch_concurrency, self.batch_concurrency))
+        started = time.time()
+        self.speculation.discard(session_id)
+
+        # Claimed through the store, so components another batch, request or worker is building
+        # are left to it rather than built twice
+        token = uuid.uuid4().hex
+        pending: List[str] = []
+        try:
+            pending = await self.project_service.claim_remaining(session_id, token)
+            session = self.project_service.get_session(session_id)
+            semaphore = asyncio.Semaphore(limit)
+            steps: Dict[str, Dict[str, Any]] = {}
+            fallbacks: List[str] = []
+            rejected: List[AdmissionRejected] = []
+
+            async def build(component_name: str) -> None:
+                async with semaphore:
+                    try:
+                        result = await self.code_generator.generate_component(
+                            session=session,
+                            component_name=component_name,
+                            include_explanation=include_explanation,
+                            include_tests=include_tests,
+                            use_llm=use_llm
+                        )
+                    except AdmissionRejected as e:
+                        # Left pending rather than filled with a fallback, so a retry can build it
+                        rejected.append(e)
+                        return
+                    except Exception as e:
+                        print(f"Error generating {component_name} in batch: {e}")
+                        result = self.code_generator._generate_fallback_component(component_name, session.plan)
+                        fallbacks.append(component_name)
+
+                # Each result is applied atomically by the store, so results landing together never collide
+                steps[component_name] = await self.record_component(session_id, result, component_name)
+
+            await asyncio.gather(*(build(name) for name in pending))
+        finally:
+            # Whatever was not built (rejected, or the batch was cancelled) is free for a retry
+            await self.project_service.release_claim(session_id, token)
+
+        if rejected and not steps:
+            raise rejected[0]
+        return {
+            "session_id": session_id,
+            "components": [steps[name] for name in pending if name in steps],
+            "fallbacks": fallbacks,
+            "remaining": self.project_service.get_remaining_components(session_id),
+            "elapsed_seconds": round(time.time() - started, 3)
+        }
+
+    async def stream_step(self, session_id: str, component_name: str, include_explanation: bool = True, include_tests: bool = False, speculative: Optional[bool] = None, use_llm: bool = False, session: Optional[SessionRecord] = None) -> AsyncIterator[Tuple[str, Any]]:
+        session = session or self.project_service.get_session(session_id)
+        async with self._claimed(session_id, component_name):
+            yield "start", {"session_id": session_id, "component_name": component_name}
+
+            parked = None if use_llm else await self.speculation.claim(session_id, component_name)
+            if parked is not None:
+                for event in await self._recorded_events(session_id, parked, component_name, speculative):
+                    yield event
+                return
+
+            async for event, payload in self.code_generator.stream_component(
+                session=session,
+                component_name=component_name,
+                include_explanation=include_explanation,
+                include_tests=include_tests,
+                use_llm=use_llm
+            ):
+                if event == "token":
+                    yield "token", {"delta": payload}
+                else:
+                    for recorded in await self._recorded_events(session_id, payload, component_name, speculative):
+                        yield recorded
+
+    def _preview_payload(self, preview: StoredPreview) -> Dict[str, Any]:
+        return {
+            "preview_html": preview.html,
+            "generated_at": preview.created_at,
+            "preview_hash": preview.key,
+            "preview_url": f"/preview/{preview.key}",
+            "source": preview.source
+        }
+
+    async def generate_preview(self, prompt: str, style_preference: str = "modern") -> Dict[str, Any]:
+        key = PreviewStore.make_key(prompt, style_preference)
+        preview = self.preview_store.get(key)
+        if preview is None:
+            page = await self.code_generator.generate_preview_html(prompt=prompt, style_preference=style_preference)
+            preview = self.preview_store.put(key, page["html"], page["source"])
+        return self._preview_payload(preview)
+
+    async def stream_preview(self, prompt: str, style_preference: str = "modern") -> AsyncIterator[Tuple[str, Any]]:
+        key = PreviewStore.make_key(prompt, style_preference)
+        preview = self.preview_store.get(key)
+        if preview is not None:
+            yield "done", self._preview_payload(preview)
+            return
+
+        async for event, payload in self.code_generator.stream_preview_html(prompt, style_preference):
+            if event == "token":
+                yield "token", {"delta": payload}
+            else:
+                yield "done", self._preview_payload(self.preview_store.put(key, payload["html"], payload["source"]))
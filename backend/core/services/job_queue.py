@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, TypeVar
+from core.ai.admission import AdmissionRejected, admission_scope
+from core.services.project_service import ComponentBusy
+from core.utils.metrics import Counter, Gauge, Histogram
+
+JOBS_FINISHED = Counter("jobs_finished_total", "Background jobs by kind and final status", ["kind", "status"])
+JOB_WAIT_SECONDS = Histogram("job_queue_wait_seconds", "Time jobs spent queued before a worker first picked them up", ["kind"])
+JOB_RUN_SECONDS = Histogram("job_run_duration_seconds", "Time a worker spent running a job", ["kind"])
+JOBS_QUEUED = Gauge("jobs_queued", "Jobs waiting for a worker")
+JOBS_RUNNING = Gauge("jobs_running", "Jobs running in this process")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+T = TypeVar("T")
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    client: Optional[str]
+    attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    COLUMNS = "id, kind, status, params, client, attempts, created_at, started_at, finished_at, result, error"
+
+    @classmethod
+    def from_row(cls, row) -> "Job":
+        id, kind, status, params, client, attempts, created_at, started_at, finished_at, result, error = row
+        return cls(
+            id=id, kind=kind, status=status, params=json.loads(params), client=client, attempts=attempts,
+            created_at=created_at, started_at=started_at, finished_at=finished_at,
+            result=json.loads(result) if result is not None else None, error=error
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobQueue:
+    """Generation work queued in SQLite and run by a pool of worker tasks.
+
+    Jobs outlive the process: queued jobs are picked up after a restart, and a running job whose
+    worker stops heartbeating for lease seconds (crash, kill -9) is claimed again, up to
+    max_attempts. Several processes may share the database; each job runs in exactly one of them.
+
+    Writes (submits, claims, heartbeats) can wait on another process's lock, so they run in order
+    on one writer thread; reads use their own connection, which WAL never makes wait.
+    """
+
+    def __init__(self, handlers: Dict[str, JobHandler], path: str = "jobs.db", workers: int = 4, lease: float = 30.0, max_attempts: int = 3, retention: float = 24 * 3600.0, poll_interval: float = 1.0, busy_timeout_ms: int = 5000):
+        self.handlers = handlers
+        self.path = path
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._running: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-queue")
+        self._db = self._connect(busy_timeout_ms)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, params TEXT NOT NULL, client TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, run_after REAL NOT NULL, "
+            "started_at REAL, heartbeat_at REAL, finished_at REAL, result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._reader = self._connect(0)
+        JOBS_QUEUED.set_function(lambda: self.count(QUEUED))
+        JOBS_RUNNING.set_function(lambda: len(self._running))
+
+    @classmethod
+    def from_env(cls, handlers: Dict[str, JobHandler]) -> "JobQueue":
+        return cls(
+            handlers,
+            path=os.getenv("JOB_DB_PATH", "jobs.db"),
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            lease=float(os.getenv("JOB_LEASE_SECONDS", "30")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            retention=float(os.getenv("JOB_RETENTION", str(24 * 3600)))
+        )
+
+    @staticmethod
+    def configured() -> bool:
+        """Whether startup should open the queue: it is configured, or an earlier process left jobs behind."""
+        return bool(os.getenv("JOB_DB_PATH") or os.getenv("JOB_WORKERS")) or os.path.exists("jobs.db")
+
+    def _connect(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=busy_timeout_ms / 1000)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        return db
+
+    async def _write(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, function, *args)
+
+    async def start(self) -> None:
+        """Start the worker pool (none when workers is 0: this process only enqueues)."""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running go back to the queue for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, params: Dict[str, Any], client: Optional[str] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = Job(id=str(uuid.uuid4()), kind=kind, status=QUEUED, params=params, client=client, attempts=0, created_at=time.time())
+        await self._write(
+            self._db.execute,
+            "INSERT INTO jobs (id, kind, status, params, client, created_at, run_after) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job.id, kind, QUEUED, json.dumps(params), client, job.created_at, job.created_at)
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._reader.execute(f"SELECT {Job.COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+
+    def count(self, status: str) -> int:
+        return self._reader.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def _claim(self) -> Optional[Job]:
+        now = time.time()
+        stale = now - self.lease
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # A job whose worker died mid-run gives up once it has used its attempts
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+                (FAILED, "Worker stopped while running the job", now, RUNNING, stale, self.max_attempts)
+            )
+            lost = cursor.rowcount
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND run_after <= ?) OR (status = ? AND heartbeat_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, now, RUNNING, stale)
+            ).fetchone()
+            job = None
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (RUNNING, now, now, row[0])
+                )
+                job = Job.from_row(self._db.execute(f"SELECT {Job.COLUMNS} FROM jobs WHERE id = ?", (row[0],)).fetchone())
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        if lost > 0:
+            print(f"{lost} job(s) failed after their worker stopped {self.max_attempts} times")
+        return job
+
+    def _requeue(self, job: Job, delay: float) -> None:
+        # Not the job's fault, so the attempt is given back
+        self._db.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts - 1, run_after = ?, started_at = NULL, heartbeat_at = NULL "
+            "WHERE id = ? AND attempts = ?",
+            (QUEUED, time.time() + delay, job.id, job.attempts)
+        )
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        # Matching the attempt keeps a worker whose lease lapsed from overwriting the retry's outcome
+        self._db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND attempts = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job.id, job.attempts)
+        )
+        JOBS_FINISHED.labels(kind=job.kind, status=status).inc()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._write(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Also polls, for jobs submitted by other processes sharing the database
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        if job.attempts == 1:
+            JOB_WAIT_SECONDS.labels(kind=job.kind).observe(job.started_at - job.created_at)
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await self._write(self._finish, job, FAILED, None, f"Unknown job kind: {job.kind}")
+            return
+
+        self._running.add(job.id)
+        started = time.perf_counter()
+        try:
+            with admission_scope(key=job.client):
+                result = await handler(job.params)
+        except asyncio.CancelledError:
+            # Queued without waiting, so it lands even while the loop shuts down
+            self._writer.submit(self._requeue, job, 0)
+            raise
+        except AdmissionRejected as e:
+            # Waits out the overload in the queue instead of failing
+            await self._write(self._requeue, job, e.retry_after)
+        except Exception as e:
+            print(f"Error in {job.kind} job {job.id}: {traceback.format_exc()}")
+            await self._write(self._finish, job, FAILED, None, str(e))
+        else:
+            await self._write(self._finish, job, SUCCEEDED, result)
+        finally:
+            self._running.discard(job.id)
+            JOB_RUN_SECONDS.labels(kind=job.kind).observe(time.perf_counter() - started)
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await self._write(self._heartbeat, list(self._running))
+            if self._wakeup is not None:
+                # Delayed (admission-rejected) and stale jobs become claimable without a new submit
+                self._wakeup.set()
+
+    def _heartbeat(self, running: List[str]) -> None:
+        now = time.time()
+        if running:
+            self._db.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE id IN ({','.join('?' * len(running))})",
+                (now, *running)
+            )
+        self._db.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (SUCCEEDED, FAILED, now - self.retention)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self._reader.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "path": self.path,
+            "workers": self.workers,
+            "running_here": len(self._running),
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        }
+
+def generation_handlers(generation_service: Callable[[], Any]) -> Dict[str, JobHandler]:
+    """Job kinds backed by the generation service, resolved on first use so startup stays lazy."""
+
+    async def plan(params: Dict[str, Any]) -> Dict[str, Any]:
+        return await generation_service().start_project(
+            idea=params["idea"],
+            preferred_stack=params.get("preferred_stack"),
+            complexity=params.get("complexity") or "medium",
+            speculative=params.get("speculative")
+        )
+
+    async def component(params: Dict[str, Any]) -> Dict[str, Any]:
+        service = generation_service()
+        session_id = params["session_id"]
+        # The component is resolved when the job runs, skipping ones being built elsewhere, so
+        # concurrent component jobs build different components
+        while True:
+            session = service.project_service.get_session(session_id)
+            if not session:
+                raise ValueError("Session not found")
+            component_name = params.get("component") or service.project_service.next_component(session)
+            if not component_name:
+                raise ValueError("No components remaining")
+            try:
+                return await service.generate_step(
+                    session_id=session_id,
+                    component_name=component_name,
+                    include_explanation=params.get("include_explanation", True),
+                    include_tests=params.get("include_tests") or False,
+                    speculative=params.get("speculative"),
+                    use_llm=params.get("use_llm") or False,
+                    session=session
+                )
+            except ComponentBusy:
+                # Claimed between our read and our claim; the next read skips it
+                if params.get("component"):
+                    raise
+
+    async def batch(params: Dict[str, Any]) -> Dict[str, Any]:
+        service = generation_service()
+        if not service.project_service.get_session(params["session_id"]):
+            raise ValueError("Session not found")
+        return await service.generate_all(
+            session_id=params["session_id"],
+            max_concurrency=params.get("max_concurrency"),
+            include_explanation=params.get("include_explanation", True),
+            include_tests=params.get("include_tests") or False,
+            use_llm=params.get("use_llm") or False
+        )
+
+    async def preview(params: Dict[str, Any]) -> Dict[str, Any]:
+        return await generation_service().generate_preview(
+            prompt=params["prompt"],
+            style_preference=params.get("style_preference") or "modern"
+        )
+
+    return {"plan": plan, "component": component, "batch": batch, "preview": preview}
@@ -0,0 +1,56 @@
+import os
+import json
+import time
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from core.utils.cache import LRUCache
+from core.utils.http_cache import strong_etag
+
+@dataclass
+class StoredPreview:
+    key: str
+    body: bytes
+    etag: str
+    created_at: float
+    source: str = "llm"
+
+    @property
+    def html(self) -> str:
+        return self.body.decode("utf-8")
+
+class PreviewStore:
+    """Generated preview pages addressed by a hash of their (prompt, style) inputs.
+
+    Template fallbacks (the LLM was down or failed) are kept only fallback_ttl seconds, long enough
+    for their preview_url to load, so the same inputs get a real page once the LLM is back.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 2048, fallback_ttl: float = 60.0):
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda preview: len(preview.body))
+        self.fallback_ttl = fallback_ttl
+
+    @classmethod
+    def from_env(cls) -> "PreviewStore":
+        return cls(
+            max_bytes=int(os.getenv("PREVIEW_STORE_MAX_BYTES", str(32 * 1024 * 1024))),
+            max_entries=int(os.getenv("PREVIEW_STORE_MAX_ENTRIES", "2048")),
+            fallback_ttl=float(os.getenv("PREVIEW_FALLBACK_TTL", "60"))
+        )
+
+    @staticmethod
+    def make_key(prompt: str, style_preference: str) -> str:
+        normalized = [" ".join(prompt.split()), style_preference.strip().lower()]
+        return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[StoredPreview]:
+        return self.cache.get(key)
+
+    def put(self, key: str, html: str, source: str = "llm") -> StoredPreview:
+        body = html.encode("utf-8")
+        preview = StoredPreview(key=key, body=body, etag=strong_etag(body), created_at=time.time(), source=source)
+        self.cache.set(key, preview, ttl=self.fallback_ttl if source == "fallback" else None)
+        return preview
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
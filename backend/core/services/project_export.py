@@ -0,0 +1,172 @@
+import re
+import html
+import json
+import time
+import zipfile
+import posixpath
+from typing import Dict, Iterator, List, Tuple
+from models.session import SessionRecord, GeneratedComponent
+
+CHUNK_SIZE = 64 * 1024
+
+BASE_DEPENDENCIES = {"react": "^18.2.0", "react-dom": "^18.2.0"}
+BASE_DEV_DEPENDENCIES = {
+    "@types/react": "^18.2.43",
+    "@types/react-dom": "^18.2.17",
+    "@vitejs/plugin-react": "^4.2.1",
+    "autoprefixer": "^10.4.16",
+    "postcss": "^8.4.32",
+    "tailwindcss": "^3.4.0",
+    "typescript": "^5.2.2",
+    "vite": "^5.0.8"
+}
+
+_IMPORT_RE = re.compile(r"""(?:import|from)\s+['"]([^'"./][^'"]*)['"]""")
+
+class _ChunkWriter:
+    """Write-only file object for ZipFile that hands written bytes back to the caller.
+
+    Without seek() ZipFile streams entries with data descriptors, so nothing is ever rewritten.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")[:60] or "lovable-project"
+
+def _safe_path(filename: str, component_name: str) -> str:
+    path = posixpath.normpath((filename or "").replace("\\", "/").lstrip("/"))
+    if not path or path == "." or path.startswith(".."):
+        return f"src/components/{component_name}.tsx"
+    return path
+
+def _identifier(name: str) -> str:
+    identifier = re.sub(r"\W", "", name)
+    if not identifier or identifier[0].isdigit():
+        identifier = f"Component{identifier}"
+    return identifier[0].upper() + identifier[1:]
+
+def _package_name(module: str) -> str:
+    parts = module.split("/")
+    return "/".join(parts[:2]) if module.startswith("@") else parts[0]
+
+def _latest_components(session: SessionRecord) -> List[Tuple[str, GeneratedComponent]]:
+    # A regenerated component overwrites the earlier file
+    files: Dict[str, GeneratedComponent] = {}
+    for component in list(session.generated):
+        files[_safe_path(component.filename, component.name)] = component
+    return list(files.items())
+
+def _package_json(name: str, components: List[Tuple[str, GeneratedComponent]]) -> str:
+    dependencies = dict(BASE_DEPENDENCIES)
+    for _path, component in components:
+        modules = list(component.dependencies) + _IMPORT_RE.findall(component.code or "")
+        for module in modules:
+            package = _package_name(module.strip())
+            if package and package not in dependencies and package not in BASE_DEV_DEPENDENCIES:
+                dependencies[package] = "latest"
+
+    return json.dumps({
+        "name": name,
+        "private": True,
+        "version": "0.1.0",
+        "type": "module",
+        "scripts": {"dev": "vite", "build": "vite build", "preview": "vite preview"},
+        "dependencies": dict(sorted(dependencies.items())),
+        "devDependencies": BASE_DEV_DEPENDENCIES
+    }, indent=2) + "\n"
+
+def _app_tsx(components: List[Tuple[str, GeneratedComponent]]) -> str:
+    imports = []
+    elements = []
+    for path, component in components:
+        root, extension = posixpath.splitext(path)
+        if not path.startswith("src/") or extension not in (".tsx", ".jsx", ".ts", ".js") or path in ("src/App.tsx", "src/main.tsx"):
+            continue
+        identifier = _identifier(component.name)
+        imports.append(f"import {identifier} from './{posixpath.relpath(root, 'src')}';")
+        elements.append(f"      <{identifier} />")
+
+    return "\n".join([
+        "import React from 'react';",
+        *imports,
+        "",
+        "export default function App() {",
+        "  return (",
+        "    <div className=\"min-h-screen\">",
+        *elements,
+        "    </div>",
+        "  );",
+        "}",
+        ""
+    ])
+
+def _scaffold(session: SessionRecord, name: str, components: List[Tuple[str, GeneratedComponent]]) -> Dict[str, str]:
+    title = html.escape(session.plan.get("title") or session.idea[:60])
+    return {
+        "package.json": _package_json(name, components),
+        "index.html": (
+            "<!DOCTYPE html>\n<html lang=\"en\">\n  <head>\n    <meta charset=\"UTF-8\" />\n"
+            "    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\" />\n"
+            f"    <title>{title}</title>\n  </head>\n  <body>\n    <div id=\"root\"></div>\n"
+            "    <script type=\"module\" src=\"/src/main.tsx\"></script>\n  </body>\n</html>\n"
+        ),
+        "vite.config.ts": "import { defineConfig } from 'vite';\nimport react from '@vitejs/plugin-react';\n\nexport default defineConfig({\n  plugins: [react()],\n});\n",
+        "tailwind.config.js": "export default {\n  content: ['./index.html', './src/**/*.{ts,tsx,js,jsx}'],\n  theme: { extend: {} },\n  plugins: [],\n};\n",
+        "postcss.config.js": "export default {\n  plugins: { tailwindcss: {}, autoprefixer: {} },\n};\n",
+        "src/index.css": "@tailwind base;\n@tailwind components;\n@tailwind utilities;\n",
+        "src/main.tsx": (
+            "import React from 'react';\nimport ReactDOM from 'react-dom/client';\nimport App from './App';\nimport './index.css';\n\n"
+            "ReactDOM.createRoot(document.getElementById('root')!).render(\n  <React.StrictMode>\n    <App />\n  </React.StrictMode>\n);\n"
+        ),
+        "src/App.tsx": _app_tsx(components)
+    }
+
+def export_filename(session: SessionRecord) -> str:
+    return f"{_slug(session.plan.get('title') or session.idea)}.zip"
+
+def iter_project_zip(session: SessionRecord) -> Iterator[bytes]:
+    """Yield a ZIP of the session's project as it is compressed, one entry slice at a time."""
+    name = _slug(session.plan.get("title") or session.idea)
+    components = _latest_components(session)
+    files = _scaffold(session, name, components)
+    for path, component in components:
+        files[path] = component.code or ""
+
+    writer = _ChunkWriter()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(writer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, content in files.items():
+            info = zipfile.ZipInfo(f"{name}/{path}", date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            data = content.encode("utf-8")
+            with archive.open(info, mode="w") as entry:
+                for start in range(0, len(data), CHUNK_SIZE):
+                    entry.write(data[start:start + CHUNK_SIZE])
+                    chunk = writer.drain()
+                    if chunk:
+                        yield chunk
+            chunk = writer.drain()
+            if chunk:
+                yield chunk
+    # Central directory
+    yield writer.drain()
@@ -1,75 +1,205 @@
 
 import time
 import uuid
-from typing import Dict, List, Any, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Set, TypeVar
 from models.project import ValidationResult
+from models.session import SessionRecord, GeneratedComponent
+from core.services.session_store import SessionStore, InMemorySessionStore
+
+T = TypeVar("T")
+
+SESSION_VIEW_FIELDS = ("idea", "plan", "remaining", "generated", "progress")
+
+def parse_session_fields(fields: str) -> Dict[str, Optional[Set[str]]]:
+    """Parse ?fields=progress,generated.name into {"progress": None, "generated": {"name"}}."""
+    parsed: Dict[str, Optional[Set[str]]] = {}
+    for field in filter(None, (part.strip() for part in fields.split(","))):
+        name, _, attribute = field.partition(".")
+        if name not in SESSION_VIEW_FIELDS or (attribute and (name != "generated" or attribute not in GeneratedComponent.__slots__)):
+            raise ValueError(f"Unknown field: {field}")
+        if attribute:
+            parsed.setdefault(name, set())
+            if parsed[name] is not None:
+                parsed[name].add(attribute)
+        else:
+            parsed[name] = None
+    return parsed
+
+class ComponentBusy(Exception):
+    """The component is being built by another request, job or worker process."""
+
+    status_code = 409
+
+    def __init__(self, component_name: str):
+        super().__init__(f"{component_name} is already being built")
+        self.component_name = component_name
 
 class ProjectService:
-    def __init__(self):
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, store: Optional[SessionStore] = None, claim_ttl: float = 300.0):
+        self.store = store or InMemorySessionStore()
+        # Claims left by a crashed worker lapse after this many seconds
+        self.claim_ttl = claim_ttl
+        # One thread, so writes to a blocking store keep their order and never stall the event loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-writer") if self.store.blocking else None
+    
+    async def _write(self, function: Callable[..., T], *args: Any) -> T:
+        if self._writer is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._writer, function, *args)
     
-    def create_session(self, idea: str, plan: Dict[str, Any], user_preferences: Optional[Dict[str, Any]] = None, template_id: Optional[str] = None) -> str:
+    async def create_session(self, idea: str, plan: Dict[str, Any], user_preferences: Optional[Dict[str, Any]] = None, template_id: Optional[str] = None) -> str:
         session_id = str(uuid.uuid4())
         
-        self.sessions[session_id] = {
-            "id": session_id,
-            "idea": idea,
-            "plan": plan,
-            "remaining_components": plan.get("components_sequence", []).copy(),
-            "generated": [],
-            "user_preferences": user_preferences or {},
-            "template_id": template_id,
-            "created_at": time.time(),
-            "updated_at": time.time(),
-            "status": "active"
-        }
+        await self._write(self.store.put, SessionRecord(
+            id=session_id,
+            idea=idea,
+            plan=plan,
+            remaining_components=plan.get("components_sequence", []).copy(),
+            user_preferences=user_preferences,
+            template_id=template_id
+        ))
         
         return session_id
     
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        return self.sessions.get(session_id)
+    def get_session(self, session_id: str) -> Optional[SessionRecord]:
+        return self.store.get(session_id)
+    
+    async def claim_component(self, session_id: str, component_name: str, token: str) -> Optional[str]:
+        """Mark a component as being built under token; returns the token, or None if the session is gone.
+
+        The claim is taken inside store.update, so it holds across requests, jobs, WebSocket
+        builds and worker processes sharing the store. Raises ComponentBusy if another claim holds.
+        The caller picks the token, so it can release the claim even if it is cancelled mid-write.
+        """
+        def apply(session: SessionRecord) -> str:
+            now = time.time()
+            claim = session.building.get(component_name)
+            if claim is not None and claim[1] > now:
+                raise ComponentBusy(component_name)
+            session.building[component_name] = [token, now + self.claim_ttl]
+            return token
+        
+        return await self._write(self.store.update, session_id, apply)
+    
+    async def claim_remaining(self, session_id: str, token: str) -> List[str]:
+        """Claim every remaining component nobody else is building under token; returns their names."""
+        def apply(session: SessionRecord) -> List[str]:
+            now = time.time()
+            claimed = [name for name in session.remaining_components if not self._is_building(session, name, now)]
+            for name in claimed:
+                session.building[name] = [token, now + self.claim_ttl]
+            return claimed
+        
+        return await self._write(self.store.update, session_id, apply) or []
+    
+    async def release_claim(self, session_id: str, token: str) -> None:
+        """Drop the components still claimed under token (built ones were released when recorded).
+
+        Writes to a blocking store run in order on one thread, so this lands after the claim it
+        undoes even when that claim's caller was cancelled before it completed.
+        """
+        def apply(session: SessionRecord) -> None:
+            for name in [name for name, claim in session.building.items() if claim[0] == token]:
+                del session.building[name]
+        
+        await self._write(self.store.update, session_id, apply)
+    
+    @staticmethod
+    def _is_building(session: SessionRecord, component_name: str, now: float) -> bool:
+        claim = session.building.get(component_name)
+        return claim is not None and claim[1] > now
     
     def get_session_count(self) -> int:
-        return len(self.sessions)
+        return self.store.count()
+    
+    def get_store_stats(self) -> Dict[str, Any]:
+        return self.store.stats()
     
     def get_next_component(self, session_id: str) -> Optional[str]:
         session = self.get_session(session_id)
         if not session:
             return None
-        
-        remaining = session.get("remaining_components", [])
-        return remaining[0] if remaining else None
+        return self.next_component(session)
+    
+    @classmethod
+    def next_component(cls, session: SessionRecord) -> Optional[str]:
+        """The first remaining component that nobody is building."""
+        now = time.time()
+        return next((name for name in session.remaining_components if not cls._is_building(session, name, now)), None)
     
     def get_remaining_components(self, session_id: str) -> List[str]:
         session = self.get_session(session_id)
         if not session:
             return []
         
-        return session.get("remaining_components", [])
+        return list(session.remaining_components)
     
-    def add_generated_component(self, session_id: str, component_data: Dict[str, Any]) -> bool:
-        session = self.get_session(session_id)
-        if not session:
-            return False
-        
+    async def add_generated_component(self, session_id: str, component_data: Dict[str, Any]) -> Optional[SessionRecord]:
+        """Record a built component; returns the updated session, or None if it no longer exists."""
         component_data["generated_at"] = time.time()
-        session["generated"].append(component_data)
+        component = GeneratedComponent.from_dict(component_data)
         
-        component_name = component_data.get("name")
-        if component_name in session["remaining_components"]:
-            session["remaining_components"].remove(component_name)
+        def apply(session: SessionRecord) -> SessionRecord:
+            session.revision += 1
+            component.revision = session.revision
+            # A component built twice (a retry, or two workers racing) replaces the earlier copy,
+            # so "generated" holds each name once and progress never passes 100%
+            for index, existing in enumerate(session.generated):
+                if existing.name == component.name:
+                    session.generated[index] = component
+                    break
+            else:
+                session.generated.append(component)
+            if component.name in session.remaining_components:
+                session.remaining_components.remove(component.name)
+            session.building.pop(component.name, None)
+            session.updated_at = time.time()
+            return session
         
-        session["updated_at"] = time.time()
-        return True
+        return await self._write(self.store.update, session_id, apply)
     
+    def get_session_view(self, session: SessionRecord, since: Optional[int] = None, fields: Optional[Dict[str, Optional[Set[str]]]] = None) -> Dict[str, Any]:
+        """The session as returned by GET /session/{id}.
+
+        since limits "generated" to components added after that revision (idea and plan are left
+        out unless asked for, as they never change); fields projects top-level keys and, as
+        "generated.<attr>", component attributes.
+        """
+        if fields is None:
+            fields = {name: None for name in SESSION_VIEW_FIELDS if since is None or name not in ("idea", "plan")}
+
+        view: Dict[str, Any] = {"session_id": session.id, "revision": session.revision}
+        if since is not None:
+            view["since"] = since
+        if "idea" in fields:
+            view["idea"] = session.idea
+        if "plan" in fields:
+            view["plan"] = session.plan
+        if "remaining" in fields:
+            view["remaining"] = list(session.remaining_components)
+        if "generated" in fields:
+            attributes = [attribute for attribute in GeneratedComponent.__slots__ if not fields["generated"] or attribute in fields["generated"]]
+            view["generated"] = [
+                {attribute: getattr(component, attribute) for attribute in attributes}
+                for component in session.generated
+                if since is None or component.revision > since
+            ]
+        if "progress" in fields:
+            view["progress"] = self._progress(session)
+        return view
+
     def get_progress_stats(self, session_id: str) -> Dict[str, Any]:
         session = self.get_session(session_id)
         if not session:
             return {}
-        
-        total_components = len(session["plan"].get("components_sequence", []))
-        generated_count = len(session["generated"])
-        remaining_count = len(session["remaining_components"])
+        return self._progress(session)
+    
+    def _progress(self, session: SessionRecord) -> Dict[str, Any]:
+        total_components = len(session.plan.get("components_sequence", []))
+        generated_count = len(session.generated)
+        remaining_count = len(session.remaining_components)
         
         progress_percentage = (generated_count / total_components * 100) if total_components > 0 else 0
         
@@ -79,7 +209,7 @@ class ProjectService:
             "remaining_count": remaining_count,
             "progress_percentage": round(progress_percentage, 1),
             "estimated_time_remaining": self._estimate_time_remaining(remaining_count),
-            "session_duration": time.time() - session["created_at"]
+            "session_duration": time.time() - session.created_at
         }
     
     def _estimate_time_remaining(self, remaining_count: int) -> str:
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, TypeVar
+from models.session import SessionRecord
+
+T = TypeVar("T")
+
+class SessionStore(ABC):
+    """Storage backend behind ProjectService. All mutations go through update() so backends can make them atomic."""
+
+    # Writes may wait on other processes (file locks), so ProjectService runs them off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        ...
+
+    @abstractmethod
+    def put(self, record: SessionRecord) -> None:
+        ...
+
+    @abstractmethod
+    def update(self, session_id: str, mutate: Callable[[SessionRecord], T]) -> Optional[T]:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "sessions": self.count()}
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store with idle-TTL expiry and LRU eviction by session count and payload bytes."""
+
+    def __init__(self, max_sessions: int = 10000, max_bytes: int = 256 * 1024 * 1024, idle_ttl: float = 6 * 3600.0):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._records: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "InMemorySessionStore":
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX_COUNT", "10000")),
+            max_bytes=int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024))),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", str(6 * 3600)))
+        )
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        record = self._records.get(session_id)
+        if record is None:
+            return None
+
+        now = time.time()
+        if now - record.last_accessed > self.idle_ttl:
+            self._remove(session_id)
+            self.expirations += 1
+            return None
+
+        record.last_accessed = now
+        self._records.move_to_end(session_id)
+        return record
+
+    def put(self, record: SessionRecord) -> None:
+        if record.id in self._records:
+            self._remove(record.id)
+
+        record.nbytes = record.estimate_size()
+        self._records[record.id] = record
+        self.total_bytes += record.nbytes
+        self._enforce_limits()
+
+    def update(self, session_id: str, mutate: Callable[[SessionRecord], T]) -> Optional[T]:
+        record = self.get(session_id)
+        if record is None:
+            return None
+
+        result = mutate(record)
+        size = record.estimate_size()
+        self.total_bytes += size - record.nbytes
+        record.nbytes = size
+        self._enforce_limits()
+        return result
+
+    def delete(self, session_id: str) -> bool:
+        if session_id not in self._records:
+            return False
+        self._remove(session_id)
+        return True
+
+    def count(self) -> int:
+        return len(self._records)
+
+    def _remove(self, session_id: str) -> None:
+        record = self._records.pop(session_id)
+        self.total_bytes -= record.nbytes
+
+    def _enforce_limits(self) -> None:
+        # Records are kept in access order, so expired ones collect at the front
+        now = time.time()
+        while self._records:
+            oldest_id, oldest = next(iter(self._records.items()))
+            if now - oldest.last_accessed <= self.idle_ttl:
+                break
+            self._remove(oldest_id)
+            self.expirations += 1
+
+        while len(self._records) > 1 and (len(self._records) > self.max_sessions or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self._records)))
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self._enforce_limits()
+        return {
+            "backend": "memory",
+            "sessions": len(self._records),
+            "bytes": self.total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class SQLiteSessionStore(SessionStore):
+    """Durable store shared by every worker process on the host (SQLite in WAL mode).
+
+    update() runs read-modify-write inside BEGIN IMMEDIATE, so concurrent writers from
+    different processes are serialized per database and never lose each other's changes.
+    Writes use their own connection, which waits up to busy_timeout_ms for the lock and is meant
+    for a single writer thread; reads never wait, as WAL readers are not blocked by writers.
+    """
+
+    blocking = True
+
+    # last_accessed is only rewritten on reads when it is older than this, to keep reads cheap
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, path: str = "sessions.db", idle_ttl: float = 6 * 3600.0, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.expirations = 0
+        self._writer = self._connect(busy_timeout_ms)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, last_accessed REAL NOT NULL)"
+        )
+        self._writer.execute("CREATE INDEX IF NOT EXISTS sessions_last_accessed ON sessions (last_accessed)")
+        self._create_byte_counter()
+        self._reader = self._connect(0)
+
+    def _connect(self, busy_timeout_ms: int) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=busy_timeout_ms / 1000)
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        # The row INSERT OR REPLACE removes only fires the delete trigger with this on
+        db.execute("PRAGMA recursive_triggers=ON")
+        return db
+
+    def _create_byte_counter(self) -> None:
+        """Keep the payload size in session_meta, updated by triggers in the same transaction as each write.
+
+        stats() then reads one row instead of summing every session; the sum is taken once, when
+        an existing database first gets the counter.
+        """
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            self._writer.execute("CREATE TABLE IF NOT EXISTS session_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._writer.execute(
+                "INSERT OR IGNORE INTO session_meta (key, value) SELECT 'bytes', COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+            )
+            self._writer.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessions_bytes_insert AFTER INSERT ON sessions BEGIN "
+                "UPDATE session_meta SET value = value + LENGTH(NEW.data) WHERE key = 'bytes'; END"
+            )
+            self._writer.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessions_bytes_update AFTER UPDATE OF data ON sessions BEGIN "
+                "UPDATE session_meta SET value = value + LENGTH(NEW.data) - LENGTH(OLD.data) WHERE key = 'bytes'; END"
+            )
+            self._writer.execute(
+                "CREATE TRIGGER IF NOT EXISTS sessions_bytes_delete AFTER DELETE ON sessions BEGIN "
+                "UPDATE session_meta SET value = value - LENGTH(OLD.data) WHERE key = 'bytes'; END"
+            )
+            self._writer.execute("COMMIT")
+        except Exception:
+            self._writer.execute("ROLLBACK")
+            raise
+
+    @classmethod
+    def from_env(cls) -> "SQLiteSessionStore":
+        return cls(
+            path=os.getenv("SESSION_DB_PATH", "sessions.db"),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", str(6 * 3600)))
+        )
+
+    def _load(self, row) -> SessionRecord:
+        data, last_accessed = row
+        record = SessionRecord.from_dict(json.loads(data))
+        record.last_accessed = last_accessed
+        return record
+
+    def _save(self, record: SessionRecord) -> None:
+        self._writer.execute(
+            "INSERT OR REPLACE INTO sessions (id, data, updated_at, last_accessed) VALUES (?, ?, ?, ?)",
+            (record.id, json.dumps(record.to_dict()), record.updated_at, record.last_accessed)
+        )
+
+    def _try_write(self, sql: str, params: tuple) -> None:
+        # Bookkeeping done on reads is skipped rather than waited for while another process writes
+        try:
+            self._reader.execute(sql, params)
+        except sqlite3.OperationalError:
+            pass
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        row = self._reader.execute("SELECT data, last_accessed FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] > self.idle_ttl:
+            # Expired rows are purged by the next put() even if this delete is skipped
+            self._try_write("DELETE FROM sessions WHERE id = ? AND last_accessed < ?", (session_id, now - self.idle_ttl))
+            self.expirations += 1
+            return None
+
+        record = self._load(row)
+        if now - record.last_accessed > self.TOUCH_INTERVAL:
+            record.last_accessed = now
+            self._try_write("UPDATE sessions SET last_accessed = ? WHERE id = ?", (now, session_id))
+        return record
+
+    def put(self, record: SessionRecord) -> None:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            self._save(record)
+            cursor = self._writer.execute("DELETE FROM sessions WHERE last_accessed < ?", (time.time() - self.idle_ttl,))
+            self.expirations += max(cursor.rowcount, 0)
+            self._writer.execute("COMMIT")
+        except Exception:
+            self._writer.execute("ROLLBACK")
+            raise
+
+    def update(self, session_id: str, mutate: Callable[[SessionRecord], T]) -> Optional[T]:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._writer.execute("SELECT data, last_accessed FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None or time.time() - row[1] > self.idle_ttl:
+                self._writer.execute("ROLLBACK")
+                return None
+
+            record = self._load(row)
+            result = mutate(record)
+            record.last_accessed = time.time()
+            self._save(record)
+            self._writer.execute("COMMIT")
+            return result
+        except Exception:
+            self._writer.execute("ROLLBACK")
+            raise
+
+    def delete(self, session_id: str) -> bool:
+        cursor = self._writer.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        return self._reader.execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_accessed >= ?", (time.time() - self.idle_ttl,)
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": self.count(),
+            "bytes": self._reader.execute("SELECT value FROM session_meta WHERE key = 'bytes'").fetchone()[0],
+            "expirations": self.expirations
+        }
+
+def create_session_store() -> SessionStore:
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore.from_env()
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    return InMemorySessionStore.from_env()
@@ -0,0 +1,106 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from core.ai.code_generator import CodeGenerator
+from core.ai.admission import admission_scope
+from models.session import SessionRecord
+
+@dataclass
+class _ParkedComponent:
+    component_name: str
+    task: asyncio.Task
+    idle_handle: asyncio.TimerHandle
+
+class SpeculativeBuilds:
+    """Pre-generates the next component of a session in the background and parks the result.
+
+    Parked work lives here, keyed by session id, rather than on the session record itself so
+    sessions stay plain data.
+    """
+
+    def __init__(self, code_generator: CodeGenerator, idle_timeout: float = 120.0):
+        self.code_generator = code_generator
+        self.idle_timeout = idle_timeout
+        self._parked: Dict[str, _ParkedComponent] = {}
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.expired = 0
+
+    def schedule(self, session_id: str, session: SessionRecord, component_name: str, include_explanation: bool = True) -> None:
+        parked = self._parked.get(session_id)
+        if parked is not None and parked.component_name == component_name:
+            return
+        self.discard(session_id)
+
+        loop = asyncio.get_running_loop()
+        # Speculative calls only use spare LLM capacity; they never queue ahead of real requests
+        with admission_scope(key=session_id, background=True):
+            task = loop.create_task(self.code_generator.generate_component(
+                session=session,
+                component_name=component_name,
+                include_explanation=include_explanation
+            ))
+        # Retrieve the outcome so abandoned speculative work never logs "exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        idle_handle = loop.call_later(self.idle_timeout, self._expire, session_id, task)
+        self._parked[session_id] = _ParkedComponent(component_name, task, idle_handle)
+        self.started += 1
+
+    async def claim(self, session_id: str, component_name: str) -> Optional[Dict[str, Any]]:
+        """Return the parked result for this component, waiting for it if still in flight."""
+        parked = self._parked.pop(session_id, None)
+        if parked is None:
+            return None
+
+        parked.idle_handle.cancel()
+        if parked.component_name != component_name:
+            if not parked.task.done():
+                parked.task.cancel()
+                self.cancelled += 1
+            self.misses += 1
+            return None
+
+        try:
+            result = await parked.task
+        except asyncio.CancelledError:
+            if parked.task.cancelled():
+                self.misses += 1
+                return None
+            raise
+        except Exception as e:
+            print(f"Speculative generation of {component_name} failed: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def discard(self, session_id: str) -> None:
+        parked = self._parked.pop(session_id, None)
+        if parked is None:
+            return
+        parked.idle_handle.cancel()
+        if not parked.task.done():
+            parked.task.cancel()
+            self.cancelled += 1
+
+    def _expire(self, session_id: str, task: asyncio.Task) -> None:
+        parked = self._parked.get(session_id)
+        if parked is None or parked.task is not task:
+            return
+        del self._parked[session_id]
+        if not task.done():
+            task.cancel()
+        self.expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "parked": len(self._parked),
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cancelled": self.cancelled,
+            "expired": self.expired
+        }
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import glob
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from models.project import ProjectTemplate
+from core.utils.http_cache import strong_etag
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "templates")
+
+@dataclass
+class TemplateSnapshot:
+    templates: Dict[str, ProjectTemplate]
+    body: bytes
+    etag: str
+    signature: Tuple[Tuple[str, float, int], ...]
+
+class TemplateRegistry:
+    """Project templates loaded from JSON files, with the /templates response serialized once per load."""
+
+    def __init__(self, directory: str = DEFAULT_TEMPLATE_DIR, reload_interval: float = 0.0):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._checked_at = time.monotonic()
+        self._snapshot = self._load(self._signature())
+
+    @classmethod
+    def from_env(cls) -> "TemplateRegistry":
+        return cls(
+            directory=os.getenv("TEMPLATE_DIR", DEFAULT_TEMPLATE_DIR),
+            reload_interval=float(os.getenv("TEMPLATE_RELOAD_INTERVAL", "0"))
+        )
+
+    @property
+    def cache_control(self) -> str:
+        # With hot reload on, clients revalidate with the ETag instead of trusting a max-age
+        return "no-cache" if self.reload_interval > 0 else "public, max-age=300"
+
+    def _signature(self) -> Tuple[Tuple[str, float, int], ...]:
+        entries = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json"))):
+            stat = os.stat(path)
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return tuple(entries)
+
+    def _load(self, signature: Tuple[Tuple[str, float, int], ...]) -> TemplateSnapshot:
+        templates = []
+        for path, _mtime, _size in signature:
+            with open(path, encoding="utf-8") as template_file:
+                templates.append(ProjectTemplate(**json.load(template_file)))
+        templates.sort(key=lambda template: (template.order, template.id))
+
+        body = json.dumps(
+            {"templates": [template.model_dump(exclude={"order"}) for template in templates]},
+            separators=(",", ":")
+        ).encode("utf-8")
+        return TemplateSnapshot(
+            templates={template.id: template for template in templates},
+            body=body,
+            etag=strong_etag(body),
+            signature=signature
+        )
+
+    def snapshot(self) -> TemplateSnapshot:
+        if self.reload_interval > 0:
+            now = time.monotonic()
+            if now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                self._reload_if_changed()
+        return self._snapshot
+
+    def _reload_if_changed(self) -> None:
+        try:
+            signature = self._signature()
+            if signature != self._snapshot.signature:
+                self._snapshot = self._load(signature)
+                self.reloads += 1
+        except Exception as e:
+            # Keep serving the last good set while a file is half-written or invalid
+            print(f"Template reload failed: {e}")
+
+    def get(self, template_id: str) -> Optional[ProjectTemplate]:
+        return self.snapshot().templates.get(template_id)
+
+    def list(self) -> List[ProjectTemplate]:
+        return list(self.snapshot().templates.values())
@@ -0,0 +1,51 @@
+import gzip
+import hashlib
+from typing import Optional, Tuple
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def weak_etag(*parts: object) -> str:
+    """ETag for a representation identified by its parts (e.g. a revision), not its exact bytes."""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def gzip_body(body: bytes, accept_encoding: Optional[str], min_size: int = 1024) -> Tuple[bytes, Optional[str]]:
+    """Gzip body when the client accepts it and it is large enough to be worth it."""
+    if len(body) < min_size or not accepts_gzip(accept_encoding):
+        return body, None
+    return gzip.compress(body, compresslevel=5), "gzip"
@@ -0,0 +1,224 @@
+import io
+import os
+import sys
+import time
+import hmac
+import random
+import marshal
+import asyncio
+import pstats
+import cProfile
+import threading
+import traceback
+from collections import Counter as Tally, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from core.utils.metrics import Counter, Histogram
+
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "How late the event loop ran a timer it was asked to run", buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+EVENT_LOOP_STALLS = Counter("event_loop_stalls_total", "Times a callback blocked the event loop beyond the lag threshold")
+REQUEST_PROFILES = Counter("request_profiles_total", "Requests profiled by sampling")
+
+PROFILE_FORMATS = ("pstats", "text", "collapsed")
+
+class ProfilerBusy(Exception):
+    """Another cProfile session (a window or a sampled request) is running; only one can be active."""
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _stats_text(profile: cProfile.Profile, limit: int) -> Tuple[str, float]:
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue(), stats.total_tt
+
+def collapse_stacks(thread_id: int, seconds: float, interval: float) -> str:
+    """Sample one thread's stack every interval for seconds, as flamegraph.pl / speedscope collapsed stacks."""
+    stacks: Tally = Tally()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        if names:
+            stacks[";".join(reversed(names))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+class LoopLagMonitor:
+    """Measures event-loop lag and reports whatever blocked the loop for longer than threshold.
+
+    A timer task on the loop notes when it last ran; a watchdog thread that sees it overdue
+    captures the loop thread's stack and the running task, so the log names the culprit while it
+    is still blocking, not only after it let go.
+    """
+
+    def __init__(self, threshold: float = 0.25, keep: int = 50):
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.max_lag = 0.0
+        self._beat = time.perf_counter()
+        self._culprit: Optional[Dict[str, Any]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(now - expected, 0.0)
+            self._beat = now
+            EVENT_LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self._report(lag)
+
+    def _report(self, lag: float) -> None:
+        culprit, self._culprit = self._culprit, None
+        stall = {"at": time.time(), "ms": round(lag * 1000, 1), "task": None, "stack": None}
+        if culprit is not None:
+            stall.update(culprit)
+        self.stalls.append(stall)
+        EVENT_LOOP_STALLS.inc()
+        print(f"Event loop blocked for {stall['ms']:.0f} ms by {stall['task'] or 'a callback'}" + (f":\n{stall['stack']}" if stall["stack"] else ""))
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._beat
+            if beat == reported_beat or time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            # The loop is stuck right now: whatever is on its stack is what blocks it
+            reported_beat = beat
+            frame = sys._current_frames().get(self._thread_id)
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+            self._culprit = {
+                "task": repr(task.get_coro()) if task is not None else None,
+                "stack": "".join(traceback.format_stack(frame, limit=12)) if frame is not None else None
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls": len(self.stalls)
+        }
+
+class Profiler:
+    """Sampled per-request cProfile runs, admin-triggered profile windows and the loop lag monitor.
+
+    cProfile hooks the whole event-loop thread, so a request's profile also shows whatever other
+    requests ran while it was in flight; its profiled_seconds against seconds separates time spent
+    executing on the loop from time spent waiting (LLM calls, worker threads). Only one cProfile
+    session runs at a time, and requests are not sampled while a window is open.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, keep: int = 50, top: int = 30, max_window: float = 60.0, admin_token: Optional[str] = None, loop_monitor: Optional[LoopLagMonitor] = None):
+        self.sample_rate = sample_rate
+        self.top = top
+        self.max_window = max_window
+        self.admin_token = admin_token
+        self.loop_monitor = loop_monitor
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._slot = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        lag_threshold = float(os.getenv("LOOP_LAG_THRESHOLD", "0"))
+        return cls(
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            keep=int(os.getenv("PROFILE_KEEP", "50")),
+            max_window=float(os.getenv("PROFILE_MAX_WINDOW", "60")),
+            admin_token=os.getenv("PROFILING_ADMIN_TOKEN") or None,
+            loop_monitor=LoopLagMonitor(lag_threshold) if lag_threshold > 0 else None
+        )
+
+    def start(self) -> None:
+        if self.loop_monitor is not None:
+            self.loop_monitor.start()
+
+    def stop(self) -> None:
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return self.admin_token is not None and token is not None and hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    def begin_request(self) -> Optional[cProfile.Profile]:
+        """A running profiler if this request was sampled, else None."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate or not self._slot.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def end_request(self, profile: cProfile.Profile, method: str, route: str, status: int, seconds: float) -> None:
+        profile.disable()
+        self._slot.release()
+        text, profiled = _stats_text(profile, self.top)
+        REQUEST_PROFILES.inc()
+        self.samples.append({
+            "at": time.time(),
+            "method": method,
+            "route": route,
+            "status": status,
+            "seconds": round(seconds, 4),
+            "profiled_seconds": round(profiled, 4),
+            "stats": text
+        })
+
+    async def window(self, seconds: float, format: str = "pstats", interval: float = 0.005) -> bytes:
+        """Profile the event-loop thread for seconds.
+
+        pstats is a cProfile dump for pstats / snakeviz, text its top functions by cumulative time,
+        collapsed the loop thread's sampled stacks for flamegraph.pl or speedscope.
+        """
+        if format == "collapsed":
+            return (await asyncio.to_thread(collapse_stacks, threading.get_ident(), seconds, interval)).encode("utf-8")
+
+        if not self._slot.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being captured")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            self._slot.release()
+
+        if format == "text":
+            return _stats_text(profile, 100)[0].encode("utf-8")
+        profile.create_stats()
+        return marshal.dumps(profile.stats)
+
+    def recent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return list(self.samples)[-limit:][::-1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "samples": len(self.samples),
+            "admin_enabled": self.admin_token is not None,
+            "loop_lag": self.loop_monitor.stats() if self.loop_monitor is not None else None
+        }
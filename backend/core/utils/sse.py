@@ -0,0 +1,21 @@
+import json
+import traceback
+from typing import Any, AsyncIterator, Tuple
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    try:
+        async for event, data in events:
+            yield format_sse(event, data)
+    except Exception as e:
+        print(f"Error in event stream: {traceback.format_exc()}")
+        payload = {"detail": str(e)}
+        # Overload rejections tell the client when to retry, as Retry-After would
+        if getattr(e, "retry_after", None) is not None:
+            payload["status"] = getattr(e, "status_code", None)
+            payload["retry_after"] = e.retry_after
+        yield format_sse("error", payload)
@@ -0,0 +1,52 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+class StartupReport:
+    """Wall-clock cost of each import, service init and warm-up step since the process began serving."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.ready_at: Optional[float] = None
+        self.steps: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, phase, time.perf_counter() - started, started)
+
+    def record(self, name: str, phase: str, seconds: float, started: Optional[float] = None) -> None:
+        with self._lock:
+            self.steps.append({
+                "name": name,
+                "phase": phase,
+                "ms": round(seconds * 1000, 2),
+                "at_ms": round(((started or time.perf_counter()) - self.started_at) * 1000, 2)
+            })
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "ready_ms": round((self.ready_at - self.started_at) * 1000, 2) if self.ready_at else None,
+            "steps": steps
+        }
+
+    def format(self) -> str:
+        report = self.as_dict()
+        lines = [f"{'phase':<8}{'step':<36}{'ms':>10}{'at ms':>10}"]
+        for step in report["steps"]:
+            lines.append(f"{step['phase']:<8}{step['name']:<36}{step['ms']:>10.1f}{step['at_ms']:>10.1f}")
+        if report["ready_ms"] is not None:
+            lines.append(f"ready after {report['ready_ms']:.1f} ms")
+        return "\n".join(lines)
+
+STARTUP = StartupReport()
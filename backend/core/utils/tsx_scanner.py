@@ -0,0 +1,286 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional
+
+class SecurityRule(NamedTuple):
+    pattern: str              # label reported in validation errors
+    identifier: str           # lower-cased identifier that triggers the rule
+    followed_by: Optional[str] = None
+    receiver: Optional[str] = None
+    allow_member: bool = True
+
+# Evaluated against identifiers in code and JSX attributes only, never inside strings or comments
+SECURITY_RULES = [
+    SecurityRule(r'eval\s*\(', "eval", followed_by="("),
+    # RegExp.prototype.exec is harmless; only a bare exec(...) call is flagged
+    SecurityRule(r'exec\s*\(', "exec", followed_by="(", allow_member=False),
+    SecurityRule(r'__import__\s*\(', "__import__", followed_by="("),
+    SecurityRule(r'document\.write\s*\(', "write", followed_by="(", receiver="document"),
+    SecurityRule(r'innerHTML\s*=', "innerhtml", followed_by="="),
+    SecurityRule(r'dangerouslySetInnerHTML', "dangerouslysetinnerhtml"),
+]
+_RULES_BY_IDENTIFIER: Dict[str, List[SecurityRule]] = {}
+for _rule in SECURITY_RULES:
+    _RULES_BY_IDENTIFIER.setdefault(_rule.identifier, []).append(_rule)
+
+_CODE_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<num>\d[\w.]*)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<backtick>`)
+  | (?P<arrow>=>)
+  | (?P<punct>.)
+""", re.VERBOSE | re.DOTALL)
+_REGEX_LITERAL = re.compile(r"/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_TEMPLATE_TEXT = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*", re.DOTALL)
+_JSX_START = re.compile(r"<(?:>|[A-Za-z_$][\w$.:\-]*)")
+_TS_GENERIC = re.compile(r"<\s*[A-Za-z_$][\w$]*\s*(?:,|extends\b)")
+_JSX_CLOSING = re.compile(r"</\s*[\w$.:\-]*\s*>?")
+_JSX_TAG_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<name>[A-Za-z_$][\w$.:\-]*)
+  | (?P<string>"[^"]*"?|'[^']*'?)
+  | (?P<self_close>/>)
+  | (?P<punct>.)
+""", re.VERBOSE | re.DOTALL)
+_JSX_TEXT = re.compile(r"[^<{]+")
+
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CLOSERS = {")": "(", "]": "[", "}": "{"}
+# After these keywords an expression starts, so "<" opens JSX and "/" opens a regex literal
+_EXPRESSION_KEYWORDS = frozenset([
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+    "void", "throw", "yield", "await", "instanceof", "default"
+])
+_TODO_MARKERS = ("TODO", "FIXME")
+
+# Frames on the scanner stack. Bracket frames use the opening character itself.
+_TEMPLATE = "`"
+_TEMPLATE_EXPR = "${"
+_JSX_TAG = "<tag"
+_JSX_CHILDREN = "<children"
+_JSX_EXPR = "jsx{"
+
+@dataclass
+class ScanResult:
+    balanced: bool = True
+    security_hits: List[str] = field(default_factory=list)
+    has_react_import: bool = False
+    has_default_export: bool = False
+    uses_class_attr: bool = False
+    uses_classname_attr: bool = False
+    has_todo: bool = False
+    line_count: int = 0
+
+def _has_todo(text: str) -> bool:
+    return any(marker in text for marker in _TODO_MARKERS)
+
+def _next_char(code: str, pos: int) -> str:
+    while pos < len(code) and code[pos].isspace():
+        pos += 1
+    return code[pos:pos + 2]
+
+def scan_tsx(code: str) -> ScanResult:
+    """Tokenize TSX once, checking bracket balance and all validation rules along the way.
+
+    Strings, template text, comments, regex literals and JSX text are skipped for bracket
+    and security purposes, so brackets or keywords inside them never produce false errors.
+    """
+    result = ScanResult(line_count=code.count("\n") + 1)
+    hits = set()
+    stack: List[str] = []
+    pos = 0
+    length = len(code)
+
+    # Whether the previous significant token lets an expression start here ("start", "punct", "kw")
+    # or ended a value ("value"), which decides how "<" and "/" are read.
+    prev = "start"
+    prev_ident = ""
+    ident_run: List[str] = []
+    in_import = False
+
+    while pos < length:
+        frame = stack[-1] if stack else None
+
+        if frame == _TEMPLATE:
+            match = _TEMPLATE_TEXT.match(code, pos)
+            text = match.group()
+            if not result.has_todo and _has_todo(text):
+                result.has_todo = True
+            pos = match.end()
+            if pos >= length:
+                break
+            if code[pos] == "`":
+                stack.pop()
+                pos += 1
+                prev = "value"
+            else:
+                stack.append(_TEMPLATE_EXPR)
+                pos += 2
+                prev = "punct"
+            continue
+
+        if frame == _JSX_CHILDREN:
+            match = _JSX_TEXT.match(code, pos)
+            if match:
+                if not result.has_todo and _has_todo(match.group()):
+                    result.has_todo = True
+                pos = match.end()
+                continue
+            if code[pos] == "{":
+                stack.append(_JSX_EXPR)
+                pos += 1
+                prev = "punct"
+                continue
+            closing = _JSX_CLOSING.match(code, pos)
+            if closing:
+                stack.pop()
+                pos = closing.end()
+                prev = "value"
+                continue
+            stack.append(_JSX_TAG)
+            pos += 1
+            continue
+
+        if frame == _JSX_TAG:
+            match = _JSX_TAG_TOKEN.match(code, pos)
+            pos = match.end()
+            kind = match.lastgroup
+            if kind == "name":
+                name = match.group()
+                lowered = name.lower()
+                if lowered == "class" and _next_char(code, pos)[:1] == "=":
+                    result.uses_class_attr = True
+                elif name == "className" and _next_char(code, pos)[:1] == "=":
+                    result.uses_classname_attr = True
+                for rule in _RULES_BY_IDENTIFIER.get(lowered, ()):
+                    if rule.followed_by is None or _next_char(code, pos)[:1] == rule.followed_by:
+                        hits.add(rule.pattern)
+            elif kind == "string":
+                if not result.has_todo and _has_todo(match.group()):
+                    result.has_todo = True
+            elif kind == "self_close":
+                stack.pop()
+                prev = "value"
+            elif kind == "punct":
+                char = match.group()
+                if char == ">":
+                    stack[-1] = _JSX_CHILDREN
+                elif char == "{":
+                    stack.append(_JSX_EXPR)
+                    prev = "punct"
+            continue
+
+        # Plain code: top level, inside brackets, ${...} or a JSX {...} expression
+        match = _CODE_TOKEN.match(code, pos)
+        kind = match.lastgroup
+        token = match.group()
+
+        if kind == "ws":
+            pos = match.end()
+            continue
+
+        if kind in ("line_comment", "block_comment"):
+            if not result.has_todo and _has_todo(token):
+                result.has_todo = True
+            pos = match.end()
+            continue
+
+        if kind == "ident":
+            pos = match.end()
+            lowered = token.lower()
+            is_member = prev == "punct_dot"
+            for rule in _RULES_BY_IDENTIFIER.get(lowered, ()):
+                if rule.followed_by is not None and _next_char(code, pos)[:len(rule.followed_by)] != rule.followed_by:
+                    continue
+                if rule.followed_by == "=" and _next_char(code, pos)[:2] in ("==", "=>"):
+                    continue
+                if is_member and not rule.allow_member:
+                    continue
+                if rule.receiver is not None and not (is_member and prev_ident == rule.receiver):
+                    continue
+                hits.add(rule.pattern)
+
+            if token == "import" and not is_member:
+                in_import = True
+            elif in_import and token == "React":
+                result.has_react_import = True
+            elif token == "from":
+                in_import = False
+
+            ident_run.append(token)
+            if len(ident_run) >= 4 and ident_run[-4:-1] == ["export", "default", "function"]:
+                result.has_default_export = True
+
+            prev_ident = token
+            prev = "kw" if token in _EXPRESSION_KEYWORDS else "value"
+            continue
+
+        ident_run = []
+        if token != ".":
+            prev_ident = ""
+
+        if kind in ("num", "string"):
+            if kind == "string" and not result.has_todo and _has_todo(token):
+                result.has_todo = True
+            pos = match.end()
+            prev = "value"
+            continue
+
+        if kind == "backtick":
+            stack.append(_TEMPLATE)
+            pos += 1
+            continue
+
+        if kind == "arrow":
+            pos = match.end()
+            prev = "punct"
+            continue
+
+        char = token
+        if char == "<" and prev != "value" and _JSX_START.match(code, pos) and not _TS_GENERIC.match(code, pos):
+            stack.append(_JSX_TAG)
+            pos += 1
+            continue
+
+        if char == "/" and prev != "value":
+            regex = _REGEX_LITERAL.match(code, pos)
+            if regex:
+                pos = regex.end()
+                prev = "value"
+                continue
+
+        pos += 1
+        if char in _OPENERS:
+            stack.append(char)
+            prev = "punct"
+        elif char in _CLOSERS:
+            opener = "{" if char == "}" else _CLOSERS[char]
+            top = stack[-1] if stack else None
+            if char == "}" and top == _TEMPLATE_EXPR:
+                stack.pop()
+            elif char == "}" and top == _JSX_EXPR:
+                stack.pop()
+            elif top == opener:
+                stack.pop()
+            else:
+                result.balanced = False
+            prev = "value" if char in ")]" else "punct"
+        elif char == ".":
+            prev = "punct_dot"
+            continue
+        elif char == ";":
+            in_import = False
+            prev = "punct"
+        else:
+            prev = "punct"
+
+    # Unclosed template text or JSX tags only matter if they leave code brackets open beneath them
+    if any(frame in _OPENERS or frame in (_TEMPLATE_EXPR, _JSX_EXPR) for frame in stack):
+        result.balanced = False
+
+    result.security_hits = [rule.pattern for rule in SECURITY_RULES if rule.pattern in hits]
+    return result
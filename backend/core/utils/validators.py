@@ -1,17 +1,21 @@
 import re
-from typing import List, Dict, Any
+import hashlib
+from typing import List, Dict, Any, Tuple
 from models.project import ValidationResult
+from core.utils.tsx_scanner import scan_tsx, SECURITY_RULES
+from core.utils.cache import LRUCache
+from core.utils.metrics import Counter
+
+VALIDATIONS = Counter("component_validations_total", "Generated components validated, by initial result", ["result"])
+AUTO_FIXES = Counter("component_auto_fixes_total", "Auto-fix runs on invalid components, by final outcome", ["outcome"])
 
 class CodeValidator:
-    def __init__(self):
-        self.security_patterns = [
-            r'eval\s*\(',
-            r'exec\s*\(',
-            r'__import__\s*\(',
-            r'document\.write\s*\(',
-            r'innerHTML\s*=',
-            r'dangerouslySetInnerHTML'
-        ]
+    def __init__(self, cache_size: int = 1024):
+        self._cache = LRUCache(max_entries=cache_size)
+        self.fix_runs = 0
+        self.fix_iterations = 0
+        self.fixed_to_valid = 0
+        self.security_patterns = [rule.pattern for rule in SECURITY_RULES]
         
         self.react_patterns = {
             'component_export': r'export\s+default\s+function\s+\w+',
@@ -20,37 +24,80 @@ class CodeValidator:
         }
     
     def validate_component_code(self, code: str) -> ValidationResult:
+        """Validate code, reusing the result for code seen before (keyed by content hash)."""
+        key = hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+        result = self._cache.get(key)
+        if result is None:
+            result = self._validate(code)
+            self._cache.set(key, result)
+        return result.model_copy(deep=True)
+    
+    def validate_and_fix(self, code: str, max_iterations: int = 3) -> Tuple[str, ValidationResult]:
+        """Auto-fix invalid code and re-validate until it is valid or fixing stops changing it.
+
+        The returned result always describes the returned code.
+        """
+        result = self.validate_component_code(code)
+        if result.is_valid:
+            VALIDATIONS.labels(result="valid").inc()
+            return code, result
+        
+        VALIDATIONS.labels(result="invalid").inc()
+        self.fix_runs += 1
+        for _ in range(max_iterations):
+            fixed = self.auto_fix_code(code)
+            if fixed == code:
+                break
+            self.fix_iterations += 1
+            code = fixed
+            result = self.validate_component_code(code)
+            if result.is_valid:
+                self.fixed_to_valid += 1
+                break
+        
+        AUTO_FIXES.labels(outcome="fixed" if result.is_valid else "still_invalid").inc()
+        return code, result
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache": self._cache.stats(),
+            "fix_runs": self.fix_runs,
+            "fix_iterations": self.fix_iterations,
+            "fixed_to_valid": self.fixed_to_valid
+        }
+    
+    def _validate(self, code: str) -> ValidationResult:
         errors = []
         warnings = []
         notes = []
         
+        # Single tokenizing pass over the code; strings, comments and JSX text are skipped
+        scan = scan_tsx(code)
+        
         # Security checks
-        for pattern in self.security_patterns:
-            if re.search(pattern, code, re.IGNORECASE):
-                errors.append(f"Potentially unsafe pattern detected: {pattern}")
+        for pattern in scan.security_hits:
+            errors.append(f"Potentially unsafe pattern detected: {pattern}")
         
         # React-specific validations
-        if not re.search(self.react_patterns['react_import'], code):
+        if not scan.has_react_import:
             warnings.append("React import not found")
         
-        if not re.search(self.react_patterns['component_export'], code):
+        if not scan.has_default_export:
             warnings.append("Default export function not found")
         
         # Basic syntax check
-        try:
-            if not self._check_balanced_brackets(code):
-                errors.append("Unbalanced brackets or parentheses")
-        except Exception as e:
-            warnings.append(f"Syntax validation warning: {str(e)}")
+        if not scan.balanced:
+            errors.append("Unbalanced brackets or parentheses")
         
         # Check for common issues
-        if 'className=' not in code and 'class=' in code:
+        # Only flagged in code that never uses className, as before the scanner
+        if scan.uses_class_attr and not scan.uses_classname_attr:
             warnings.append("Use 'className' instead of 'class' in JSX")
         
-        if len(code.split('\n')) > 200:
+        if scan.line_count > 200:
             notes.append("Component is quite large - consider breaking it down")
         
-        if 'TODO' in code or 'FIXME' in code:
+        if scan.has_todo:
             notes.append("Contains TODO/FIXME comments")
         
         is_valid = len(errors) == 0
@@ -62,21 +109,6 @@ class CodeValidator:
             notes=notes
         )
     
-    def _check_balanced_brackets(self, code: str) -> bool:
-        stack = []
-        pairs = {'(': ')', '[': ']', '{': '}'}
-        
-        for char in code:
-            if char in pairs:
-                stack.append(char)
-            elif char in pairs.values():
-                if not stack:
-                    return False
-                if pairs[stack.pop()] != char:
-                    return False
-        
-        return len(stack) == 0
-    
     def auto_fix_code(self, code: str) -> str:
         # Fix class -> className
         code = re.sub(r'\bclass=', 'className=', code)
@@ -1,30 +1,31 @@
-
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
 import os, uuid, time, json
-from dotenv import load_dotenv
+import asyncio
 import traceback
+from core.utils.startup import STARTUP
 
+with STARTUP.step("fastapi", "import"):
+    from fastapi import FastAPI, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import HTMLResponse, StreamingResponse, Response, JSONResponse
+    from pydantic import BaseModel
+    from typing import Optional, List, Dict, Any
+    from dotenv import load_dotenv
 
-from core.ai.prompt_engine import PromptEngine
-from core.ai.code_generator import CodeGenerator
-from core.services.project_service import ProjectService
-from core.utils.validators import CodeValidator
-from models.requests import StartProjectReq, GenerateStepReq, GeneratePreviewReq
-from models.responses import StartProjectResp, GenerateStepResp, GeneratePreviewResp
-
-try:
-    import openai
-except Exception:
-    openai = None
+with STARTUP.step("app modules", "import"):
+    from core.services.container import ServiceContainer
+    from core.ai.admission import AdmissionRejected, admission_scope, current_admission_key
+    from core.services.project_export import iter_project_zip, export_filename
+    from core.utils.sse import sse_stream
+    from core.utils.http_cache import etag_matches, gzip_body, weak_etag
+    from core.services.project_service import ComponentBusy, parse_session_fields
+    from core.services.job_queue import JobQueue
+    from core.utils.metrics import REGISTRY, CONTENT_TYPE_LATEST, Gauge, Histogram
+    from core.utils.profiling import PROFILE_FORMATS, ProfilerBusy
+    from models.requests import StartProjectReq, GenerateStepReq, GenerateAllReq, GeneratePreviewReq
+    from models.responses import StartProjectResp, GenerateStepResp, GenerateAllResp, GeneratePreviewResp, JobResp
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY and openai:
-    openai.api_key = OPENAI_API_KEY
 
 app = FastAPI(
     title="Lovable-mini (Beta) Backend",
@@ -40,11 +41,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-prompt_engine = PromptEngine()
-code_generator = CodeGenerator(openai_api_key=OPENAI_API_KEY)
-project_service = ProjectService()
-code_validator = CodeValidator()
+# Services are built on first use (or by the warm-up task), not at import time
+services = ServiceContainer(openai_api_key=OPENAI_API_KEY)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time until the response headers were sent", ["method", "route", "status"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+Gauge("sessions_active", "Sessions held by the session store").set_function(lambda: services.project_service.get_session_count())
+Gauge("session_store_bytes", "Approximate size of the stored sessions").set_function(lambda: services.project_service.get_store_stats()["bytes"])
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    HTTP_IN_FLIGHT.inc()
+    # Debug requests are never sampled, so a sampled request cannot hold up the window it asked for
+    profile = services.profiler.begin_request() if not request.url.path.startswith("/debug/") else None
+    try:
+        # LLM calls without a session (plans, previews) are charged to the client for fairness
+        with admission_scope(key=f"client:{request.client.host}" if request.client else None):
+            response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template so /session/{session_id} stays a single series
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        elapsed = time.perf_counter() - started
+        HTTP_REQUEST_SECONDS.labels(method=request.method, route=route_path, status=str(status)).observe(elapsed)
+        if profile is not None:
+            services.profiler.end_request(profile, request.method, route_path, status, elapsed)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.on_event("startup")
+async def startup():
+    STARTUP.mark_ready()
+    services.profiler.start()
+    # Picks up jobs left queued (or running) by the previous process; unconfigured, the queue
+    # (and its database) is only opened by the first /jobs request
+    if JobQueue.configured():
+        await services.job_queue.start()
+    if os.getenv("WARMUP", "false").lower() in ("1", "true", "yes"):
+        # Builds services in a worker thread; a request only waits on it for a service it is building right then
+        app.state.warmup_task = asyncio.create_task(warm_up())
+    if os.getenv("STARTUP_REPORT", "false").lower() in ("1", "true", "yes"):
+        print(STARTUP.format())
+
+async def warm_up():
+    try:
+        with STARTUP.step("total", "warmup"):
+            await asyncio.to_thread(services.warm_up)
+    except Exception:
+        print(f"Warm-up failed: {traceback.format_exc()}")
+    if os.getenv("STARTUP_REPORT", "false").lower() in ("1", "true", "yes"):
+        print(STARTUP.format())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if services.is_initialized("profiler"):
+        services.profiler.stop()
+    if services.is_initialized("job_queue"):
+        await services.job_queue.stop()
+    if services.is_initialized("code_generator"):
+        await services.code_generator.aclose()
 
 @app.get("/")
 async def root():
@@ -64,8 +132,61 @@ async def root():
 async def health():
     return {
         "status": "healthy", 
-        "sessions": project_service.get_session_count(),
-        "ai_available": bool(OPENAI_API_KEY and openai)
+        "sessions": services.project_service.get_session_count(),
+        "session_store": services.project_service.get_store_stats(),
+        "ai_available": services.code_generator.has_openai,
+        "plan_cache": services.plan_cache.stats(),
+        "preview_store": services.preview_store.stats(),
+        "speculation": services.generation_service.speculation.stats(),
+        "build_channels": services.build_hub.stats(),
+        "jobs": services.job_queue.stats() if services.is_initialized("job_queue") else None,
+        "profiling": services.profiler.stats(),
+        "admission": services.admission.stats(),
+        "llm_resilience": services.code_generator.resilience.stats() if services.code_generator.resilience else None,
+        "llm_coalescing": services.code_generator.in_flight.stats() if services.code_generator.in_flight else None,
+        "validation": services.code_validator.stats(),
+        "component_library": services.code_generator.library.stats() if services.code_generator.library else None,
+        "prompt_context": services.code_generator.prompt_engine.context_builder.stats(),
+        "services": services.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+def require_admin(token: Optional[str]) -> None:
+    # Without PROFILING_ADMIN_TOKEN the debug surface does not exist
+    if services.profiler.admin_token is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not services.profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/debug/profile")
+async def profile_window(seconds: float = 10, format: str = "pstats", x_admin_token: Optional[str] = Header(None)):
+    """Profile the event loop for the next N seconds: cProfile dump, top functions, or collapsed stacks"""
+    require_admin(x_admin_token)
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}")
+    if not 0 < seconds <= services.profiler.max_window:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {services.profiler.max_window:g}")
+    
+    try:
+        body = await services.profiler.window(seconds, format)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if format == "pstats":
+        return Response(body, media_type="application/octet-stream", headers={"Content-Disposition": 'attachment; filename="profile.pstats"'})
+    return Response(body, media_type="text/plain; charset=utf-8")
+
+@app.get("/debug/profiles")
+async def recent_profiles(limit: int = 10, x_admin_token: Optional[str] = Header(None)):
+    """Most recent sampled request profiles and event-loop stalls"""
+    require_admin(x_admin_token)
+    loop_monitor = services.profiler.loop_monitor
+    return {
+        "requests": services.profiler.recent(limit),
+        "loop_stalls": list(loop_monitor.stalls)[-limit:][::-1] if loop_monitor is not None else []
     }
 
 @app.post("/start-project", response_model=StartProjectResp)
@@ -75,22 +196,18 @@ async def start_project(req: StartProjectReq):
         if not req.idea.strip():
             raise HTTPException(status_code=400, detail="Project idea cannot be empty")
         
-        #  project plan
-        plan = await code_generator.generate_project_plan(
+        # Plan the project and create its session
+        project = await services.generation_service.start_project(
             idea=req.idea,
             preferred_stack=req.preferred_stack,
-            complexity=req.complexity or "medium"
-        )
-        
-        # Create session 
-        session_id = project_service.create_session(
-            idea=req.idea,
-            plan=plan,
-            user_preferences={"stack": req.preferred_stack, "complexity": req.complexity}
+            complexity=req.complexity or "medium",
+            speculative=req.speculative
         )
+
+        return StartProjectResp(**project)
         
-        return StartProjectResp(session_id=session_id, plan=plan)
-        
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"Error in start_project: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to start project: {str(e)}")
@@ -99,154 +216,252 @@ async def start_project(req: StartProjectReq):
 async def generate_step(req: GenerateStepReq):
     """Enhanced component generation with validation"""
     try:
-        session = project_service.get_session(req.session_id)
+        session = services.project_service.get_session(req.session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
         #  to generate
-        component_name = req.component or project_service.get_next_component(req.session_id)
+        component_name = req.component or services.project_service.next_component(session)
         if not component_name:
             raise HTTPException(status_code=400, detail="No components remaining")
         
-        # Generate component with enhanced context
-        result = await code_generator.generate_component(
-            session=session,
+        # Generate, validate and record the component
+        step = await services.generation_service.generate_step(
+            session_id=req.session_id,
             component_name=component_name,
             include_explanation=req.include_explanation,
-            include_tests=req.include_tests or False
+            include_tests=req.include_tests or False,
+            speculative=req.speculative,
+            use_llm=req.use_llm or False,
+            session=session
         )
         
-        # Validate 
-        validation_result = code_validator.validate_component_code(result["code"])
-        if not validation_result.is_valid:
-            
-            result["code"] = code_validator.auto_fix_code(result["code"])
+        return GenerateStepResp(**step)
         
-        # Update session
-        project_service.add_generated_component(req.session_id, result)
-        remaining = project_service.get_remaining_components(req.session_id)
-        
-        return GenerateStepResp(
+    except AdmissionRejected:
+        raise
+    except ComponentBusy as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        print(f"Error in generate_step: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate component: {str(e)}")
+
+@app.post("/generate-step/stream")
+async def generate_step_stream(req: GenerateStepReq):
+    """Stream component tokens as server-sent events, then the validated result"""
+    session = services.project_service.get_session(req.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    component_name = req.component or services.project_service.next_component(session)
+    if not component_name:
+        raise HTTPException(status_code=400, detail="No components remaining")
+    
+    events = services.generation_service.stream_step(
+        session_id=req.session_id,
+        component_name=component_name,
+        include_explanation=req.include_explanation,
+        include_tests=req.include_tests or False,
+        speculative=req.speculative,
+        use_llm=req.use_llm or False,
+        session=session
+    )
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/generate-all", response_model=GenerateAllResp)
+async def generate_all(req: GenerateAllReq):
+    """Generate every remaining component of a session concurrently"""
+    session = services.project_service.get_session(req.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        batch = await services.generation_service.generate_all(
             session_id=req.session_id,
-            component_name=result["name"],
-            code=result["code"],
-            explanation=result.get("explanation"),
-            remaining=remaining,
-            validation_notes=validation_result.notes if validation_result.notes else None
+            max_concurrency=req.max_concurrency,
+            include_explanation=req.include_explanation,
+            include_tests=req.include_tests or False,
+            use_llm=req.use_llm or False
         )
         
+        return GenerateAllResp(**batch)
+        
+    except AdmissionRejected:
+        raise
     except Exception as e:
-        print(f"Error in generate_step: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate component: {str(e)}")
+        print(f"Error in generate_all: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate components: {str(e)}")
 
 @app.post("/generate-preview", response_model=GeneratePreviewResp)
 async def generate_preview(req: GeneratePreviewReq):
     """Generate live HTML preview of the application"""
     try:
-        # Generate preview 
-        preview_html = await code_generator.generate_preview_html(
+        # Served from the preview store when the same inputs were rendered before
+        preview = await services.generation_service.generate_preview(
             prompt=req.prompt,
             style_preference=req.style_preference or "modern"
         )
         
-        return GeneratePreviewResp(
-            preview_html=preview_html,
-            generated_at=time.time()
-        )
+        return GeneratePreviewResp(**preview)
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"Error in generate_preview: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to generate preview: {str(e)}")
 
+@app.post("/generate-preview/stream")
+async def generate_preview_stream(req: GeneratePreviewReq):
+    """Stream preview HTML as server-sent events"""
+    events = services.generation_service.stream_preview(
+        prompt=req.prompt,
+        style_preference=req.style_preference or "modern"
+    )
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def enqueue_job(kind: str, params: Dict[str, Any], response: Response) -> JobResp:
+    await services.job_queue.start()
+    # Jobs are charged to the submitting client for admission, as the inline requests are
+    job = await services.job_queue.submit(kind, params, client=current_admission_key())
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return JobResp(**job.to_dict())
+
+@app.post("/jobs/plan", response_model=JobResp, status_code=202)
+async def submit_plan_job(req: StartProjectReq, response: Response):
+    """Queue a /start-project run; poll GET /jobs/{id} for the session id and plan"""
+    if not req.idea.strip():
+        raise HTTPException(status_code=400, detail="Project idea cannot be empty")
+    return await enqueue_job("plan", req.model_dump(), response)
+
+@app.post("/jobs/component", response_model=JobResp, status_code=202)
+async def submit_component_job(req: GenerateStepReq, response: Response):
+    """Queue a /generate-step run"""
+    if not services.project_service.get_session(req.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return await enqueue_job("component", req.model_dump(), response)
+
+@app.post("/jobs/batch", response_model=JobResp, status_code=202)
+async def submit_batch_job(req: GenerateAllReq, response: Response):
+    """Queue a /generate-all run"""
+    if not services.project_service.get_session(req.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return await enqueue_job("batch", req.model_dump(), response)
+
+@app.post("/jobs/preview", response_model=JobResp, status_code=202)
+async def submit_preview_job(req: GeneratePreviewReq, response: Response):
+    """Queue a /generate-preview run"""
+    return await enqueue_job("preview", req.model_dump(), response)
+
+@app.get("/jobs/{job_id}", response_model=JobResp)
+async def get_job(job_id: str):
+    """Status of a queued job, with its result once it succeeded"""
+    job = services.job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResp(**job.to_dict())
+
+@app.get("/preview/{preview_hash}")
+async def get_preview(preview_hash: str, if_none_match: Optional[str] = Header(None)):
+    """Serve a stored preview page with a strong ETag"""
+    preview = services.preview_store.get(preview_hash)
+    if not preview:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    
+    headers = {"ETag": preview.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, preview.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=preview.body, media_type="text/html; charset=utf-8", headers=headers)
+
 @app.get("/session/{session_id}")
-async def get_session(session_id: str):
-    """Get detailed session information"""
-    session = project_service.get_session(session_id)
+async def get_session(
+    session_id: str,
+    since: Optional[int] = None,
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Get session details; ?since=<revision> returns only newer components, ?fields= projects the response"""
+    session = services.project_service.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return {
-        "session_id": session_id,
-        "idea": session["idea"],
-        "plan": session["plan"],
-        "remaining": session["remaining_components"],
-        "generated": session["generated"],
-        "progress": project_service.get_progress_stats(session_id)
-    }
+    try:
+        projection = parse_session_fields(fields) if fields is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The revision identifies the content, so unchanged polls are answered without building the body
+    headers = {"ETag": weak_etag(session_id, session.revision, since, fields), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    view = services.project_service.get_session_view(session, since=since, fields=projection)
+    body, encoding = gzip_body(json.dumps(view, separators=(",", ":")).encode("utf-8"), accept_encoding)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.websocket("/ws/session/{session_id}")
+async def session_build_channel(websocket: WebSocket, session_id: str):
+    """Build commands in, generation events out; every tab of the session shares one build"""
+    if not services.project_service.get_session(session_id):
+        await websocket.close(code=4404)
+        return
+    
+    await websocket.accept()
+    channel = services.build_hub.channel(session_id)
+    subscriber = channel.subscribe()
+    
+    async def forward() -> None:
+        while True:
+            await websocket.send_json(await subscriber.queue.get())
+    
+    writer = asyncio.create_task(forward())
+    try:
+        while True:
+            try:
+                command = await websocket.receive_json()
+            except ValueError:
+                command = None
+            reply = channel.handle(command)
+            if reply is not None:
+                subscriber.offer(reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        writer.cancel()
+        channel.unsubscribe(subscriber)
+
+@app.get("/session/{session_id}/export.zip")
+async def export_session(session_id: str):
+    """Download the generated project as a ZIP, streamed while it is compressed"""
+    session = services.project_service.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return StreamingResponse(
+        iter_project_zip(session),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(session)}"'}
+    )
 
 @app.get("/templates")
-async def get_templates():
+async def get_templates(if_none_match: Optional[str] = Header(None)):
     """Get available project templates with detailed AI-friendly descriptions"""
-    return {
-        "templates": [
-            {
-                "id": "portfolio",
-                "name": "Developer Portfolio",
-                "description": "Create a modern, professional portfolio website for a software developer. Include a hero section with name and title, an about section with skills and experience, a projects grid showcasing 3-4 coding projects with GitHub links, a skills section with programming languages and technologies, and a contact form. Use a clean, minimalist design with blue and gray color scheme. Make it fully responsive for mobile and desktop.",
-                "features": [
-                    "Hero section with developer name and animated typing effect",
-                    "About section with professional photo and bio",
-                    "Projects grid with hover effects and live demo links", 
-                    "Skills section with programming language icons",
-                    "Contact form with email integration",
-                    "Responsive navigation with smooth scrolling"
-                ],
-                "stack": "React + TypeScript + Tailwind CSS",
-                "sample_prompt": "Build a software developer portfolio website with sections for hero introduction, about me, projects showcase, technical skills, and contact form. Use modern design with blue accent colors and professional typography."
-            },
-            {
-                "id": "dashboard",
-                "name": "Admin Dashboard",
-                "description": "Create a comprehensive admin dashboard with sidebar navigation, data visualization charts, user management table, analytics widgets, and settings panel. Include mock data for sales, users, and analytics. Use a dark theme with purple and blue accents. Add interactive charts showing revenue, user growth, and performance metrics.",
-                "features": [
-                    "Sidebar navigation with icons and active states",
-                    "Overview dashboard with key metrics cards",
-                    "Interactive charts for sales and user data",
-                    "Data table with sorting and pagination", 
-                    "User profile management section",
-                    "Settings panel with theme toggles"
-                ],
-                "stack": "React + TypeScript + Tailwind + Recharts",
-                "sample_prompt": "Build an admin dashboard with sidebar navigation, analytics charts showing sales data, user management table, and overview cards. Use dark theme with purple accents and include mock data for demonstrations."
-            },
-            {
-                "id": "landing",
-                "name": "SaaS Landing Page", 
-                "description": "Create a high-converting SaaS landing page for a productivity app. Include hero section with compelling headline, features section with icons and benefits, pricing tiers with comparison table, testimonials carousel, FAQ accordion, and call-to-action buttons throughout. Use modern gradients and animations to make it engaging.",
-                "features": [
-                    "Hero section with animated gradient background",
-                    "Features showcase with icons and descriptions",
-                    "Pricing table with 3 tiers and popular badge",
-                    "Customer testimonials with photos and ratings",
-                    "FAQ section with expandable answers",
-                    "Call-to-action buttons with hover animations"
-                ],
-                "stack": "React + TypeScript + Tailwind CSS",
-                "sample_prompt": "Build a SaaS landing page for a productivity tool with hero section, features showcase, pricing plans, customer testimonials, and FAQ. Use modern gradients, animations, and compelling copy to drive conversions."
-            },
-            {
-                "id": "business", 
-                "name": "Business Website",
-                "description": "Create a professional business website for a consulting company. Include hero section with company mission, services offered with detailed descriptions, team member profiles with photos, client testimonials, company statistics, and contact information. Use corporate colors (navy blue and gold) with professional imagery.",
-                "features": [
-                    "Hero section with company value proposition",
-                    "Services grid with detailed descriptions",
-                    "Team profiles with photos and expertise",
-                    "Client testimonials and case studies",
-                    "Company statistics and achievements",
-                    "Multi-location contact information"
-                ],
-                "stack": "React + TypeScript + Tailwind CSS", 
-                "sample_prompt": "Build a professional consulting company website with hero section, services overview, team profiles, client testimonials, and contact details. Use corporate navy blue and gold colors with clean, trustworthy design."
-            }
-        ]
-    }
+    # Body and ETag are serialized once per template load
+    snapshot = services.template_registry.snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": services.template_registry.cache_control}
+    if etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 @app.post("/apply-template/{template_id}")
 async def apply_template(template_id: str, req: dict):
     """Apply a template to create a new project"""
     try:
-        template = prompt_engine.get_template(template_id)
+        template = services.prompt_engine.get_template(template_id)
         if not template:
             raise HTTPException(status_code=404, detail="Template not found")
         
@@ -254,19 +469,23 @@ async def apply_template(template_id: str, req: dict):
         customized_idea = template.customize(req.get("customizations", {}))
         
         # Create project from template
-        plan = await code_generator.generate_project_plan(
+        plan = await services.code_generator.generate_project_plan(
             idea=customized_idea,
             template_id=template_id
         )
         
-        session_id = project_service.create_session(
+        session_id = await services.project_service.create_session(
             idea=customized_idea,
             plan=plan,
+            user_preferences={"speculative": req.get("speculative")},
             template_id=template_id
         )
+        services.generation_service.speculate_next(session_id)
         
         return {"session_id": session_id, "plan": plan}
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"Error in apply_template: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to apply template: {str(e)}")
@@ -14,6 +14,8 @@ class ProjectTemplate(BaseModel):
     features: List[str]
     stack: str
     components: List[str]
+    sample_prompt: Optional[str] = None
+    order: int = 0
     
     def customize(self, customizations: Dict[str, Any]) -> str:
         base_idea = f"Create a {self.name.lower()}"
@@ -6,12 +6,22 @@ class StartProjectReq(BaseModel):
     preferred_stack: Optional[str] = None
     complexity: Optional[str] = "medium"  # simple, medium, complex
     template_id: Optional[str] = None
+    speculative: Optional[bool] = None  # pre-generate the next component in the background
 
 class GenerateStepReq(BaseModel):
     session_id: str
     component: Optional[str] = None
     include_explanation: Optional[bool] = True
     include_tests: Optional[bool] = False
+    speculative: Optional[bool] = None
+    use_llm: Optional[bool] = False  # skip the component library and always ask the model
+
+class GenerateAllReq(BaseModel):
+    session_id: str
+    max_concurrency: Optional[int] = None
+    include_explanation: Optional[bool] = True
+    include_tests: Optional[bool] = False
+    use_llm: Optional[bool] = False
 
 class GeneratePreviewReq(BaseModel):
     prompt: str
@@ -12,7 +12,29 @@ class GenerateStepResp(BaseModel):
     explanation: Optional[str] = None
     remaining: List[str]
     validation_notes: Optional[List[str]] = None
+    source: Optional[str] = None  # library, llm or fallback
+
+class GenerateAllResp(BaseModel):
+    session_id: str
+    components: List[GenerateStepResp]
+    fallbacks: List[str] = []
+    remaining: List[str]
+    elapsed_seconds: float
 
 class GeneratePreviewResp(BaseModel):
     preview_html: str
-    generated_at: float
\ No newline at end of file
+    generated_at: float
+    preview_hash: Optional[str] = None
+    preview_url: Optional[str] = None
+    source: Optional[str] = None  # llm or fallback
+
+class JobResp(BaseModel):
+    job_id: str
+    kind: str  # plan, component, batch or preview
+    status: str  # queued, running, succeeded or failed
+    attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None  # the matching synchronous endpoint's response body
+    error: Optional[str] = None
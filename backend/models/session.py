@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+class GeneratedComponent:
+    __slots__ = ("name", "filename", "code", "explanation", "dependencies", "usage_example", "generated_at", "revision")
+
+    def __init__(self, name: str, filename: str, code: str, explanation: Optional[str] = None, dependencies: Optional[List[str]] = None, usage_example: Optional[str] = None, generated_at: Optional[float] = None, revision: int = 0):
+        self.name = sys.intern(name)
+        self.filename = filename
+        self.code = code
+        self.explanation = explanation
+        self.dependencies = dependencies or []
+        self.usage_example = usage_example
+        self.generated_at = generated_at or time.time()
+        # Session revision that added this component
+        self.revision = revision
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GeneratedComponent":
+        return cls(
+            name=data["name"],
+            filename=data.get("filename") or f"src/components/{data['name']}.tsx",
+            code=data.get("code", ""),
+            explanation=data.get("explanation"),
+            dependencies=list(data.get("dependencies") or []),
+            usage_example=data.get("usage_example"),
+            generated_at=data.get("generated_at"),
+            revision=data.get("revision") or 0
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def estimate_size(self) -> int:
+        return (
+            len(self.filename) + len(self.code) + len(self.explanation or "") + len(self.usage_example or "")
+            + sum(len(dependency) for dependency in self.dependencies) + 64
+        )
+
+class SessionRecord:
+    """Compact, slotted representation of one project-building session."""
+
+    __slots__ = (
+        "id", "idea", "plan", "remaining_components", "generated", "user_preferences",
+        "template_id", "created_at", "updated_at", "last_accessed", "status", "revision", "building", "nbytes"
+    )
+
+    def __init__(
+        self,
+        id: str,
+        idea: str,
+        plan: Dict[str, Any],
+        remaining_components: Optional[List[str]] = None,
+        generated: Optional[List[GeneratedComponent]] = None,
+        user_preferences: Optional[Dict[str, Any]] = None,
+        template_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None,
+        last_accessed: Optional[float] = None,
+        status: str = "active",
+        revision: int = 1,
+        building: Optional[Dict[str, List[Any]]] = None
+    ):
+        now = time.time()
+        self.id = id
+        self.idea = idea
+        self.plan = plan
+        self.remaining_components = [sys.intern(name) for name in (remaining_components or [])]
+        self.generated = generated or []
+        self.user_preferences = user_preferences or {}
+        self.template_id = template_id
+        self.created_at = created_at or now
+        self.updated_at = updated_at or now
+        self.last_accessed = last_accessed or now
+        self.status = status
+        # Bumped on every change, so readers can ask for what changed since a revision they hold
+        self.revision = revision
+        # Components being built right now: name -> [claim token, claim expiry]
+        self.building = building or {}
+        self.nbytes = self.estimate_size()
+
+    def estimate_size(self) -> int:
+        """Approximate payload bytes held by this session (strings and plan JSON, not object headers)."""
+        return (
+            len(self.idea) + len(json.dumps(self.plan)) + len(json.dumps(self.user_preferences))
+            + sum(len(name) for name in self.remaining_components)
+            + sum(component.estimate_size() for component in self.generated) + 256
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "idea": self.idea,
+            "plan": self.plan,
+            "remaining_components": list(self.remaining_components),
+            "generated": [component.to_dict() for component in self.generated],
+            "user_preferences": self.user_preferences,
+            "template_id": self.template_id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "last_accessed": self.last_accessed,
+            "status": self.status,
+            "revision": self.revision,
+            "building": self.building
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionRecord":
+        return cls(
+            id=data["id"],
+            idea=data["idea"],
+            plan=data["plan"],
+            remaining_components=data.get("remaining_components"),
+            generated=[GeneratedComponent.from_dict(component) for component in data.get("generated", [])],
+            user_preferences=data.get("user_preferences"),
+            template_id=data.get("template_id"),
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+            last_accessed=data.get("last_accessed"),
+            status=data.get("status", "active"),
+            revision=data.get("revision") or 1,
+            building=data.get("building")
+        )
@@ -0,0 +1,29 @@
+import asyncio
+from typing import Dict, List, Optional
+from core.ai.llm_client import LLMCompletion
+
+class FakeLLM:
+    """Stands in for LLMClient: answers every completion with content after delay seconds."""
+
+    def __init__(self, content: str = '{"code": "export default function X() { return <div />; }"}', delay: float = 0.0, finish_reason: Optional[str] = "stop"):
+        self.content = content
+        self.delay = delay
+        self.finish_reason = finish_reason
+        self.calls: List[List[Dict[str, str]]] = []
+
+    def configured_timeout(self, call_type: str) -> float:
+        return 30.0
+
+    async def complete(self, messages, max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", timeout: Optional[float] = None) -> LLMCompletion:
+        self.calls.append(messages)
+        await asyncio.sleep(self.delay)
+        return LLMCompletion(self.content, prompt_tokens=10, completion_tokens=10, finish_reason=self.finish_reason)
+
+    async def stream(self, messages, max_tokens: int = 1000, temperature: float = 0.3, call_type: str = "default", timeout: Optional[float] = None):
+        self.calls.append(messages)
+        for start in range(0, len(self.content), 8):
+            await asyncio.sleep(self.delay)
+            yield self.content[start:start + 8]
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from core.ai.admission import AdmissionController, AdmissionRejected, admission_scope
+from core.ai.code_generator import CodeGenerator
+from tests.fakes import FakeLLM
+
+MESSAGES = [{"role": "user", "content": "Build the Navbar"}]
+
+def test_queued_call_waits_for_a_slot():
+    async def scenario():
+        admission = AdmissionController(limits={"component": 1}, per_key_limit=0)
+        order = []
+
+        async def call(name: str, hold: float) -> None:
+            async with admission.slot("component", name):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(call("a", 0.02), call("b", 0))
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+
+def test_background_call_is_refused_instead_of_queueing():
+    async def scenario():
+        admission = AdmissionController(limits={"component": 1}, per_key_limit=0)
+        async with admission.slot("component", "other"):
+            with admission_scope(background=True):
+                with pytest.raises(AdmissionRejected) as rejected:
+                    async with admission.slot("component", "s1"):
+                        pass
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert (rejected.reason, rejected.status_code) == ("busy", 503)
+
+def test_session_queue_is_bounded():
+    async def scenario():
+        admission = AdmissionController(limits={"component": 4}, per_key_limit=1, per_key_queue=1)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with admission.slot("component", "s1"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with admission.slot("component", "s1"):
+                pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert (rejected.reason, rejected.status_code) == ("session_queue_full", 429)
+
+def test_foreground_call_does_not_join_a_background_flight():
+    # Regression: a request identical to an in-flight speculative call inherited its "busy" 503
+    async def scenario():
+        llm = FakeLLM(content="ok")
+        admission = AdmissionController(limits={"component": 1}, per_key_limit=0)
+        generator = CodeGenerator(llm_client=llm, admission=admission)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with admission.slot("component", "other"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with admission_scope(key="s1", background=True):
+            background = asyncio.create_task(generator._call_openai(MESSAGES, call_type="component"))
+        foreground = asyncio.create_task(generator._call_openai(MESSAGES, call_type="component", admission_key="s1"))
+        await asyncio.sleep(0.01)
+        release.set()
+        await holder
+        with pytest.raises(AdmissionRejected):
+            await background
+        return await foreground
+
+    assert asyncio.run(scenario()) == "ok"
+
+def test_joiner_retries_a_rejection_from_the_leaders_session():
+    # Regression: a caller from session B joined session A's flight and got A's 429
+    async def scenario():
+        llm = FakeLLM(content="ok")
+        admission = AdmissionController(limits={"component": 4}, per_key_limit=1, per_key_queue=1)
+        generator = CodeGenerator(llm_client=llm, admission=admission)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with admission.slot("component", "a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        leader = asyncio.create_task(generator._call_openai(MESSAGES, call_type="component", admission_key="a"))
+        joiner = asyncio.create_task(generator._call_openai(MESSAGES, call_type="component", admission_key="b"))
+        results = await asyncio.gather(leader, joiner, return_exceptions=True)
+        release.set()
+        await asyncio.gather(holder, queued)
+        return results
+
+    leader, joiner = asyncio.run(scenario())
+    assert isinstance(leader, AdmissionRejected) and leader.status_code == 429
+    assert joiner == "ok"
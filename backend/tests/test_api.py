@@ -0,0 +1,101 @@
+import io
+import os
+import sys
+import json
+import asyncio
+import zipfile
+import subprocess
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="module")
+def app():
+    # Without a key every LLM call takes its fallback (or the component library), so nothing leaves the host
+    saved = os.environ.pop("OPENAI_API_KEY", None)
+    import main
+    yield main
+    if saved is not None:
+        os.environ["OPENAI_API_KEY"] = saved
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+    return TestClient(app.app)
+
+def start(client) -> str:
+    response = client.post("/start-project", json={"idea": "A portfolio site for a photographer"})
+    assert response.status_code == 200
+    return response.json()["session_id"]
+
+def sse_events(body: str):
+    events = []
+    for block in filter(None, body.split("\n\n")):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_importing_the_app_builds_no_services():
+    output = subprocess.run(
+        [sys.executable, "-c", "import main; print(main.services.initialized())"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+def test_streamed_step_ends_with_the_validated_result(client):
+    session_id = start(client)
+    response = client.post("/generate-step/stream", json={"session_id": session_id})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    assert events[0][0] == "start" and events[-1][0] == "done"
+    assert "validation" in [event for event, _data in events]
+    assert events[-1][1]["component_name"] == events[0][1]["component_name"]
+
+def test_session_reads_support_revalidation_deltas_and_projection(client):
+    session_id = start(client)
+    first = client.get(f"/session/{session_id}")
+    assert client.get(f"/session/{session_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    revision = first.json()["revision"]
+    client.post("/generate-step", json={"session_id": session_id})
+    delta = client.get(f"/session/{session_id}", params={"since": revision}).json()
+    assert len(delta["generated"]) == 1 and "plan" not in delta
+
+    projected = client.get(f"/session/{session_id}", params={"fields": "progress,generated.name"}).json()
+    assert set(projected) == {"session_id", "revision", "progress", "generated"}
+    assert set(projected["generated"][0]) == {"name"}
+    assert client.get(f"/session/{session_id}", params={"fields": "bogus"}).status_code == 400
+
+def test_component_built_elsewhere_is_refused(app, client):
+    session_id = start(client)
+    component = client.get(f"/session/{session_id}").json()["remaining"][0]
+    asyncio.run(app.services.project_service.claim_component(session_id, component, "another-worker"))
+    response = client.post("/generate-step", json={"session_id": session_id, "component": component})
+    assert response.status_code == 409
+    # Without a name, the next free component is built instead
+    assert client.post("/generate-step", json={"session_id": session_id}).json()["component_name"] != component
+
+def test_export_streams_a_zip_of_the_project(client):
+    session_id = start(client)
+    client.post("/generate-step", json={"session_id": session_id})
+    response = client.get(f"/session/{session_id}/export.zip")
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert any(name.endswith("/package.json") for name in archive.namelist())
+    assert client.get("/session/missing/export.zip").status_code == 404
+
+def test_websocket_build_reaches_every_tab(client):
+    session_id = start(client)
+    with client.websocket_connect(f"/ws/session/{session_id}") as first, client.websocket_connect(f"/ws/session/{session_id}") as second:
+        first.send_json({"type": "build"})
+        for tab in (first, second):
+            # A tab is first sent the session's progress, then the build's events
+            events = [tab.receive_json()["event"]]
+            while events[-1] != "done":
+                events.append(tab.receive_json()["event"])
+            assert events[0] == "progress" and "start" in events
+
+def test_templates_are_served_with_an_etag(client):
+    response = client.get("/templates")
+    assert response.json()["templates"]
+    assert client.get("/templates", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
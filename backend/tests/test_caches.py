@@ -0,0 +1,105 @@
+import time
+import asyncio
+import sqlite3
+import threading
+from core.ai.plan_cache import PlanCache
+from core.utils.cache import LRUCache
+from core.utils.http_cache import accepts_gzip, etag_matches, gzip_body, strong_etag, weak_etag
+
+def test_lru_cache_evicts_by_entries_and_bytes():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    sized = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    sized.set("a", "x" * 6)
+    sized.set("b", "y" * 6)
+    assert sized.get("a") is None and sized.current_bytes == 6
+
+def test_lru_cache_entries_expire():
+    cache = LRUCache(ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert (cache.get("short"), cache.get("long")) == (None, 2)
+    assert cache.expirations == 1
+
+def test_plan_cache_keys_ignore_spacing_and_case():
+    assert PlanCache.make_key("A  Bakery\nsite", "React", None, None) == PlanCache.make_key("a bakery site", " react ", "medium", "")
+
+def test_plan_cache_returns_copies():
+    async def scenario():
+        cache = PlanCache()
+        await cache.set("key", {"components_sequence": ["Navbar"]})
+        (await cache.get("key"))["components_sequence"].append("Hero")
+        return await cache.get("key")
+
+    assert asyncio.run(scenario()) == {"components_sequence": ["Navbar"]}
+
+def test_plan_cache_survives_a_restart_on_disk(tmp_path):
+    path = str(tmp_path / "plans.db")
+    asyncio.run(PlanCache(path=path).set("key", {"title": "Bakery"}))
+    restarted = PlanCache(path=path)
+    assert asyncio.run(restarted.get("key")) == {"title": "Bakery"}
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_plan_cache_disk_entries_expire(tmp_path):
+    path = str(tmp_path / "plans.db")
+    asyncio.run(PlanCache(path=path, ttl=0.01).set("key", {"title": "Bakery"}))
+    time.sleep(0.02)
+    assert asyncio.run(PlanCache(path=path, ttl=0.01).get("key")) is None
+
+def test_plan_cache_evicts_from_disk_only_past_its_bound(tmp_path):
+    async def scenario():
+        cache = PlanCache(max_entries=1, path=str(tmp_path / "plans.db"), max_disk_entries=3)
+        for index in range(3):
+            await cache.set(f"key{index}", {"index": index})
+        before = cache.disk_evictions
+        await cache.set("key3", {"index": 3})
+        return before, cache.disk_evictions, await cache.get("key0"), await cache.get("key1")
+
+    assert asyncio.run(scenario()) == (0, 1, None, {"index": 1})
+
+def test_plan_cache_disk_writes_do_not_block_the_loop(tmp_path):
+    path = str(tmp_path / "plans.db")
+    cache = PlanCache(path=path)
+    # Another process holds the write lock for a while
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.2, other.execute, ("COMMIT",)).start()
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await cache.set("key", {"title": "Bakery"})
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+    assert asyncio.run(PlanCache(path=path).get("key")) == {"title": "Bakery"}
+
+def test_if_none_match_uses_weak_comparison():
+    etag = strong_etag(b"page")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert weak_etag("s1", 3) == weak_etag("s1", 3) != weak_etag("s1", 4)
+
+def test_gzip_only_when_accepted_and_worthwhile():
+    body = b"x" * 2048
+    assert gzip_body(body, "gzip, br")[1] == "gzip"
+    assert gzip_body(body, "gzip;q=0") == (body, None)
+    assert gzip_body(b"small", "gzip") == (b"small", None)
+    assert accepts_gzip("*") and not accepts_gzip("br")
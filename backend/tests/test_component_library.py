@@ -0,0 +1,27 @@
+import pytest
+from core.ai.component_library import ComponentLibrary
+from core.utils.validators import CodeValidator
+
+PLAN = {"title": "Sweet Bakery", "description": "Fresh bread daily", "components_sequence": ["Navbar", "Hero", "Menu", "Contact", "Footer"]}
+
+@pytest.fixture(scope="module")
+def library():
+    return ComponentLibrary()
+
+def test_common_components_render_without_the_llm(library):
+    result = library.render("HeroSection", PLAN)
+    assert result["source"] == "library" and result["name"] == "HeroSection"
+    assert result["filename"] == "src/components/HeroSection.tsx"
+    assert "Sweet Bakery" in result["code"]
+    assert CodeValidator().validate_component_code(result["code"]).is_valid
+
+def test_unknown_components_are_left_to_the_llm(library):
+    assert library.render("RecipeCarousel", PLAN) is None
+    assert library.stats()["misses"] >= 1
+
+def test_unsupported_stack_is_left_to_the_llm(library):
+    assert library.render("Navbar", dict(PLAN, stack="Vue + Vuetify")) is None
+
+def test_plan_text_is_escaped_into_the_code(library):
+    result = library.render("Hero", dict(PLAN, title='Quote "and" </script> `tick` ${x}'))
+    assert CodeValidator().validate_component_code(result["code"]).is_valid
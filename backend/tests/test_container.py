@@ -0,0 +1,43 @@
+import threading
+from core.services.container import ServiceContainer, lazy_service
+from core.utils.startup import StartupReport
+
+class SlowContainer(ServiceContainer):
+    SERVICES = ("slow", "fast")
+
+    def __init__(self):
+        super().__init__(report=StartupReport())
+        self.release = threading.Event()
+        self.builds = 0
+
+    @lazy_service
+    def slow(self):
+        self.builds += 1
+        self.release.wait(5)
+        return "slow"
+
+    @lazy_service
+    def fast(self):
+        return "fast"
+
+def test_building_one_service_does_not_hold_up_another():
+    container = SlowContainer()
+    builder = threading.Thread(target=lambda: container.slow)
+    builder.start()
+    while not container.is_building("slow"):
+        pass
+    # Would block until release if services shared one lock
+    assert container.fast == "fast"
+    container.release.set()
+    builder.join()
+    assert container.slow == "slow" and container.builds == 1
+
+def test_concurrent_first_access_builds_once():
+    container = SlowContainer()
+    threads = [threading.Thread(target=lambda: container.slow) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    container.release.set()
+    for thread in threads:
+        thread.join()
+    assert container.builds == 1
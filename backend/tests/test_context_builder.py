@@ -0,0 +1,41 @@
+from models.session import GeneratedComponent
+from core.ai.context_builder import ContextBuilder, summarize_component
+from core.ai.tokens import estimate_tokens
+
+NAVBAR = GeneratedComponent("Navbar", "src/components/Navbar.tsx", (
+    "import React from 'react';\nimport { Menu } from 'lucide-react';\n"
+    "interface NavbarProps { links: string[]; onSelect: () => void }\n"
+    "export default function Navbar({ links, onSelect }: NavbarProps) {\n"
+    "  return <nav className=\"bg-indigo-600 text-white rounded-lg shadow-md\" />;\n}\n"
+))
+
+def history(count: int):
+    return [
+        GeneratedComponent(f"Section{i}", f"src/components/Section{i}.tsx", f"export default function Section{i}() {{ return <div className=\"bg-indigo-600\" />; }}")
+        for i in range(count)
+    ]
+
+def test_summary_keeps_exports_props_and_styles():
+    summary = summarize_component(NAVBAR)
+    rendered = summary.render()
+    assert "Navbar" in rendered and "links" in rendered
+    assert "bg-indigo-600" in summary.style_tokens
+
+def test_context_stays_within_its_budget():
+    builder = ContextBuilder(budgets={"component": 120})
+    context = builder.build("Footer", history(40))
+    assert estimate_tokens(context) <= 120
+    assert "more not shown" in context
+
+def test_component_being_built_is_left_out():
+    context = ContextBuilder().build("Navbar", [NAVBAR, *history(2)])
+    assert "Navbar" not in context and "Section0" in context
+
+def test_zero_budget_disables_context():
+    assert ContextBuilder(budgets={"component": 0}).build("Footer", [NAVBAR]) == ""
+
+def test_summaries_are_cached_by_content():
+    builder = ContextBuilder()
+    builder.build("Footer", [NAVBAR])
+    builder.build("Hero", [NAVBAR])
+    assert builder.stats()["summaries"]["hits"] == 1
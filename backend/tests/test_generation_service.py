@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from core.ai.code_generator import CodeGenerator
+from core.services.generation_service import GenerationService
+from core.services.project_service import ComponentBusy, ProjectService
+from core.services.session_store import SQLiteSessionStore
+from core.utils.validators import CodeValidator
+from tests.fakes import FakeLLM
+
+PLAN = {"title": "Test", "components_sequence": ["Navbar", "Hero", "Features", "Footer"]}
+
+def worker(path: str, llm: FakeLLM) -> GenerationService:
+    """A generation service as one worker process would build it, over a shared session database."""
+    code_generator = CodeGenerator(llm_client=llm, coalesce=False)
+    return GenerationService(code_generator, ProjectService(SQLiteSessionStore(path=path)), CodeValidator())
+
+def test_concurrent_batches_build_each_component_once(tmp_path):
+    # Regression: the batch lock was per process, so batches in two workers built everything twice
+    path = str(tmp_path / "sessions.db")
+    llm = FakeLLM(delay=0.02)
+    first, second = worker(path, llm), worker(path, llm)
+    session_id = asyncio.run(first.project_service.create_session("idea", PLAN))
+
+    async def scenario():
+        return await asyncio.gather(
+            first.generate_all(session_id, use_llm=True),
+            second.generate_all(session_id, use_llm=True)
+        )
+
+    batches = asyncio.run(scenario())
+    built = sorted(step["component_name"] for batch in batches for step in batch["components"])
+    assert built == sorted(PLAN["components_sequence"])
+    assert len(llm.calls) == len(PLAN["components_sequence"])
+
+    session = first.project_service.get_session(session_id)
+    assert session.remaining_components == [] and session.building == {}
+
+def test_step_refuses_a_component_being_built_elsewhere(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    llm = FakeLLM(delay=0.05)
+    first, second = worker(path, llm), worker(path, llm)
+    session_id = asyncio.run(first.project_service.create_session("idea", PLAN))
+
+    async def scenario():
+        building = asyncio.create_task(first.generate_step(session_id, "Navbar", use_llm=True))
+        await asyncio.sleep(0.02)
+        with pytest.raises(ComponentBusy):
+            await second.generate_step(session_id, "Navbar", use_llm=True)
+        # The other worker moves on to the next free component instead
+        assert second.project_service.get_next_component(session_id) == "Hero"
+        return await building
+
+    assert asyncio.run(scenario())["component_name"] == "Navbar"
+    assert len(llm.calls) == 1
+
+@pytest.mark.parametrize("cancel_after", [0, 0.02])
+def test_cancelled_step_releases_its_claim(tmp_path, cancel_after):
+    # Cancelled while the claim is being written, and while the component is being built
+    service = worker(str(tmp_path / "sessions.db"), FakeLLM(delay=1.0))
+    session_id = asyncio.run(service.project_service.create_session("idea", PLAN))
+
+    async def cancelled():
+        task = asyncio.create_task(service.generate_step(session_id, "Navbar", use_llm=True))
+        await asyncio.sleep(cancel_after)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled())
+    assert service.project_service.get_session(session_id).building == {}
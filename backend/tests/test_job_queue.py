@@ -0,0 +1,105 @@
+import time
+import sqlite3
+import asyncio
+import pytest
+from core.ai.admission import AdmissionRejected
+from core.services.job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED, FAILED
+
+async def echo(params):
+    return {"echo": params["value"]}
+
+async def until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+def test_submitted_job_runs_and_keeps_its_result(tmp_path):
+    async def scenario():
+        queue = JobQueue({"echo": echo}, path=str(tmp_path / "jobs.db"), workers=2)
+        await queue.start()
+        job = await queue.submit("echo", {"value": 1})
+        await until(lambda: queue.get(job.id).status == SUCCEEDED)
+        await queue.stop()
+        return queue.get(job.id)
+
+    job = asyncio.run(scenario())
+    assert (job.result, job.attempts) == ({"echo": 1}, 1)
+
+def test_unknown_kind_is_refused(tmp_path):
+    queue = JobQueue({"echo": echo}, path=str(tmp_path / "jobs.db"), workers=0)
+    with pytest.raises(ValueError):
+        asyncio.run(queue.submit("missing", {}))
+
+def test_job_of_a_dead_worker_is_claimed_again_after_its_lease(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        enqueue_only = JobQueue({"echo": echo}, path=path, workers=0)
+        job = await enqueue_only.submit("echo", {"value": 2})
+        # As a crashed worker leaves it: running, with a heartbeat older than the lease
+        enqueue_only._db.execute("UPDATE jobs SET status = ?, attempts = 1, heartbeat_at = ? WHERE id = ?", (RUNNING, time.time() - 10, job.id))
+        worker = JobQueue({"echo": echo}, path=path, workers=1, lease=1)
+        await worker.start()
+        await until(lambda: worker.get(job.id).status == SUCCEEDED)
+        await worker.stop()
+        return worker.get(job.id)
+
+    assert asyncio.run(scenario()).attempts == 2
+
+def test_job_fails_once_its_attempts_are_used(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        queue = JobQueue({"echo": echo}, path=path, workers=1, lease=1, max_attempts=2)
+        job = await queue.submit("echo", {"value": 3})
+        queue._db.execute("UPDATE jobs SET status = ?, attempts = 2, heartbeat_at = ? WHERE id = ?", (RUNNING, time.time() - 10, job.id))
+        await queue.start()
+        await until(lambda: queue.get(job.id).status == FAILED)
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+def test_admission_rejection_requeues_without_using_an_attempt(tmp_path):
+    async def overloaded(params):
+        raise AdmissionRejected("component", "busy", 503, 30)
+
+    async def scenario():
+        queue = JobQueue({"echo": overloaded}, path=str(tmp_path / "jobs.db"), workers=1)
+        await queue.start()
+        job = await queue.submit("echo", {"value": 4})
+        await until(lambda: queue.get(job.id).started_at is None and queue.get(job.id).attempts == 0 and not queue._running)
+        await queue.stop()
+        return queue.get(job.id)
+
+    assert asyncio.run(scenario()).status == QUEUED
+
+def test_claims_wait_for_other_processes_off_the_event_loop(tmp_path):
+    # Regression: a worker's BEGIN IMMEDIATE waited for another process's lock on the event loop
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        queue = JobQueue({"echo": echo}, path=path, workers=1, poll_interval=0.01)
+        job = await queue.submit("echo", {"value": 5})
+        other_process = sqlite3.connect(path, isolation_level=None)
+        other_process.execute("BEGIN IMMEDIATE")
+        await queue.start()
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lag = time.perf_counter() - started - 0.01
+        # Reads are not held up either
+        assert queue.get(job.id).status == QUEUED
+        other_process.execute("COMMIT")
+        await until(lambda: queue.get(job.id).status == SUCCEEDED, timeout=6)
+        await queue.stop()
+        return lag
+
+    assert asyncio.run(scenario()) < 0.04
+
+def test_queue_is_not_opened_at_startup_unless_configured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("JOB_DB_PATH", raising=False)
+    monkeypatch.delenv("JOB_WORKERS", raising=False)
+    assert not JobQueue.configured()
+    monkeypatch.setenv("JOB_WORKERS", "2")
+    assert JobQueue.configured()
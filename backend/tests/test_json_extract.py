@@ -0,0 +1,38 @@
+import pytest
+from core.ai.json_extract import JSONStreamParser, extract_json, has_required
+
+def test_clean_json_needs_no_repairs():
+    extraction = extract_json('{"name": "Hero", "deps": ["react"]}')
+    assert extraction.value == {"name": "Hero", "deps": ["react"]}
+    assert (extraction.complete, extraction.repairs) == (True, 0)
+
+def test_prose_and_fences_around_the_value_are_ignored():
+    text = 'Here is the component:\n```json\n{"name": "Hero"}\n```\nLet me know if you need more.'
+    assert extract_json(text).value == {"name": "Hero"}
+
+def test_common_model_defects_are_repaired():
+    text = '{"name": "Hero", "code": "line1\nline2\t\\d", "ok": True, "deps": ["a",],}'
+    extraction = extract_json(text)
+    assert extraction.value == {"name": "Hero", "code": "line1\nline2\t\\d", "ok": True, "deps": ["a"]}
+    assert extraction.complete and extraction.repairs > 0
+
+def test_truncated_output_yields_its_complete_prefix():
+    extraction = extract_json('{"name": "Hero", "deps": ["react", "clsx"], "code": "export default fun')
+    assert extraction.value == {"name": "Hero", "deps": ["react", "clsx"]}
+    assert not extraction.complete
+    assert not has_required(extraction.value, ["name", "code"])
+
+def test_number_cut_short_is_left_out():
+    assert extract_json('{"a": 1, "b": 12').value == {"a": 1}
+
+def test_chunks_can_split_anywhere():
+    text = '{"name": "Hero", "code": "<div className=\\"x\\">{items}</div>", "n": [1, 2]}'
+    parser = JSONStreamParser()
+    for char in text:
+        parser.feed(char)
+    assert parser.done
+    assert parser.result().value == extract_json(text).value
+
+def test_output_without_json_is_an_error():
+    with pytest.raises(ValueError):
+        extract_json("Sorry, I can't help with that.")
@@ -0,0 +1,61 @@
+import json
+import asyncio
+import httpx
+import pytest
+from core.ai.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "Build the Navbar"}]
+
+def client_with(handler) -> LLMClient:
+    llm = LLMClient(api_key="test", base_url="http://llm.test/v1")
+    llm._client = httpx.AsyncClient(base_url=llm.base_url, transport=httpx.MockTransport(handler))
+    return llm
+
+def test_completion_reports_content_usage_and_finish_reason():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "export default"}, "finish_reason": "length"}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3}
+        })
+
+    async def scenario():
+        llm = client_with(handler)
+        completion = await llm.complete(MESSAGES, max_tokens=50, call_type="component")
+        await llm.aclose()
+        return completion
+
+    completion = asyncio.run(scenario())
+    assert (completion.content, completion.prompt_tokens, completion.completion_tokens, completion.finish_reason) == ("export default", 12, 3, "length")
+    assert requests[0]["max_tokens"] == 50 and "stream" not in requests[0]
+
+def test_stream_yields_deltas_until_done():
+    events = [{"choices": [{"delta": {"content": piece}}]} for piece in ["<div>", "hi", "</div>"]]
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    async def scenario():
+        llm = client_with(handler)
+        return [delta async for delta in llm.stream(MESSAGES, call_type="preview")]
+
+    assert asyncio.run(scenario()) == ["<div>", "hi", "</div>"]
+
+def test_provider_errors_are_raised():
+    async def scenario():
+        llm = client_with(lambda request: httpx.Response(429, json={"error": "rate limited"}))
+        await llm.complete(MESSAGES)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scenario())
+
+def test_connection_pool_is_shared_and_created_on_first_use():
+    llm = LLMClient(api_key="test", call_timeouts={"plan": 60})
+    assert llm._client is None
+    assert llm.client is llm.client
+    assert (llm.configured_timeout("plan"), llm.configured_timeout("component")) == (60, 30.0)
+    asyncio.run(llm.aclose())
@@ -0,0 +1,43 @@
+import pytest
+from core.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+def test_counters_render_in_prometheus_text_format():
+    registry = MetricsRegistry()
+    calls = Counter("calls_total", "Calls", ["call_type"], registry=registry)
+    calls.labels(call_type="plan").inc()
+    calls.labels("plan").inc(2)
+    text = registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{call_type="plan"} 3' in text
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    depth = {"value": 1}
+    gauge = Gauge("queue_depth", "Depth", registry=registry)
+    gauge.set_function(lambda: depth["value"])
+    depth["value"] = 7
+    assert "queue_depth 7" in registry.render()
+
+def test_labels_are_checked():
+    registry = MetricsRegistry()
+    calls = Counter("calls_total", "Calls", ["call_type"], registry=registry)
+    with pytest.raises(ValueError):
+        calls.inc()
+    with pytest.raises(ValueError):
+        Counter("calls_total", "Again", registry=registry)
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    Counter("errors_total", "Errors", ["detail"], registry=registry).labels(detail='say "hi"\n').inc()
+    assert 'errors_total{detail="say \\"hi\\"\\n"} 1' in registry.render()
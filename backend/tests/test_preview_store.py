@@ -0,0 +1,42 @@
+import time
+import asyncio
+from core.ai.code_generator import CodeGenerator
+from core.services.generation_service import GenerationService
+from core.services.preview_store import PreviewStore
+from core.services.project_service import ProjectService
+from core.utils.validators import CodeValidator
+from tests.fakes import FakeLLM
+
+def service(llm=None, fallback_ttl: float = 60.0) -> GenerationService:
+    code_generator = CodeGenerator(llm_client=llm)
+    return GenerationService(code_generator, ProjectService(), CodeValidator(), PreviewStore(fallback_ttl=fallback_ttl))
+
+def test_same_inputs_share_a_key():
+    assert PreviewStore.make_key("A  bakery\nsite", "Modern ") == PreviewStore.make_key("A bakery site", "modern")
+
+def test_generated_preview_is_served_from_the_store():
+    llm = FakeLLM(content="<html>bakery</html>")
+    generation = service(llm)
+    first = asyncio.run(generation.generate_preview("A bakery site"))
+    second = asyncio.run(generation.generate_preview("A bakery site"))
+    assert first["preview_hash"] == second["preview_hash"]
+    assert (second["preview_html"], second["source"]) == ("<html>bakery</html>", "llm")
+    assert len(llm.calls) == 1
+
+def test_fallback_preview_expires_so_the_llm_gets_another_try():
+    # Regression: a template page rendered while the LLM was down was served for those inputs forever
+    generation = service(fallback_ttl=0.01)
+    preview = asyncio.run(generation.generate_preview("A bakery site"))
+    assert preview["source"] == "fallback"
+    assert generation.preview_store.get(preview["preview_hash"]) is not None
+    time.sleep(0.02)
+    assert generation.preview_store.get(preview["preview_hash"]) is None
+
+def test_streamed_fallback_is_marked():
+    generation = service(fallback_ttl=0.01)
+
+    async def events():
+        return [event async for event in generation.stream_preview("A bakery site")]
+
+    event, payload = asyncio.run(events())[-1]
+    assert (event, payload["source"]) == ("done", "fallback")
@@ -0,0 +1,57 @@
+import time
+import asyncio
+import marshal
+import pytest
+from core.utils.profiling import LoopLagMonitor, Profiler, ProfilerBusy
+
+def busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_sampled_request_is_profiled_and_kept():
+    profiler = Profiler(sample_rate=1.0)
+    profile = profiler.begin_request()
+    busy(0.01)
+    profiler.end_request(profile, "POST", "/generate-step", 200, 0.01)
+    sample = profiler.recent()[0]
+    assert (sample["route"], sample["status"]) == ("/generate-step", 200)
+    assert "busy" in sample["stats"]
+
+def test_requests_are_not_sampled_at_rate_zero():
+    assert Profiler(sample_rate=0.0).begin_request() is None
+
+def test_only_one_profile_runs_at_a_time():
+    async def scenario():
+        profiler = Profiler(sample_rate=1.0)
+        window = asyncio.create_task(profiler.window(0.05))
+        await asyncio.sleep(0.01)
+        assert profiler.begin_request() is None
+        with pytest.raises(ProfilerBusy):
+            await profiler.window(0.01)
+        return await window
+
+    stats = marshal.loads(asyncio.run(scenario()))
+    assert isinstance(stats, dict)
+
+def test_admin_token_is_required():
+    assert not Profiler().authorized("anything")
+    profiler = Profiler(admin_token="secret")
+    assert profiler.authorized("secret") and not profiler.authorized("wrong") and not profiler.authorized(None)
+
+def test_loop_monitor_names_the_blocking_task():
+    async def blocker():
+        busy(0.2)
+
+    async def scenario():
+        monitor = LoopLagMonitor(threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(blocker())
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.stalls and monitor.max_lag >= 0.1
+    assert "blocker" in (monitor.stalls[-1]["task"] or "") + (monitor.stalls[-1]["stack"] or "")
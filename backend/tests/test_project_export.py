@@ -0,0 +1,40 @@
+import io
+import json
+import zipfile
+from models.session import GeneratedComponent, SessionRecord
+from core.services.project_export import CHUNK_SIZE, export_filename, iter_project_zip
+
+def session(*components: GeneratedComponent) -> SessionRecord:
+    return SessionRecord(id="s1", idea="A bakery site", plan={"title": "Sweet Bakery"}, generated=list(components))
+
+def unzip(record: SessionRecord) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(iter_project_zip(record))))
+
+def test_archive_holds_a_runnable_vite_project():
+    navbar = GeneratedComponent("Navbar", "src/components/Navbar.tsx", "import { motion } from 'framer-motion';\nexport default function Navbar() {}")
+    archive = unzip(session(navbar))
+    names = set(archive.namelist())
+    assert {"sweet-bakery/package.json", "sweet-bakery/src/main.tsx", "sweet-bakery/src/components/Navbar.tsx"} <= names
+    assert archive.testzip() is None
+
+    package = json.loads(archive.read("sweet-bakery/package.json"))
+    assert package["dependencies"]["framer-motion"] == "latest"
+    assert "import Navbar from './components/Navbar';" in archive.read("sweet-bakery/src/App.tsx").decode()
+    assert export_filename(session()) == "sweet-bakery.zip"
+
+def test_paths_cannot_escape_the_project():
+    archive = unzip(session(GeneratedComponent("Evil", "../../etc/passwd", "x")))
+    assert "sweet-bakery/src/components/Evil.tsx" in archive.namelist()
+    assert not any(".." in name for name in archive.namelist())
+
+def test_regenerated_component_overwrites_the_earlier_file():
+    archive = unzip(session(
+        GeneratedComponent("Hero", "src/components/Hero.tsx", "old"),
+        GeneratedComponent("Hero", "src/components/Hero.tsx", "new")
+    ))
+    assert archive.read("sweet-bakery/src/components/Hero.tsx") == b"new"
+
+def test_large_components_stream_in_several_chunks():
+    big = "x" * (CHUNK_SIZE * 3)
+    chunks = list(iter_project_zip(session(GeneratedComponent("Big", "src/components/Big.tsx", "".join(f"{i}\n" for i in range(100000)) + big))))
+    assert len(chunks) > 2
@@ -0,0 +1,104 @@
+import time
+import sqlite3
+import asyncio
+import pytest
+from core.services.project_service import ComponentBusy, ProjectService, parse_session_fields
+from core.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+PLAN = {"title": "Test", "components_sequence": ["Navbar", "Hero", "Footer"]}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, tmp_path):
+    if request.param == "memory":
+        return ProjectService(InMemorySessionStore())
+    return ProjectService(SQLiteSessionStore(path=str(tmp_path / "sessions.db")))
+
+def add(service: ProjectService, session_id: str, name: str, code: str = "code"):
+    return asyncio.run(service.add_generated_component(session_id, {"name": name, "code": code}))
+
+def test_components_leave_remaining_in_order(service):
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    assert service.get_next_component(session_id) == "Navbar"
+    session = add(service, session_id, "Navbar")
+    assert session.remaining_components == ["Hero", "Footer"]
+    assert service.get_remaining_components(session_id) == ["Hero", "Footer"]
+    assert service.get_progress_stats(session_id)["progress_percentage"] == pytest.approx(33.3)
+
+def test_missing_session_is_not_recorded(service):
+    assert add(service, "missing", "Navbar") is None
+
+def test_component_built_twice_is_recorded_once(service):
+    # Regression: two workers building the same component left duplicates and progress above 100%
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    for name in ["Navbar", "Hero", "Footer", "Footer"]:
+        add(service, session_id, name, f"{name} code")
+    add(service, session_id, "Navbar", "newer")
+
+    session = service.get_session(session_id)
+    assert [component.name for component in session.generated] == ["Navbar", "Hero", "Footer"]
+    assert session.generated[0].code == "newer"
+    assert service.get_progress_stats(session_id)["progress_percentage"] == 100.0
+
+def test_revisions_drive_session_deltas(service):
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    add(service, session_id, "Navbar")
+    revision = service.get_session(session_id).revision
+    add(service, session_id, "Hero")
+
+    view = service.get_session_view(service.get_session(session_id), since=revision)
+    assert [component["name"] for component in view["generated"]] == ["Hero"]
+    assert "idea" not in view and "plan" not in view
+
+def test_sqlite_writes_wait_off_the_event_loop(tmp_path):
+    # Regression: a write waiting for another process's lock stalled every request in the worker
+    path = str(tmp_path / "sessions.db")
+    service = ProjectService(SQLiteSessionStore(path=path))
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    other_process = sqlite3.connect(path, isolation_level=None)
+
+    async def scenario():
+        other_process.execute("BEGIN IMMEDIATE")
+        write = asyncio.create_task(service.add_generated_component(session_id, {"name": "Navbar", "code": "a"}))
+        started = time.perf_counter()
+        await asyncio.sleep(0.05)
+        loop_delay = time.perf_counter() - started - 0.05
+        # Reads are not blocked by the pending write either
+        assert service.get_session(session_id).remaining_components == ["Navbar", "Hero", "Footer"]
+        assert not write.done()
+        other_process.execute("COMMIT")
+        return loop_delay, await write
+
+    loop_delay, session = asyncio.run(scenario())
+    assert loop_delay < 0.04
+    assert session.remaining_components == ["Hero", "Footer"]
+
+def test_session_fields_projection():
+    assert parse_session_fields("progress,generated.name") == {"progress": None, "generated": {"name"}}
+    with pytest.raises(ValueError):
+        parse_session_fields("generated.bogus")
+
+def test_claims_are_exclusive_until_released(service):
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    asyncio.run(service.claim_component(session_id, "Navbar", "first"))
+    with pytest.raises(ComponentBusy):
+        asyncio.run(service.claim_component(session_id, "Navbar", "second"))
+    # Work picks the next component nobody is building
+    assert service.get_next_component(session_id) == "Hero"
+    assert asyncio.run(service.claim_remaining(session_id, "batch")) == ["Hero", "Footer"]
+
+    asyncio.run(service.release_claim(session_id, "first"))
+    assert service.get_next_component(session_id) == "Navbar"
+
+def test_recording_a_component_releases_its_claim(service):
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    asyncio.run(service.claim_component(session_id, "Navbar", "token"))
+    add(service, session_id, "Navbar")
+    assert service.get_session(session_id).building == {}
+
+def test_abandoned_claims_lapse(service):
+    service.claim_ttl = 0.01
+    session_id = asyncio.run(service.create_session("idea", PLAN))
+    asyncio.run(service.claim_component(session_id, "Navbar", "crashed"))
+    time.sleep(0.02)
+    assert service.get_next_component(session_id) == "Navbar"
+    assert asyncio.run(service.claim_component(session_id, "Navbar", "retry")) == "retry"
@@ -0,0 +1,70 @@
+import time
+import asyncio
+import pytest
+from core.ai.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+def test_breaker_opens_once_enough_recent_calls_failed():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, open_seconds=30)
+    for _ in range(3):
+        breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.current_state() == CLOSED
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+    assert not breaker.allow()
+
+def test_slow_successes_count_as_failures():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, slow_call_seconds=1.0)
+    breaker.record_success(2.0)
+    breaker.record_success(3.0)
+    assert breaker.current_state() == OPEN
+
+def test_half_open_probe_closes_or_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=1, open_seconds=0.01, probe_interval=0.05)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.current_state() == HALF_OPEN
+    # One probe per interval
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.current_state() == CLOSED
+
+def test_open_circuit_refuses_calls():
+    policy = ResiliencePolicy(CircuitBreaker(min_calls=1))
+    policy.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        policy.check("component")
+
+def test_timeouts_follow_observed_latency_within_bounds():
+    policy = ResiliencePolicy(min_samples=5, timeout_multiplier=3, min_timeout=1.0)
+    assert policy.timeout_for("component", 30.0) == 30.0
+    for _ in range(5):
+        policy.latency.observe("component", 2.0)
+    assert policy.timeout_for("component", 30.0) == 6.0
+    assert policy.timeout_for("component", 4.0) == 4.0
+
+def test_slow_call_is_hedged_and_the_faster_answer_wins():
+    async def scenario():
+        policy = ResiliencePolicy(hedge=True, min_samples=3)
+        for _ in range(3):
+            policy.latency.observe("preview", 0.01)
+        delays = [0.5, 0.01]
+
+        async def attempt():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return delay
+
+        started = time.monotonic()
+        result = await policy.run("preview", attempt)
+        return result, time.monotonic() - started, policy.hedged
+
+    result, elapsed, hedged = asyncio.run(scenario())
+    assert (result, hedged) == (0.01, 1)
+    assert elapsed < 0.3
@@ -0,0 +1,110 @@
+import time
+import threading
+import pytest
+from models.session import SessionRecord
+from core.services.session_store import InMemorySessionStore, SessionStore, SQLiteSessionStore
+
+def record(session_id: str, idea: str = "idea") -> SessionRecord:
+    return SessionRecord(id=session_id, idea=idea, plan={"components_sequence": ["Navbar"]}, remaining_components=["Navbar"])
+
+def test_memory_store_evicts_least_recently_used_sessions():
+    store = InMemorySessionStore(max_sessions=2)
+    for session_id in ["a", "b"]:
+        store.put(record(session_id))
+    store.get("a")
+    store.put(record("c"))
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.evictions == 1
+
+def test_memory_store_is_bounded_by_payload_bytes():
+    store = InMemorySessionStore(max_bytes=record("a", "x" * 5000).estimate_size() + 100)
+    store.put(record("a", "x" * 5000))
+    store.put(record("b", "y" * 5000))
+    assert store.count() == 1 and store.get("b") is not None
+    assert store.total_bytes <= store.max_bytes
+
+def test_idle_sessions_expire():
+    store = InMemorySessionStore(idle_ttl=0.01)
+    store.put(record("a"))
+    time.sleep(0.02)
+    assert store.get("a") is None
+    assert store.expirations == 1
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteSessionStore(path=path), SQLiteSessionStore(path=path)
+    first.put(record("a"))
+    second.update("a", lambda session: session.remaining_components.clear())
+    assert first.get("a").remaining_components == []
+    assert first.count() == second.count() == 1
+
+def test_sqlite_updates_from_several_workers_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path=path).put(record("a"))
+
+    def bump(store: SQLiteSessionStore) -> None:
+        for _ in range(20):
+            store.update("a", lambda session: session.remaining_components.append("Hero"))
+
+    threads = [threading.Thread(target=bump, args=(SQLiteSessionStore(path=path),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(SQLiteSessionStore(path=path).get("a").remaining_components) == 81
+
+def test_sqlite_update_that_raises_changes_nothing(tmp_path):
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    store.put(record("a"))
+
+    def mutate(session: SessionRecord) -> None:
+        session.remaining_components.clear()
+        raise RuntimeError("refused")
+
+    with pytest.raises(RuntimeError):
+        store.update("a", mutate)
+    assert store.get("a").remaining_components == ["Navbar"]
+
+def test_sqlite_expired_sessions_are_gone(tmp_path):
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), idle_ttl=0.01)
+    store.put(record("a"))
+    time.sleep(0.02)
+    assert store.get("a") is None
+    assert store.update("a", lambda session: None) is None
+
+def test_incomplete_backend_fails_when_created():
+    class WithoutDelete(SessionStore):
+        def get(self, session_id):
+            return None
+
+        def put(self, record):
+            pass
+
+        def update(self, session_id, mutate):
+            return None
+
+        def count(self):
+            return 0
+
+    with pytest.raises(TypeError, match="delete"):
+        WithoutDelete()
+
+def test_sqlite_byte_count_follows_every_write(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path=path)
+
+    def summed() -> int:
+        return store._reader.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM sessions").fetchone()[0]
+
+    store.put(record("a"))
+    store.put(record("b", "x" * 500))
+    store.put(record("a", "y" * 200))
+    store.update("b", lambda session: session.remaining_components.clear())
+    assert store.stats()["bytes"] == summed() > 0
+    store.delete("a")
+    assert store.stats()["bytes"] == summed()
+
+    # A database written before the counter existed is summed once on open
+    store._writer.execute("DROP TABLE session_meta")
+    assert SQLiteSessionStore(path=path).stats()["bytes"] == summed()
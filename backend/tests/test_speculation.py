@@ -0,0 +1,40 @@
+import asyncio
+from core.ai.code_generator import CodeGenerator
+from core.services.speculation import SpeculativeBuilds
+from models.session import SessionRecord
+from tests.fakes import FakeLLM
+
+SESSION = SessionRecord(id="s1", idea="A bakery site", plan={"title": "Bakery", "components_sequence": ["Navbar", "Hero"]}, remaining_components=["Navbar", "Hero"])
+
+def test_parked_component_is_claimed_once():
+    async def scenario():
+        llm = FakeLLM(delay=0.01)
+        builds = SpeculativeBuilds(CodeGenerator(llm_client=llm))
+        builds.schedule("s1", SESSION, "Navbar")
+        first = await builds.claim("s1", "Navbar")
+        second = await builds.claim("s1", "Navbar")
+        return first, second, builds.stats(), len(llm.calls)
+
+    first, second, stats, calls = asyncio.run(scenario())
+    assert first["name"] == "Navbar" and second is None
+    assert (stats["hits"], calls) == (1, 1)
+
+def test_claiming_another_component_cancels_the_parked_build():
+    async def scenario():
+        builds = SpeculativeBuilds(CodeGenerator(llm_client=FakeLLM(delay=1.0)))
+        builds.schedule("s1", SESSION, "Navbar")
+        result = await builds.claim("s1", "Hero")
+        return result, builds.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result is None
+    assert (stats["misses"], stats["cancelled"], stats["parked"]) == (1, 1, 0)
+
+def test_unclaimed_builds_expire():
+    async def scenario():
+        builds = SpeculativeBuilds(CodeGenerator(llm_client=FakeLLM()), idle_timeout=0.01)
+        builds.schedule("s1", SESSION, "Navbar")
+        await asyncio.sleep(0.05)
+        return await builds.claim("s1", "Navbar"), builds.stats()["expired"]
+
+    assert asyncio.run(scenario()) == (None, 1)
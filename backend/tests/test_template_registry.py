@@ -0,0 +1,39 @@
+import os
+import json
+import time
+from core.services.template_registry import TemplateRegistry
+
+def template(template_id: str, order: int = 0) -> dict:
+    return {"id": template_id, "order": order, "name": template_id.title(), "description": "d", "features": [], "stack": "React", "components": ["Navbar"]}
+
+def write(directory, data: dict) -> None:
+    with open(os.path.join(directory, f"{data['id']}.json"), "w") as template_file:
+        json.dump(data, template_file)
+
+def test_templates_are_sorted_and_served_from_one_serialized_body(tmp_path):
+    write(tmp_path, template("shop", order=2))
+    write(tmp_path, template("blog", order=1))
+    registry = TemplateRegistry(str(tmp_path))
+    snapshot = registry.snapshot()
+    assert [item["id"] for item in json.loads(snapshot.body)["templates"]] == ["blog", "shop"]
+    assert registry.snapshot() is snapshot
+    assert registry.get("shop").name == "Shop"
+
+def test_changed_files_are_reloaded_when_hot_reload_is_on(tmp_path):
+    write(tmp_path, template("blog"))
+    registry = TemplateRegistry(str(tmp_path), reload_interval=0.01)
+    etag = registry.snapshot().etag
+    write(tmp_path, template("shop"))
+    time.sleep(0.02)
+    assert registry.get("shop") is not None
+    assert registry.snapshot().etag != etag and registry.reloads == 1
+
+def test_invalid_file_keeps_the_last_good_set(tmp_path):
+    write(tmp_path, template("blog"))
+    registry = TemplateRegistry(str(tmp_path), reload_interval=0.01)
+    (tmp_path / "broken.json").write_text("{not json")
+    time.sleep(0.02)
+    assert [item.id for item in registry.list()] == ["blog"]
+
+def test_bundled_templates_load():
+    assert TemplateRegistry().list()
@@ -0,0 +1,17 @@
+from core.utils.tsx_scanner import scan_tsx
+from core.utils.validators import CodeValidator
+
+CLASS_WARNING = "Use 'className' instead of 'class' in JSX"
+
+def warnings(code: str):
+    return CodeValidator().validate_component_code(code).warnings
+
+def test_class_attribute_is_flagged_only_without_classname():
+    # Regression: the scanner warned on any class=, the validator before it only when className= was absent
+    assert CLASS_WARNING in warnings('export default function A() { return <div class="a" />; }')
+    assert CLASS_WARNING not in warnings('export default function A() { return <div class="a"><p className="b" /></div>; }')
+
+def test_attributes_are_only_read_inside_jsx_tags():
+    scan = scan_tsx('const s = "<div class=x>"; // class=y\nexport default function A() { return <div className="a" />; }')
+    assert not scan.uses_class_attr
+    assert scan.uses_classname_attr
@@ -0,0 +1,33 @@
+from core.utils.validators import CodeValidator
+
+VALID = "import React from 'react';\n\nexport default function Hero() {\n  return <div className=\"hero\" />;\n}\n"
+
+def test_results_are_memoized_by_content():
+    validator = CodeValidator()
+    first = validator.validate_component_code(VALID)
+    first.notes.append("changed by the caller")
+    second = validator.validate_component_code(VALID)
+    assert "changed by the caller" not in second.notes
+    assert validator.stats()["cache"]["hits"] == 1
+
+def test_unbalanced_code_is_invalid():
+    result = CodeValidator().validate_component_code("export default function Hero() { return <div>;")
+    assert not result.is_valid
+    assert "Unbalanced brackets or parentheses" in result.errors
+
+def test_dangerous_calls_are_reported():
+    result = CodeValidator().validate_component_code(VALID.replace("return", "eval(input);\n  return"))
+    assert not result.is_valid
+
+def test_fixed_code_is_validated_again():
+    validator = CodeValidator()
+    code, result = validator.validate_and_fix("export default function Hero() {\n  eval(input);\n  return <div class=\"hero\" />;\n}\n")
+    assert "className=" in code and "import React" in code
+    # The result describes the fixed code, not the original
+    assert result == validator.validate_component_code(code)
+    assert not result.is_valid and "Use 'className' instead of 'class' in JSX" not in result.warnings
+    assert validator.stats()["fix_runs"] == 1
+
+def test_valid_code_is_left_alone():
+    code, result = CodeValidator().validate_and_fix(VALID)
+    assert code == VALID and result.is_valid